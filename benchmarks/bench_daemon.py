@@ -0,0 +1,95 @@
+"""Measure daemon request rates against one process per password.
+
+Starts ``gen.py --serve`` on a temporary socket and times single requests
+over one reused connection, batched requests, several concurrent clients,
+and (for reference) a fresh ``gen.py`` process per password.
+
+Usage: python benchmarks/bench_daemon.py [--requests N] [--clients C]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from passcraft.client import Client  # noqa: E402
+
+GEN = os.path.join(ROOT, "gen.py")
+
+
+def start_daemon(path):
+    proc = subprocess.Popen([sys.executable, GEN, "--serve", "--socket", path],
+                            stdout=subprocess.PIPE, text=True)
+    proc.stdout.readline()  # "listening on ..."
+    return proc
+
+
+def rate(label, requests, seconds):
+    print(f"{label:<34} {requests / seconds:>12,.0f} req/s")
+
+
+def single(path, requests):
+    with Client(path) as client:
+        start = time.perf_counter()
+        for _ in range(requests):
+            client.password(length=20)
+        return time.perf_counter() - start
+
+
+def batched(path, requests, batch_size=100):
+    batch = [{"op": "password", "length": 20}] * batch_size
+    with Client(path) as client:
+        start = time.perf_counter()
+        for _ in range(requests // batch_size):
+            client.batch(batch)
+        return time.perf_counter() - start
+
+
+def concurrent(path, requests, clients):
+    per_client = requests // clients
+    threads = [threading.Thread(target=single, args=(path, per_client)) for _ in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start
+
+
+def processes(requests):
+    start = time.perf_counter()
+    for _ in range(requests):
+        subprocess.run([sys.executable, GEN, "--length", "20"], stdout=subprocess.DEVNULL, check=True)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--processes", type=int, default=20,
+                        help="gen.py invocations for the per-process baseline")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.sock")
+        proc = start_daemon(path)
+        try:
+            rate("daemon, one request per call", args.requests, single(path, args.requests))
+            rate("daemon, batches of 100", args.requests, batched(path, args.requests))
+            rate(f"daemon, {args.clients} concurrent clients", args.requests,
+                 concurrent(path, args.requests, args.clients))
+        finally:
+            proc.terminate()
+            proc.wait()
+    rate("new gen.py process per password", args.processes, processes(args.processes))
+
+
+if __name__ == "__main__":
+    main()
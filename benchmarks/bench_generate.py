@@ -0,0 +1,47 @@
+"""Compare per-character ``secrets.choice`` generation with the batched sampler.
+
+Usage: python benchmarks/bench_generate.py [--count N]
+"""
+
+import argparse
+import os
+import secrets
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from passcraft import engine, rng  # noqa: E402
+
+
+def per_char(count, length, charset):
+    # The original GUI implementation, kept here as the baseline
+    out = []
+    for _ in range(count):
+        part = ''.join(secrets.choice(charset) for _ in range(length))
+        out.append(''.join(secrets.SystemRandom().sample(part, len(part))))
+    return out
+
+
+def rate(func, count, *args):
+    start = time.perf_counter()
+    func(count, *args)
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=20000)
+    args = parser.parse_args()
+
+    charset = engine.build_charset(symbols=True)
+    print(f"numpy: {'yes' if rng.numpy() is not None else 'no'}")
+    print(f"{'length':>6} {'per-char/s':>12} {'batched/s':>12} {'speedup':>8}")
+    for length in (16, 32, 64):
+        base = rate(per_char, args.count // 10, length, charset)
+        fast = rate(engine.generate_passwords, args.count, length, charset)
+        print(f"{length:>6} {base:>12,.0f} {fast:>12,.0f} {fast / base:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
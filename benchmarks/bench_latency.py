@@ -0,0 +1,49 @@
+"""Latency percentiles of single generations, with and without the entropy pool.
+
+Usage: python benchmarks/bench_latency.py [--calls N]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from passcraft import engine, rng  # noqa: E402
+
+
+def percentiles(fn, calls):
+    timings = []
+    for _ in range(calls):
+        start = time.perf_counter_ns()
+        fn()
+        timings.append(time.perf_counter_ns() - start)
+    timings.sort()
+    return [timings[min(int(calls * q), calls - 1)] / 1000 for q in (0.5, 0.99, 0.999)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=50_000)
+    args = parser.parse_args()
+
+    charset = engine.build_charset(symbols=True)
+    wordlist = engine.load_wordlist(engine.WORDLIST_FILE)
+    cases = [
+        ("password(16)", lambda: engine.generate_password(16, charset)),
+        ("password(16, keyword)", lambda: engine.generate_password(16, charset, "acme")),
+        ("passphrase(4)", lambda: engine.generate_passphrase(wordlist)),
+    ]
+    print(f"{'':<24} {'source':<9} {'p50 us':>8} {'p99 us':>8} {'p99.9 us':>9}")
+    for source in ("urandom", "pool"):
+        if source == "pool":
+            rng.use_pool()
+            time.sleep(0.1)  # let the refill thread fill the ring
+        for label, fn in cases:
+            p50, p99, p999 = percentiles(fn, args.calls)
+            print(f"{label:<24} {source:<9} {p50:>8.1f} {p99:>8.1f} {p999:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
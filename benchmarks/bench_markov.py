@@ -0,0 +1,82 @@
+"""Train, load and sample the pronounceable-password model.
+
+Usage: python benchmarks/bench_markov.py [--words N] [--count N] [--length N] [--order N]
+
+Writes a synthetic corpus of ``--words`` syllable words (or reads
+``--corpus FILE``), then reports the time to train and compile the model,
+to open the compiled table, and the throughput of ``--count`` passwords
+against charset mode at the same length, with each mode's entropy.
+"""
+
+import argparse
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from passcraft import engine, markov, rng  # noqa: E402
+
+SYLLABLES = ("ka", "lo", "mi", "ren", "tas", "vo", "quin", "bar", "del", "fu", "ith",
+             "son", "pre", "dra", "gol", "ny", "shu", "el", "wex", "ti", "mor", "ca")
+
+
+def write_corpus(path, words):
+    pick = random.Random(1).choices  # repeatable corpus, not a secret
+    with open(path, "w", encoding="ascii") as f:
+        for _ in range(0, words, 10_000):
+            f.writelines("".join(pick(SYLLABLES, k=n)) + "\n"
+                         for n in pick((1, 2, 3, 4), k=10_000))
+
+
+def rate(fn, count):
+    start = time.perf_counter()
+    fn(count)
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--words", type=int, default=3_000_000)
+    parser.add_argument("--corpus", help="train on this file instead of a synthetic corpus")
+    parser.add_argument("--count", type=int, default=1_000_000)
+    parser.add_argument("--length", type=int, default=16)
+    parser.add_argument("--order", type=int, choices=markov.ORDERS, default=markov.DEFAULT_ORDER)
+    args = parser.parse_args()
+
+    print(f"numpy: {'yes' if rng.numpy() is not None else 'no'}")
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["PASSCRAFT_CACHE_DIR"] = tmp
+        corpus = args.corpus
+        if corpus is None:
+            corpus = os.path.join(tmp, "corpus.txt")
+            write_corpus(corpus, args.words)
+        size = os.path.getsize(corpus)
+
+        start = time.perf_counter()
+        markov.compile_model(corpus, args.order)
+        print(f"train + compile ({size / 1e6:.1f} MB, order {args.order}): "
+              f"{time.perf_counter() - start:.2f} s")
+        start = time.perf_counter()
+        model = markov.load_model(corpus, args.order)
+        print(f"load compiled model: {(time.perf_counter() - start) * 1e3:.2f} ms")
+
+        model.generate(1000, args.length)  # lookup tables built outside the timing
+        charsets = (("charset a-z", engine.CHARSETS["lower"]),
+                    ("charset A-Z a-z 0-9", engine.build_charset()))
+        print(f"{'mode':<22} {'bits':>6} {'passwords/s':>14}")
+        print(f"{'markov':<22} {model.entropy(args.length):>6.1f} "
+              f"{rate(lambda n: model.generate(n, args.length), args.count):>14,.0f}")
+        for label, charset in charsets:
+            table = rng.charset_table(charset)
+            bits = args.length * math.log2(len(charset))
+            print(f"{label:<22} {bits:>6.1f} "
+                  f"{rate(lambda n: rng.random_strings(n, args.length, table), args.count):>14,.0f}")
+        model.close()
+
+
+if __name__ == "__main__":
+    main()
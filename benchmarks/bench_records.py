@@ -0,0 +1,85 @@
+"""Memory and load time of saved records held in memory, per 1M entries.
+
+Usage: python benchmarks/bench_records.py [--size N]
+
+Fills a plaintext store with ``--size`` entries, then loads all of them
+three ways and reports the resident memory they add and the load time,
+scaled to one million entries:
+
+* dicts: a dict per entry with a formatted date string, as records used to
+  be read;
+* records: the store's slotted :class:`Record` objects, with interned types
+  and integer timestamps;
+* search index: the Saved tab's :class:`SearchIndex`, names in one arena
+  with their trigram postings and the other fields in arrays.
+"""
+
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from passcraft.search import SearchIndex  # noqa: E402
+from passcraft.store import PasswordStore, format_date  # noqa: E402
+
+
+def rss():
+    """Resident set size in bytes (peak size where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def fill(path, size):
+    store = PasswordStore(path)
+    start = 1_700_000_000
+    store.add_many({"name": f"account {i} example.com", "password": f"pw-{i:08d}-{i * 7919:x}",
+                    "type": "passphrase" if i % 5 == 0 else "password",
+                    "date": start + 37 * i} for i in range(size))
+    return store
+
+
+def as_dicts(store):
+    return [{"id": r.id, "name": r.name, "password": r.password, "type": r.type,
+             "date": format_date(r.date)} for r in store.records()]
+
+
+def measure(load):
+    gc.collect()
+    before = rss()
+    start = time.perf_counter()
+    held = load()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    return held, rss() - before, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = fill(os.path.join(tmp, "bench.db"), args.size)
+        scale = 1_000_000 / args.size
+        print(f"{args.size:,} entries; figures per 1M entries")
+        print(f"{'held as':<14} {'RSS':>10} {'load':>9}")
+        for label, load in (("dicts", lambda: as_dicts(store)),
+                            ("records", lambda: list(store.records())),
+                            ("search index", lambda: SearchIndex(store.records()))):
+            held, memory, elapsed = measure(load)
+            print(f"{label:<14} {memory * scale / 2**20:>7.0f} MB {elapsed * scale:>7.2f} s")
+            del held
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Measure bulk generation throughput as the number of worker processes grows.
+
+Usage: python benchmarks/bench_scaling.py [--count N] [--max-workers W]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from passcraft import engine, parallel, profiles  # noqa: E402
+from passcraft.output import BatchWriter  # noqa: E402
+
+
+def run(count, workers, job):
+    with open(os.devnull, "w") as sink:
+        start = time.perf_counter()
+        parallel.run_bulk(BatchWriter(sink), count, job, workers)
+        return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=2_000_000)
+    parser.add_argument("--length", type=int, default=20)
+    parser.add_argument("--max-workers", type=int, default=parallel.default_workers())
+    args = parser.parse_args()
+
+    job = parallel.profile_job(profiles.Profile(length=args.length, classes=tuple(engine.CHARSETS)))
+    print(f"{args.count:,} passwords of length {args.length}, {os.cpu_count()} CPU(s)")
+    print(f"{'workers':>7} {'items/s':>14} {'speedup':>8} {'efficiency':>10}")
+    base = None
+    for workers in range(1, args.max_workers + 1):
+        throughput = run(args.count, workers, job)
+        base = base or throughput
+        speedup = throughput / base
+        print(f"{workers:>7} {throughput:>14,.0f} {speedup:>7.2f}x {speedup / workers:>9.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Compare the encrypted vault with the plaintext store as the vault grows.
+
+Reports the time from opening the database to having the first screen of
+rows (one page of ids plus the first block of records), with a cold and a
+session-cached master key, and the latency of a single save and delete.
+
+Usage: python benchmarks/bench_vault.py [--sizes 1000,10000,100000] [--saves N]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from passcraft import vault  # noqa: E402
+from passcraft.store import PasswordStore  # noqa: E402
+
+PAGE_SIZE = 1000
+BLOCK_SIZE = 256
+PASSWORD = "correct horse battery staple"
+
+
+def fill(path, size):
+    store = PasswordStore(path)
+    store.add_many({"name": f"account {i}", "password": f"pw-{i:08d}-{i * 7919:x}",
+                    "type": "password", "date": 1_767_225_600} for i in range(size))
+    store.close()
+
+
+def first_render(opener):
+    start = time.perf_counter()
+    store = opener()
+    ids = [record_id for _, record_id in store.page_ids(limit=PAGE_SIZE)]
+    store.get_many(ids[:BLOCK_SIZE])
+    elapsed = time.perf_counter() - start
+    return store, elapsed
+
+
+def save_latency(store, saves):
+    start = time.perf_counter()
+    added = [store.add(f"bench {i}", f"bench-password-{i}", "password")
+             for i in range(saves)]
+    save = (time.perf_counter() - start) / saves
+    start = time.perf_counter()
+    for record in added:
+        store.delete(record["id"])
+    delete = (time.perf_counter() - start) / saves
+    return save, delete
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--saves", type=int, default=50)
+    args = parser.parse_args()
+    if not vault.available():
+        sys.exit("the 'cryptography' package is required")
+
+    print(f"scrypt n={vault.KDF_PARAMS['n']}, r={vault.KDF_PARAMS['r']}, "
+          f"{vault.CHUNK_RECORDS} records per chunk")
+    print(f"{'entries':>9} {'store':>9} {'open+page':>10} {'cached key':>10} "
+          f"{'save':>9} {'delete':>9}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bench.db")
+            fill(path, size)
+            store, opened = first_render(lambda: PasswordStore(path))
+            save, delete = save_latency(store, args.saves)
+            store.close()
+            print(f"{size:>9,} {'plain':>9} {opened * 1e3:>8.1f}ms {'':>10} "
+                  f"{save * 1e3:>7.2f}ms {delete * 1e3:>7.2f}ms")
+
+            vault.EncryptedPasswordStore(path, PASSWORD).close()
+            vault.forget_keys()
+            store, cold = first_render(lambda: vault.EncryptedPasswordStore(path, PASSWORD))
+            store.close()
+            store, warm = first_render(lambda: vault.EncryptedPasswordStore(path, PASSWORD))
+            save, delete = save_latency(store, args.saves)
+            store.close()
+            print(f"{size:>9,} {'encrypted':>9} {cold * 1e3:>8.1f}ms {warm * 1e3:>8.1f}ms "
+                  f"{save * 1e3:>7.2f}ms {delete * 1e3:>7.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,389 @@
+"""Benchmark suite for the hot paths, with JSON results and regression checks.
+
+    python benchmarks/suite.py run [-o results.json] [--quick] [-k FILTER]
+    python benchmarks/suite.py compare BASE.json NEW.json [--threshold 0.15]
+
+``run`` times generation, passphrases across wordlist sizes, training,
+loading and sampling the pronounceable-password model, analysis,
+breach-index lookups, reading every saved record, building and querying
+the search index, the GUI's save/load/export paths at vault sizes from
+10 to 1M entries, and cold start to the first shown window and to the first
+idle event loop. The GUI runs headless (``QT_QPA_PLATFORM=offscreen``),
+inside a temporary directory so the real vault and cache are never touched. ``--quick`` caps vault and wordlist sizes
+for a run of well under a minute.
+
+``compare`` prints the ratio of every timing present in both files and exits
+with status 1 when any got slower by more than ``--threshold``.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+VAULT_SIZES = (10, 1000, 100_000, 1_000_000)
+QUICK_VAULT_SIZES = (10, 1000, 10_000)
+WORDLIST_SIZES = (100, 10_000, 1_000_000)
+QUICK_WORDLIST_SIZES = (100, 10_000)
+REPEAT = 5
+# Differences below this are timer noise, whatever the ratio
+NOISE_FLOOR = 2e-6
+
+
+def measure(fn, repeat=REPEAT):
+    """Seconds per call: median and best of ``repeat`` auto-sized samples."""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    samples = [t / number for t in timer.repeat(repeat, number)]
+    return {"seconds": statistics.median(samples), "min": min(samples), "calls": number * repeat}
+
+
+def measure_once(fn, repeat=REPEAT):
+    """For slow operations: ``repeat`` single calls."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return {"seconds": statistics.median(samples), "min": min(samples), "calls": repeat}
+
+
+class Suite:
+    def __init__(self, quick=False, pattern=None):
+        self.quick = quick
+        self.pattern = pattern
+        self.results = {}
+
+    def wants(self, name):
+        return self.pattern is None or self.pattern in name
+
+    def record(self, name, result):
+        self.results[name] = result
+        print(f"{name:<52} {format_seconds(result['seconds']):>10}  "
+              f"(best {format_seconds(result['min'])}, {result['calls']:,} calls)", flush=True)
+
+    def bench(self, name, fn, once=False):
+        if self.wants(name):
+            self.record(name, (measure_once if once else measure)(fn))
+
+    # -- engine and analysis ------------------------------------------------
+
+    def generation(self):
+        from passcraft import engine
+        charsets = {
+            "lower": engine.build_charset(upper=False, digits=False),
+            "alnum": engine.build_charset(),
+            "all": engine.build_charset(symbols=True),
+        }
+        for length in (8, 16, 32, 64):
+            for label, charset in charsets.items():
+                self.bench(f"generate_password/len={length}/{label}",
+                           lambda: engine.generate_password(length, charset))
+        charset = charsets["all"]
+        self.bench("generate_password/len=16/all/keyword",
+                   lambda: engine.generate_password(16, charset, "acme"))
+        self.bench("generate_passwords/batch=10000/len=16",
+                   lambda: engine.generate_passwords(10_000, 16, charset), once=True)
+
+        from passcraft import policy
+        every = policy.make_policy(tuple(engine.CHARSETS))
+        strict = policy.make_policy(tuple(engine.CHARSETS), minimum=2, no_repeat=True)
+        for label, rules in (("every-class", every), ("2-each/no-repeat", strict)):
+            self.bench(f"generate_policy_password/len=16/{label}",
+                       lambda: engine.generate_policy_passwords(1, 16, rules))
+            self.bench(f"generate_policy_passwords/batch=10000/len=16/{label}",
+                       lambda: engine.generate_policy_passwords(10_000, 16, rules), once=True)
+
+        from passcraft import profiles
+        mixed = [profiles.Profile(length=length, classes=tuple(engine.CHARSETS),
+                                  each_class=length % 2 == 0)
+                 for length in range(12, 28)]
+        self.bench("profile/compile/len=16/every-class", lambda: (
+            profiles.compile_profile.cache_clear(), profiles.compile_profile(mixed[4])))
+        # A different profile per item, as when the GUI or daemon switches
+        self.bench("profile/switch/16-profiles", lambda: [
+            profiles.compile_profile(profile).generate(1) for profile in mixed])
+
+    def passphrases(self, tmp):
+        from passcraft import engine
+        for size in QUICK_WORDLIST_SIZES if self.quick else WORDLIST_SIZES:
+            name = f"generate_passphrase/wordlist={size}"
+            if not self.wants(name):
+                continue
+            path = os.path.join(tmp, f"words-{size}.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.writelines(f"word{i}\n" for i in range(size))
+            wordlist = engine.load_wordlist(path)
+            self.bench(name, lambda: engine.generate_passphrase(wordlist))
+            self.bench(f"generate_passphrases/batch=10000/wordlist={size}",
+                       lambda: engine.generate_passphrases(10_000, wordlist), once=True)
+            self.bench(f"generate_passphrases/batch=10000/wordlist={size}/all-options",
+                       lambda: engine.generate_passphrases(
+                           10_000, wordlist, 8, case="random", unique_words=True, digits=2,
+                           symbols=1), once=True)
+            self.bench(f"load_wordlist/wordlist={size}/compiled",
+                       lambda: engine.load_wordlist(path), once=True)
+
+    def markov(self, tmp):
+        from passcraft import markov
+        size = 100_000 if self.quick else 1_000_000
+        names = (f"markov/train/words={size}", "markov/load/compiled", "markov/generate/len=16",
+                 "markov/generate/batch=10000/len=16")
+        if not any(self.wants(name) for name in names):
+            return
+        syllables = ("ka", "lo", "mi", "ren", "tas", "vo", "quin", "bar", "del", "fu")
+        path = os.path.join(tmp, "markov-corpus.txt")
+        with open(path, "w", encoding="ascii") as f:
+            # Each word spells its index in syllables
+            f.writelines("".join(syllables[int(d)] for d in str(i)) + "\n" for i in range(size))
+        self.bench(names[0],
+                   lambda: markov.compile_model(path, markov.DEFAULT_ORDER), once=True)
+        self.bench(names[1], lambda: markov.load_model(path).close(), once=True)
+        model = markov.load_model(path)
+        self.bench(names[2], lambda: model.generate(1, 16))
+        self.bench(names[3], lambda: model.generate(10_000, 16), once=True)
+
+    def analysis(self):
+        from passcraft import analysis, patterns
+        patterns.default_estimator()  # built outside the timings
+        samples = {"short": "hunter2", "word": "Password123!", "random16": "q7$Lm2!vR9@xK4#p",
+                   "phrase": "Correct-Horse-Battery-Staple-42", "random64": "aZ3$" * 16}
+        for label, password in samples.items():
+            self.bench(f"analyze_password/{label}", lambda: analysis.analyze(password))
+            self.bench(f"analyze_password/{label}/classes-only",
+                       lambda: analysis.analyze(password, use_patterns=False))
+
+    def breach(self, tmp):
+        names = ("breach_lookup/hit", "breach_lookup/miss",
+                 "breach_lookup/hit/no-bloom", "breach_lookup/miss/no-bloom")
+        if not any(self.wants(name) for name in names):
+            return
+        import hashlib
+        from passcraft import breach
+        size = 100_000 if self.quick else 1_000_000
+        dump = os.path.join(tmp, "breach-dump.txt")
+        with open(dump, "w", encoding="ascii") as f:
+            f.writelines(f"{hashlib.sha1(b'pw%d' % i).hexdigest().upper()}:{i % 100 + 1}\n"
+                         for i in range(size))
+        for bloom_bits, suffix in ((breach.BLOOM_BITS_PER_ENTRY, ""), (0, "/no-bloom")):
+            path = os.path.join(tmp, f"breach{suffix.replace('/', '-')}.idx")
+            breach.build_index(dump, path, bloom_bits=bloom_bits)
+            index = breach.BreachIndex(path, preload=True)
+            self.bench(f"breach_lookup/hit{suffix}", lambda: index.count("pw12345"))
+            self.bench(f"breach_lookup/miss{suffix}", lambda: index.count("not-in-the-corpus"))
+
+    def uniqueness(self, tmp):
+        from passcraft import engine, unique
+        charset = engine.build_charset(symbols=True)
+        count = 100_000 if self.quick else 1_000_000
+        for label, memory in (("bloom", unique.DEFAULT_MEMORY), ("tiny-bloom", 1 << 16)):
+            name = f"generate_unique/count={count}/{label}"
+            if not self.wants(name):
+                continue
+
+            def run():
+                with unique.UniqueFilter(count, memory=memory, directory=tmp) as seen:
+                    for _ in unique.iter_unique(
+                            lambda n: engine.generate_passwords(n, 8, charset), count, seen):
+                        pass
+            self.bench(name, run, once=True)
+
+    def records(self, tmp):
+        from passcraft.search import SearchIndex
+        from passcraft.store import PasswordStore
+        size = 100_000 if self.quick else 1_000_000
+        queries = {"type": dict(type="passphrase"),
+                   "type+date-sort": dict(type="password", column="date", descending=True),
+                   "text+type": dict(text="unt 12", type="password"),
+                   "prefix1": dict(text="a")}
+        names = (f"store/read_all/vault={size}", f"search_index/build/vault={size}",
+                 *(f"search_index/query/{label}/vault={size}" for label in queries))
+        if not any(self.wants(name) for name in names):
+            return
+        store = PasswordStore(os.path.join(tmp, "records.db"))
+        store.add_many({"name": f"account {i}", "password": f"pw-{i:09d}",
+                        "type": "passphrase" if i % 5 == 0 else "password",
+                        "date": 1_767_225_600 + i} for i in range(size))
+        self.bench(names[0], lambda: list(store.records()), once=True)
+        self.bench(names[1], lambda: SearchIndex(store.records()), once=True)
+        index = SearchIndex(store.records())
+        for name, query in zip(names[2:], queries.values()):
+            index.search(**query)  # orders built outside the timings
+            self.bench(name, lambda: index.search(**query))
+        store.close()
+
+    # -- GUI ----------------------------------------------------------------
+
+    def gui(self, tmp):
+        from PyQt6.QtWidgets import QApplication, QFileDialog, QInputDialog, QMessageBox
+        import gen
+
+        app = QApplication.instance() or QApplication([])
+        # Dialogs would block a headless run; answer them automatically
+        QInputDialog.getText = lambda *a, **k: ("bench", True)
+        QMessageBox.information = lambda *a, **k: None
+        QMessageBox.warning = lambda *a, **k: None
+        QMessageBox.critical = lambda *a, **k: None
+        cwd = os.getcwd()
+        for size in QUICK_VAULT_SIZES if self.quick else VAULT_SIZES:
+            names = [f"{op}/vault={size}" for op in
+                     ("save_password", "load_saved_passwords", "export_passwords")]
+            if not any(self.wants(name) for name in names):
+                continue
+            vault_dir = os.path.join(tmp, f"vault-{size}")
+            os.makedirs(vault_dir)
+            os.chdir(vault_dir)
+            try:
+                window = gen.PasswordGenerator()
+                window.store.add_many({"name": f"entry {i}", "password": f"pw-{i:09d}",
+                                       "type": "password", "date": 1_767_225_600}
+                                      for i in range(size))
+                window.load_saved_passwords()
+                app.processEvents()
+                self.bench(names[0], lambda: window.save_password("Benchmark-Pass-42"), once=True)
+                self.bench(names[1], window.load_saved_passwords, once=True)
+                export_path = os.path.join(vault_dir, "export.csv")
+                QFileDialog.getSaveFileName = lambda *a, **k: (export_path, "CSV Files (*.csv)")
+                self.bench(names[2], window.export_passwords, once=True)
+                window.close()
+                window.store.close()
+                window.deleteLater()
+                app.processEvents()
+            finally:
+                os.chdir(cwd)
+
+    def cold_start(self, tmp):
+        names = ("startup/first_window", "startup/time_to_interactive")
+        if not any(self.wants(name) for name in names):
+            return
+        script = ("import sys, os; sys.path.insert(0, %r); os.chdir(%r)\n"
+                  "from PyQt6.QtWidgets import QApplication\n"
+                  "import gen\n"
+                  "app = QApplication(sys.argv)\n"
+                  "window = gen.PasswordGenerator()\n"
+                  "while window.time_to_interactive is None:\n"
+                  "    app.processEvents()\n"
+                  "print(window.time_to_interactive, flush=True)\n") % (ROOT, tmp)
+        interactive = []
+
+        def launch():
+            result = subprocess.run([sys.executable, "-c", script], check=True,
+                                    capture_output=True, text=True)
+            interactive.append(float(result.stdout.split()[-1]))
+
+        launch()  # warm the OS file cache and the compiled caches
+        interactive.clear()
+        result = measure_once(launch)
+        if self.wants(names[0]):
+            self.record(names[0], result)
+        if self.wants(names[1]):
+            # Measured in the child, from its import of gen to the first idle event loop
+            self.record(names[1], {"seconds": statistics.median(interactive),
+                                   "min": min(interactive), "calls": len(interactive)})
+
+    def run(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            os.environ["PASSCRAFT_CACHE_DIR"] = os.path.join(tmp, "cache")
+            self.generation()
+            self.passphrases(tmp)
+            self.markov(tmp)
+            self.analysis()
+            self.breach(tmp)
+            self.uniqueness(tmp)
+            self.records(tmp)
+            self.gui(tmp)
+            self.cold_start(tmp)
+        return self.results
+
+
+def format_seconds(seconds):
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def command_run(args):
+    results = Suite(args.quick, args.filter).run()
+    report = {
+        "meta": {
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "quick": args.quick,
+        },
+        "results": results,
+    }
+    output = args.output or os.path.join(
+        ROOT, "benchmarks", "results",
+        f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{report['meta']['revision'] or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+    return 0
+
+
+def command_compare(args):
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)["results"]
+    with open(args.new, encoding="utf-8") as f:
+        new = json.load(f)["results"]
+    regressions = 0
+    print(f"{'benchmark':<52} {'base':>10} {'new':>10} {'change':>8}")
+    for name in sorted(base.keys() & new.keys()):
+        old_s, new_s = base[name]["seconds"], new[name]["seconds"]
+        ratio = new_s / old_s if old_s else float("inf")
+        flag = ""
+        if ratio > 1 + args.threshold and new_s - old_s > NOISE_FLOOR:
+            flag = "  REGRESSION"
+            regressions += 1
+        elif ratio < 1 / (1 + args.threshold):
+            flag = "  faster"
+        print(f"{name:<52} {format_seconds(old_s):>10} {format_seconds(new_s):>10} "
+              f"{ratio - 1:>+7.0%}{flag}")
+    for name in sorted(base.keys() - new.keys()):
+        print(f"{name:<52} missing from {args.new}")
+    print(f"\n{regressions} regression(s) above {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="run the suite and write a JSON report")
+    run.add_argument("-o", "--output", help="report path (default: benchmarks/results/)")
+    run.add_argument("--quick", action="store_true", help="smaller vaults and wordlists")
+    run.add_argument("-k", "--filter", help="only run benchmarks whose name contains FILTER")
+    compare = commands.add_parser("compare", help="compare two reports")
+    compare.add_argument("base")
+    compare.add_argument("new")
+    compare.add_argument("--threshold", type=float, default=0.15,
+                         help="relative slowdown reported as a regression (default 0.15)")
+    args = parser.parse_args()
+    return command_run(args) if args.command == "run" else command_compare(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,54 +1,798 @@
 import sys
-import secrets
+
+# Command-line mode: generate without importing Qt or opening a window
+if __name__ == "__main__" and len(sys.argv) > 1:
+    from passcraft.cli import main
+    sys.exit(main())
+
 import math
-import json
-import csv
 import os
-from datetime import datetime
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache, partial
+from itertools import takewhile
+
+STARTED = time.perf_counter()  # before the Qt import, for time-to-interactive
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                              QGroupBox, QLabel, QLineEdit, QPushButton, QCheckBox, QSlider,
-                             QListWidget, QProgressBar, QMessageBox, QToolTip,
-                             QTabWidget, QFileDialog, QInputDialog, QDialog, QListWidgetItem)
-from PyQt6.QtCore import Qt
+                             QProgressBar, QMessageBox, QToolTip, QTableView, QHeaderView,
+                             QAbstractItemView, QComboBox, QTabWidget, QFileDialog, QInputDialog,
+                             QDialog, QProgressDialog, QSpinBox)
+from PyQt6.QtCore import (Qt, QAbstractTableModel, QModelIndex, QTimer, QObject, QRunnable,
+                          QThreadPool, pyqtSignal)
 from PyQt6.QtGui import QClipboard, QFont, QPalette, QColor
 
+from passcraft import (analysis, breach, engine, metrics, passphrase, patterns, policy,
+                       profiles, rng, transfer, unique)
+from passcraft.output import BatchWriter, output_format
+from passcraft.search import SearchIndex
+from passcraft.store import FIELDS, PasswordStore, classify, format_date
+
 # Suppress Qt platform theme warnings
 os.environ["QT_LOGGING_RULES"] = "*.debug=false"
 
 # Configuration
 CONFIG_FILE = "config.json"
-SAVED_PASSWORDS_FILE = "saved_passwords.json"
-WORDLIST_FILE = "wordlist.txt"
+SAVED_PASSWORDS_FILE = "saved_passwords.json"  # legacy format, migrated on first run
+SAVED_PASSWORDS_DB = "saved_passwords.db"
+WORDLIST_FILE = engine.WORDLIST_FILE
+BULK_CHUNK_SIZE = 4096
+BULK_VIEW_LIMIT = 1_000_000  # larger batches go to a file
+
+# Themes for the parts of the window that carry a stylesheet of their own:
+# each tab page, the tab bar and the footer. A theme switch restyles only the
+# parts on screen; hidden pages catch up when they are next shown. The window
+# background, the tab frame and dialogs follow theme_palette() instead.
+DARK_STYLESHEET = """
+    QWidget {
+        background-color: #1e1e2e;
+        color: #cdd6f4;
+    }
+    QGroupBox {
+        border: 2px solid #89b4fa;
+        border-radius: 8px;
+        margin-top: 10px;
+        padding-top: 15px;
+    }
+    QGroupBox::title {
+        subcontrol-origin: margin;
+        left: 10px;
+        padding: 0 5px;
+        color: #89b4fa;
+    }
+    QLineEdit, QComboBox, QSpinBox, QTableView {
+        background-color: #313244;
+        color: #cdd6f4;
+        border: 1px solid #45475a;
+        border-radius: 5px;
+        padding: 5px;
+    }
+    QPushButton {
+        background-color: #585b70;
+        color: #cdd6f4;
+        border: 1px solid #6c7086;
+        border-radius: 5px;
+        padding: 5px 10px;
+    }
+    QPushButton:hover {
+        background-color: #6c7086;
+    }
+    QCheckBox {
+        spacing: 5px;
+    }
+    QCheckBox::indicator {
+        width: 16px;
+        height: 16px;
+    }
+    QSlider::groove:horizontal {
+        height: 6px;
+        background: #45475a;
+        border-radius: 3px;
+    }
+    QSlider::handle:horizontal {
+        width: 16px;
+        height: 16px;
+        margin: -5px 0;
+        background: #89b4fa;
+        border-radius: 8px;
+    }
+    QTabWidget::pane {
+        border: 1px solid #45475a;
+    }
+    QTabBar::tab {
+        background: #313244;
+        color: #cdd6f4;
+        padding: 5px 10px;
+        border: 1px solid #45475a;
+        border-bottom: none;
+        border-top-left-radius: 5px;
+        border-top-right-radius: 5px;
+    }
+    QTabBar::tab:selected {
+        background: #45475a;
+        color: #89b4fa;
+    }
+    QTableView::item:selected {
+        background: #585b70;
+    }
+    QHeaderView::section {
+        background: #313244;
+        color: #89b4fa;
+        border: none;
+        padding: 4px;
+    }
+"""
+
+LIGHT_STYLESHEET = """
+    QWidget {
+        background-color: #fafafa;
+        color: #4a4a4a;
+    }
+    QGroupBox {
+        border: 2px solid #1e88e5;
+        border-radius: 8px;
+        margin-top: 10px;
+        padding-top: 15px;
+    }
+    QGroupBox::title {
+        subcontrol-origin: margin;
+        left: 10px;
+        padding: 0 5px;
+        color: #1e88e5;
+    }
+    QLineEdit, QComboBox, QSpinBox, QTableView {
+        background-color: #ffffff;
+        color: #333333;
+        border: 1px solid #e0e0e0;
+        border-radius: 5px;
+        padding: 5px;
+    }
+    QPushButton {
+        background-color: #e0e0e0;
+        color: #333333;
+        border: 1px solid #bdbdbd;
+        border-radius: 5px;
+        padding: 5px 10px;
+    }
+    QPushButton:hover {
+        background-color: #bdbdbd;
+    }
+    QCheckBox {
+        spacing: 5px;
+    }
+    QCheckBox::indicator {
+        width: 16px;
+        height: 16px;
+    }
+    QSlider::groove:horizontal {
+        height: 6px;
+        background: #e0e0e0;
+        border-radius: 3px;
+    }
+    QSlider::handle:horizontal {
+        width: 16px;
+        height: 16px;
+        margin: -5px 0;
+        background: #1e88e5;
+        border-radius: 8px;
+    }
+    QTabWidget::pane {
+        border: 1px solid #e0e0e0;
+    }
+    QTabBar::tab {
+        background: #f5f5f5;
+        color: #666666;
+        padding: 5px 10px;
+        border: 1px solid #e0e0e0;
+        border-bottom: none;
+        border-top-left-radius: 5px;
+        border-top-right-radius: 5px;
+    }
+    QTabBar::tab:selected {
+        background: #ffffff;
+        color: #1e88e5;
+    }
+    QTableView::item:selected {
+        background: #e0e0e0;
+    }
+    QHeaderView::section {
+        background: #f5f5f5;
+        color: #1e88e5;
+        border: none;
+        padding: 4px;
+    }
+"""
+
+
+@lru_cache(maxsize=None)
+def theme_palette(dark):
+    """Application palette matching the dark or light stylesheet."""
+    if dark:
+        background, text, field, button, accent = "#1e1e2e", "#cdd6f4", "#313244", "#585b70", "#89b4fa"
+    else:
+        background, text, field, button, accent = "#fafafa", "#4a4a4a", "#ffffff", "#e0e0e0", "#1e88e5"
+    palette = QPalette()
+    for role, color in ((QPalette.ColorRole.Window, background), (QPalette.ColorRole.WindowText, text),
+                        (QPalette.ColorRole.Base, field), (QPalette.ColorRole.Text, text),
+                        (QPalette.ColorRole.Button, button), (QPalette.ColorRole.ButtonText, text),
+                        (QPalette.ColorRole.Highlight, accent)):
+        palette.setColor(role, QColor(color))
+    return palette
+
+
+@lru_cache(maxsize=None)
+def ui_font(family="Segoe UI", size=10, bold=False):
+    """Shared font instances; ``setFont`` copies them without reallocating."""
+    if bold:
+        return QFont(family, size, QFont.Weight.Bold)
+    return QFont(family, size)
+
+
+def meter_stylesheet(color, dark_text):
+    return f"""
+            QProgressBar {{
+                border: 1px solid {color};
+                border-radius: 5px;
+                text-align: center;
+                color: {'#000000' if dark_text else '#ffffff'};
+            }}
+            QProgressBar::chunk {{
+                background-color: {color};
+                width: 10px;
+            }}
+        """
+
+
+# Strength meter sheets by (tier index, dark text for scores above 50)
+METER_STYLES = {(index, dark_text): meter_stylesheet(color, dark_text)
+                for index, (_, _, color) in enumerate(analysis.TIERS)
+                for dark_text in (False, True)}
+
+
+class SavedPasswordsModel(QAbstractTableModel):
+    """Table model over the password store.
+
+    Only record ids are kept, in the current sort order, and they are paged
+    in lazily as the view scrolls (``canFetchMore``/``fetchMore``). Record
+    contents are read on demand in blocks and held in a small LRU cache, so
+    memory and refresh cost stay flat no matter how big the vault is.
+
+    With a filter set, the ids come from an in-memory :class:`SearchIndex`
+    instead. The index is built on a worker thread once the window is up
+    (see :func:`read_search_index`), or on first use if a search comes
+    sooner, and then kept in step with every insert and delete.
+    """
+
+    HEADERS = ("Name", "Password", "Type", "Date")
+    PAGE_SIZE = 1000
+    BLOCK_SIZE = 256
+    CACHE_SIZE = 8192
+
+    def __init__(self, store, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self._ids = []
+        self._cache = OrderedDict()
+        self._sort_column = "id"
+        self._descending = False
+        self._last_key = None
+        self._exhausted = False
+        self._index = None
+        self._filter = None
+        self.version = 0  # bumped on every change to the store's records
+
+    # -- Qt model interface -------------------------------------------------
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._ids)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            field = FIELDS[index.column()]
+            value = self.record(index.row())[field]
+            return format_date(value) if field == "date" else value
+        if role == Qt.ItemDataRole.UserRole:
+            return self.record(index.row())['password']
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._exhausted
+
+    @metrics.timed("gui.fetch_more")
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._exhausted:
+            return
+        page = self.store.page_ids(self._sort_column, self._descending, self._last_key, self.PAGE_SIZE)
+        if len(page) < self.PAGE_SIZE:
+            self._exhausted = True
+        if not page:
+            return
+        self._last_key = page[-1]
+        first = len(self._ids)
+        self.beginInsertRows(QModelIndex(), first, first + len(page) - 1)
+        self._ids.extend(record_id for _, record_id in page)
+        self.endInsertRows()
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        sort_column = FIELDS[column] if 0 <= column < len(FIELDS) else "id"
+        descending = order == Qt.SortOrder.DescendingOrder
+        if (sort_column, descending) == (self._sort_column, self._descending):
+            return  # e.g. a view attached after loading; the rows are in order
+        self.beginResetModel()
+        self._sort_column = sort_column
+        self._descending = descending
+        self._reset_rows()
+        self.endResetModel()
+
+    # -- filtering ----------------------------------------------------------
+
+    def search_index(self):
+        if self._index is None:
+            self._index = SearchIndex(self.store.records())
+        return self._index
+
+    def adopt_index(self, index, version):
+        """Use an index built on another thread from the records as of ``version``.
+
+        It is dropped if the records changed in the meantime or a search
+        already built one.
+        """
+        if index is not None and self._index is None and version == self.version:
+            self._index = index
+
+    def set_filter(self, text="", type=None, date_from=None, date_to=None):
+        """Show only matching records; with no criteria, show the whole store."""
+        query = dict(text=text, type=type, date_from=date_from, date_to=date_to)
+        self._filter = query if any(query.values()) else None
+        self.reload()
+
+    @metrics.timed("gui.search")
+    def _filtered_ids(self):
+        # Sorted from the index's copy of the fields, without touching the store
+        return self.search_index().search(**self._filter, column=self._sort_column,
+                                          descending=self._descending)
+
+    # -- records ------------------------------------------------------------
+
+    def record(self, row):
+        record_id = self._ids[row]
+        record = self._cache.get(record_id)
+        if record is None:
+            # Load a whole block around the row; neighbours are likely next
+            start = max(0, row - self.BLOCK_SIZE // 4)
+            block = [i for i in self._ids[start:start + self.BLOCK_SIZE] if i not in self._cache]
+            self._cache.update(self.store.get_many(block))
+            while len(self._cache) > self.CACHE_SIZE:
+                self._cache.popitem(last=False)
+            record = self._cache[record_id]
+        else:
+            self._cache.move_to_end(record_id)
+        return record
+
+    @metrics.timed("gui.list_refresh")
+    def reload(self):
+        self.beginResetModel()
+        self._reset_rows()
+        self.endResetModel()
+        # Load the first page now so inserts can be placed right away
+        self.fetchMore()
+
+    def _reset_rows(self):
+        self._ids = []
+        self._cache.clear()
+        self._last_key = None
+        self._exhausted = False
+        if self._filter is not None:
+            self._ids = self._filtered_ids()
+            self._exhausted = True
+
+    def _sort_key(self, record):
+        return (record[self._sort_column], record['id'])
+
+    def insert_record(self, record):
+        """Show a record that was just added to the store."""
+        self.version += 1
+        if self._index is not None:
+            self._index.add(record)
+        if self._filter is not None:
+            self.reload()
+            return
+        key = self._sort_key(record)
+        # Binary search over the loaded rows, reading only O(log n) records
+        lo, hi = 0, len(self._ids)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            before = self._sort_key(self.record(mid)) < key
+            if before != self._descending:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == len(self._ids) and not self._exhausted:
+            return  # sorts after the loaded pages; fetchMore will pick it up
+        self.beginInsertRows(QModelIndex(), lo, lo)
+        self._ids.insert(lo, record['id'])
+        self._cache[record['id']] = record
+        self.endInsertRows()
+
+    def remove_row(self, row):
+        """Delete the record at ``row`` from the store and the view."""
+        record_id = self._ids[row]
+        self.store.delete(record_id)
+        self.version += 1
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._ids[row]
+        self._cache.pop(record_id, None)
+        self.endRemoveRows()
+        if self._index is not None:
+            self._index.remove(record_id)
+
+    def clear(self):
+        self.store.clear()
+        self.version += 1
+        if self._index is not None:
+            self._index.clear()
+        self.reload()
+
+    def invalidate_index(self):
+        """Drop the search index after bulk changes; it is rebuilt on demand."""
+        self.version += 1
+        self._index = None
+        self.reload()
+
+
+class TransferProgress(QProgressDialog):
+    """Modal progress for jobs on the saved passwords (export, import, checks).
+
+    The job runs as a :class:`Task`; its ``progress`` signal drives the bar
+    and Cancel cancels it. Being window-modal, the dialog keeps the user out
+    of the rest of the window until the job ends.
+    """
+
+    def __init__(self, label, total, parent=None):
+        super().__init__(label, "Cancel", 0, total, parent)
+        self.setWindowTitle("PassCraft")
+        self.setWindowModality(Qt.WindowModality.WindowModal)
+        self.setMinimumDuration(0)
+        self.setAutoClose(False)
+
+    def show_progress(self, done, total):
+        if not total and self.maximum():
+            self.setMaximum(0)  # unknown size: busy indicator
+        if total:
+            self.setMaximum(total)
+            self.setValue(done)
+        self.setLabelText(f"{self.labelText().split(chr(10))[0]}\n{done:,} processed")
+
+
+class PasswordDraft:
+    """Random characters of one generated password, re-combinable with keywords.
+
+    Like :func:`engine.generate_password`, a keyword of ``k`` characters
+    replaces the last ``k`` random characters and goes in at a uniformly
+    random position. That position is drawn once per length, so editing the
+    keyword back and forth gives back the same passwords.
+
+    Cutting characters off could break a password policy, so with
+    ``redraw(length)`` the shorter random parts are drawn afresh (once per
+    length too), falling back to cutting when the policy no longer fits.
+    """
+
+    def __init__(self, chars, redraw=None):
+        self.chars = chars
+        self.redraw = redraw
+        self.parts = {len(chars): chars}
+        self.positions = {}
+
+    def compose(self, keyword):
+        random_len = max(0, len(self.chars) - len(keyword))
+        part = self.parts.get(random_len)
+        if part is None:
+            part = self.chars[:random_len]
+            if self.redraw is not None:
+                try:
+                    part = self.redraw(random_len)
+                except ValueError:
+                    pass
+            self.parts[random_len] = part
+        if not keyword:
+            return part
+        pos = self.positions.get(random_len)
+        if pos is None:
+            pos = self.positions[random_len] = rng.randbelow(random_len + 1)
+        return part[:pos] + keyword + part[pos:]
+
+
+class TaskSignals(QObject):
+    progress = pyqtSignal(int, int)    # done, total
+    chunk = pyqtSignal(list, object)   # partial results, optional strength labels
+    status = pyqtSignal(str)
+    finished = pyqtSignal(object)      # return value of the task function
+    failed = pyqtSignal(str)
+
+
+class Task(QRunnable):
+    """Runs ``fn(task)`` on the global ``QThreadPool``.
+
+    ``fn`` reports through ``task.signals`` and polls ``task.cancelled``.
+    The signals object lives on the GUI thread, so connected slots run there
+    (queued) and may touch widgets freely.
+    """
+
+    def __init__(self, fn):
+        super().__init__()
+        self.fn = fn
+        self.signals = TaskSignals()
+        self._cancel = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def start(self):
+        QThreadPool.globalInstance().start(self)
+
+    def report(self, done, total):
+        """A :mod:`passcraft.transfer` progress callback; ``False`` once cancelled."""
+        self.signals.progress.emit(done, total or 0)
+        return not self.cancelled
+
+    def run(self):
+        try:
+            result = self.fn(self)
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+            return
+        self.signals.finished.emit(result)
+
+
+def generate_bulk(task, batches, total, path=None, field="password", score=False,
+                  seen=None, store=None):
+    """Task body for the Bulk tab: stream ``batches`` to ``path`` or to the view.
+
+    With a :class:`unique.UniqueFilter` as ``seen``, every password saved in
+    ``store`` is added to it first, so none of them is generated again.
+    """
+    if seen is not None:
+        seed_unique(task, seen, store)
+        if task.cancelled:
+            return 0
+    stream = open(path, "w", newline="", encoding="utf-8") if path else None
+    try:
+        writer = BatchWriter(stream, output_format(path), field) if stream else None
+        estimator = patterns.default_estimator() if score else None
+        done = 0
+        for batch in batches:
+            if task.cancelled:
+                break
+            if writer is not None:
+                writer.write_batch(batch)
+            else:
+                strengths = None
+                if estimator is not None:
+                    strengths = [analysis.analyze(p, flags, estimator).strength for p, flags
+                                 in zip(batch, analysis.class_flags_batch(batch))]
+                task.signals.chunk.emit(batch, strengths)
+            done += len(batch)
+            task.signals.progress.emit(done, total)
+        return done
+    finally:
+        if stream is not None:
+            stream.close()
+
+
+def seed_unique(task, seen, store):
+    """Add every password saved in ``store`` to ``seen``, reporting as it goes."""
+    saved = store.reopen()
+    try:
+        total = saved.count()
+        done = 0
+        batch = []
+        for record in saved.records():
+            batch.append(record['password'])
+            if len(batch) >= BULK_CHUNK_SIZE:
+                if task.cancelled:
+                    return
+                seen.update(batch)
+                done += len(batch)
+                batch = []
+                task.signals.status.emit(f"Reading saved passwords: {done:,} / {total:,}")
+        seen.update(batch)
+    finally:
+        saved.close()
+
+
+def export_saved(task, store, path, total):
+    """Task body: write every saved password to ``path``; returns the number written."""
+    saved = store.reopen()
+    try:
+        return transfer.export_records(saved.records(), path, progress=task.report, total=total)
+    finally:
+        saved.close()
+
+
+def import_saved(task, store, path):
+    """Task body: import ``path`` into the vault; returns a :class:`transfer.ImportResult`."""
+    saved = store.reopen()
+    try:
+        return transfer.import_records(path, saved, progress=task.report)
+    finally:
+        saved.close()
+
+
+def check_saved(task, store, index):
+    """Task body: ``(checked, [(name, count), ...])`` for the saved passwords
+    that appear in the breach ``index``."""
+    saved = store.reopen()
+    found = []
+    done = 0
+    try:
+        total = saved.count()
+        for record in saved.records():
+            count = index.count(record['password'])
+            if count:
+                found.append((record['name'], count))
+            done += 1
+            if done % 1000 == 0 and not task.report(done, total):
+                break
+    finally:
+        saved.close()
+    return done, found
+
+
+def read_search_index(task, path):
+    """Task body: build the vault's :class:`SearchIndex` off the GUI thread.
+
+    SQLite connections stay on the thread that opened them, so the vault is
+    read through a connection of its own. The index needs no passwords, so
+    an encrypted vault is read without decrypting anything.
+    """
+    store = PasswordStore(path)
+    try:
+        index = SearchIndex(takewhile(lambda _: not task.cancelled, store.records()))
+    finally:
+        store.close()
+    return None if task.cancelled else index
+
+
+class BulkResultsModel(QAbstractTableModel):
+    """Append-only list of generated items for the Bulk tab's virtualized view."""
+
+    HEADERS = ("Generated", "Strength")
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.items = []
+        self.strengths = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.items)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            if index.column() == 0:
+                return self.items[index.row()]
+            return self.strengths[index.row()] if self.strengths else ""
+        if role == Qt.ItemDataRole.UserRole:
+            return self.items[index.row()]
+        return None
+
+    def append_chunk(self, items, strengths=None):
+        first = len(self.items)
+        self.beginInsertRows(QModelIndex(), first, first + len(items) - 1)
+        self.items.extend(items)
+        if strengths:
+            self.strengths.extend(strengths)
+        self.endInsertRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self.items = []
+        self.strengths = []
+        self.endResetModel()
+
 
 class PasswordGenerator(QMainWindow):
+    @metrics.timed("startup.total")
     def __init__(self):
         super().__init__()
         self.setWindowTitle("🔒 PassCraft (Ulimate Password Generator) - By SABIR")
         self.setGeometry(100, 100, 900, 700)
-        self.saved_passwords = []
+        rng.use_pool_from_env()
+        self.store = self.open_store()
         self.wordlist = self.load_wordlist()
         self.dark_mode = True
-        self.setup_ui()
+        self.bulk_task = None
+        self.bulk_seen = None
+        self.vault_task = None
+        self.job_task = None
+        self.themed = {}  # widget with a theme stylesheet -> dark_mode it was styled for
+        self.analysis_cache = analysis.AnalysisCache(breaches=breach.default_index())
+        self.meter_style = None
+        self.password_draft = None
+        self.password_model = None
+        self.profiles = self.load_profiles()
+        self.base_profile = profiles.Profile()
+        self.time_to_interactive = None
+        self.saved_model = SavedPasswordsModel(self.store, self)
+        # Themed first, so each widget is polished once as it is created
         self.setup_styles()
-        self.load_saved_passwords()
+        self.setup_ui()
         self.show()
+        # Fill the vault view once the window is up, then note the time
+        QTimer.singleShot(0, self.load_saved_passwords)
+        QTimer.singleShot(0, self.startup_finished)
 
+    def startup_finished(self):
+        self.time_to_interactive = time.perf_counter() - STARTED
+        if metrics.enabled():
+            metrics.observe("startup.time_to_interactive", self.time_to_interactive)
+
+    @metrics.timed("startup.load_wordlist")
     def load_wordlist(self):
-        default_words = [
-            "apple", "banana", "cherry", "dragon", "elephant", "falcon",
-            "giraffe", "hunter", "island", "jungle", "knight", "lizard",
-            "mountain", "ninja", "octopus", "penguin", "queen", "rocket",
-            "sunset", "tiger", "unicorn", "viking", "wizard", "xylophone",
-            "yacht", "zebra"
-        ]
+        return engine.load_wordlist(WORDLIST_FILE)
+
+    @metrics.timed("startup.load_profiles")
+    def load_profiles(self):
+        errors = {}
         try:
-            if os.path.exists(WORDLIST_FILE):
-                with open(WORDLIST_FILE, 'r') as f:
-                    return [word.strip() for word in f.readlines() if word.strip()]
-            return default_words
-        except:
-            return default_words
+            found = profiles.load_profiles(CONFIG_FILE, errors)
+        except ValueError as e:
+            QMessageBox.warning(self, "Profiles", str(e))
+            return {}
+        if errors:
+            QMessageBox.warning(self, "Profiles", "Skipped invalid profiles:\n" + "\n".join(
+                f"{name}: {error}" for name, error in errors.items()))
+        return found
 
+    @metrics.timed("startup.open_store")
+    def open_store(self):
+        store = PasswordStore(SAVED_PASSWORDS_DB)
+        if not store.is_encrypted():
+            store.migrate_json(SAVED_PASSWORDS_FILE)
+            return store
+        store.close()
+        # Imported here: the crypto backend is only needed for encrypted vaults
+        from passcraft import vault
+        prompt = "Enter the master password:"
+        while True:
+            password, ok = QInputDialog.getText(self, "Unlock Vault", prompt,
+                                                QLineEdit.EchoMode.Password)
+            if not ok:
+                sys.exit(0)
+            try:
+                return vault.EncryptedPasswordStore(SAVED_PASSWORDS_DB, password,
+                                                    legacy_json=SAVED_PASSWORDS_FILE)
+            except vault.InvalidPassword:
+                prompt = "Wrong master password, try again:"
+            except RuntimeError as e:
+                QMessageBox.critical(self, "Error", str(e))
+                sys.exit(1)
+
+    @metrics.timed("startup.setup_ui")
     def setup_ui(self):
         main_widget = QWidget()
         self.setCentralWidget(main_widget)
@@ -57,47 +801,86 @@ class PasswordGenerator(QMainWindow):
         layout.setSpacing(15)
 
         # Set application font
-        font = QFont("Segoe UI", 10)
+        font = ui_font()
         self.setFont(font)
 
         # Main tabs
         self.tabs = QTabWidget()
-        self.tabs.setFont(QFont("Segoe UI", 10, QFont.Weight.Bold))
+        self.tabs.setFont(ui_font(bold=True))
+        self.apply_theme(self.tabs.tabBar())
         
         # Password Generator Tab
-        self.setup_password_tab()
-        
-        # Passphrase Generator Tab
-        self.setup_passphrase_tab()
-        
-        # Saved Passwords Tab
-        self.setup_saved_passwords_tab()
-        
+        self.setup_password_tab(self.add_tab("🔐 Password"))
+
+        # The other tabs are built the first time they are shown
+        self.pending_tabs = {}
+        self.add_tab("📝 Passphrase", self.setup_passphrase_tab)
+        self.add_tab("📦 Bulk", self.setup_bulk_tab)
+        self.add_tab("💾 Saved", self.setup_saved_passwords_tab)
+        self.tabs.currentChanged.connect(self.tab_shown)
+
         layout.addWidget(self.tabs)
         self.setup_footer(layout)
 
-    def setup_password_tab(self):
+    def add_tab(self, label, builder=None):
         tab = QWidget()
+        self.apply_theme(tab)
+        self.tabs.addTab(tab, label)
+        if builder is not None:
+            self.pending_tabs[builder] = tab
+        return tab
+
+    def tab_shown(self, index):
+        tab = self.tabs.widget(index)
+        self.apply_theme(tab)
+        for builder, pending in list(self.pending_tabs.items()):
+            if pending is tab:
+                self.ensure_tab(builder)
+
+    @metrics.timed("gui.build_tab")
+    def ensure_tab(self, builder):
+        """Build a lazily created tab now if it has not been shown yet."""
+        tab = self.pending_tabs.pop(builder, None)
+        if tab is not None:
+            builder(tab)
+
+    def setup_password_tab(self, tab):
         tab_layout = QVBoxLayout(tab)
         tab_layout.setSpacing(15)
 
         # Settings Group
         settings_group = QGroupBox("⚙️ Password Settings")
-        settings_group.setFont(QFont("Segoe UI", 10, QFont.Weight.Bold))
+        settings_group.setFont(ui_font(bold=True))
         settings_layout = QVBoxLayout()
         settings_layout.setSpacing(10)
 
+        # Profiles from config.json
+        profile_group = QWidget()
+        profile_layout = QHBoxLayout(profile_group)
+        profile_layout.setContentsMargins(0, 0, 0, 0)
+        profile_label = QLabel("Profile:")
+        profile_label.setFont(ui_font())
+        self.profile_combo = QComboBox()
+        self.profile_combo.setFont(ui_font())
+        self.fill_profile_combo()
+        self.profile_combo.activated.connect(self.apply_profile)
+        profile_layout.addWidget(profile_label)
+        profile_layout.addWidget(self.profile_combo, 1)
+        profile_layout.addWidget(self.create_button("💾 Save Profile", self.save_profile))
+        profile_layout.addWidget(self.create_button("🗑️ Delete", self.delete_profile))
+        settings_layout.addWidget(profile_group)
+
         # Length Control
         length_group = QWidget()
         length_layout = QHBoxLayout(length_group)
         length_layout.setContentsMargins(0, 0, 0, 0)
         length_label = QLabel("Length:")
-        length_label.setFont(QFont("Segoe UI", 10))
+        length_label.setFont(ui_font())
         self.length_slider = QSlider(Qt.Orientation.Horizontal)
         self.length_slider.setRange(8, 64)
         self.length_slider.setValue(16)
         self.length_label = QLabel("16")
-        self.length_label.setFont(QFont("Segoe UI", 10, QFont.Weight.Bold))
+        self.length_label.setFont(ui_font(bold=True))
         self.length_slider.valueChanged.connect(lambda v: self.length_label.setText(str(v)))
         length_layout.addWidget(length_label)
         length_layout.addWidget(self.length_slider)
@@ -118,15 +901,49 @@ class PasswordGenerator(QMainWindow):
         char_layout.addWidget(self.lower_check)
         char_layout.addWidget(self.numbers_check)
         char_layout.addWidget(self.symbols_check)
+
+        self.pronounceable_check = self.create_checkbox("Pronounceable", False)
+        self.pronounceable_check.setToolTip(
+            "Lowercase letters drawn from a letter n-gram model of the wordlist; "
+            "easier to say, fewer bits per character")
+        char_layout.addWidget(self.pronounceable_check)
         settings_layout.addWidget(char_group)
 
+        # Policy
+        rules_group = QWidget()
+        rules_layout = QHBoxLayout(rules_group)
+        rules_layout.setContentsMargins(0, 0, 0, 0)
+
+        self.each_class_check = self.create_checkbox("Use every set", True)
+        self.each_class_check.setToolTip("At least one character from each selected set")
+        self.ambiguous_check = self.create_checkbox("No look-alikes", False)
+        self.ambiguous_check.setToolTip(f"Leave out {' '.join(policy.AMBIGUOUS)}")
+        self.repeat_check = self.create_checkbox("No repeats", False)
+        self.repeat_check.setToolTip("Use every character at most once")
+        self.exclude_input = QLineEdit()
+        self.exclude_input.setPlaceholderText("Exclude characters")
+        self.exclude_input.setFont(ui_font())
+
+        rules_layout.addWidget(self.each_class_check)
+        rules_layout.addWidget(self.ambiguous_check)
+        rules_layout.addWidget(self.repeat_check)
+        rules_layout.addWidget(self.exclude_input)
+        settings_layout.addWidget(rules_group)
+
         # Keyword
         self.keyword_input = QLineEdit()
         self.keyword_input.setPlaceholderText("Add custom word (optional)")
-        self.keyword_input.setFont(QFont("Segoe UI", 10))
+        self.keyword_input.setFont(ui_font())
         settings_layout.addWidget(QLabel("Custom Keyword:"))
         settings_layout.addWidget(self.keyword_input)
 
+        # Re-score as the keyword is edited, once typing pauses
+        self.keyword_timer = QTimer(self)
+        self.keyword_timer.setSingleShot(True)
+        self.keyword_timer.setInterval(150)
+        self.keyword_timer.timeout.connect(self.update_keyword)
+        self.keyword_input.textChanged.connect(self.keyword_timer.start)
+
         # Buttons
         btn_group = QWidget()
         btn_layout = QHBoxLayout(btn_group)
@@ -146,12 +963,12 @@ class PasswordGenerator(QMainWindow):
 
         # Output
         output_group = QGroupBox("🔑 Generated Password")
-        output_group.setFont(QFont("Segoe UI", 10, QFont.Weight.Bold))
+        output_group.setFont(ui_font(bold=True))
         output_layout = QVBoxLayout()
         
         self.password_output = QLineEdit()
         self.password_output.setReadOnly(True)
-        self.password_output.setFont(QFont("Consolas", 12))
+        self.password_output.setFont(ui_font("Consolas", 12))
         
         copy_btn = self.create_button("📋 Copy", lambda: self.copy_to_clipboard(self.password_output))
         
@@ -164,7 +981,7 @@ class PasswordGenerator(QMainWindow):
 
         # Analysis
         analysis_group = QGroupBox("📊 Security Analysis")
-        analysis_group.setFont(QFont("Segoe UI", 10, QFont.Weight.Bold))
+        analysis_group.setFont(ui_font(bold=True))
         analysis_layout = QVBoxLayout()
         
         self.strength_meter = QProgressBar()
@@ -182,16 +999,13 @@ class PasswordGenerator(QMainWindow):
         analysis_group.setLayout(analysis_layout)
         tab_layout.addWidget(analysis_group)
 
-        self.tabs.addTab(tab, "🔐 Password")
-
-    def setup_passphrase_tab(self):
-        tab = QWidget()
+    def setup_passphrase_tab(self, tab):
         tab_layout = QVBoxLayout(tab)
         tab_layout.setSpacing(15)
 
         # Settings Group
         settings_group = QGroupBox("⚙️ Passphrase Settings")
-        settings_group.setFont(QFont("Segoe UI", 10, QFont.Weight.Bold))
+        settings_group.setFont(ui_font(bold=True))
         settings_layout = QVBoxLayout()
         settings_layout.setSpacing(10)
 
@@ -200,12 +1014,12 @@ class PasswordGenerator(QMainWindow):
         word_layout = QHBoxLayout(word_group)
         word_layout.setContentsMargins(0, 0, 0, 0)
         word_label = QLabel("Words:")
-        word_label.setFont(QFont("Segoe UI", 10))
+        word_label.setFont(ui_font())
         self.word_slider = QSlider(Qt.Orientation.Horizontal)
-        self.word_slider.setRange(4, 8)
+        self.word_slider.setRange(3, 20)
         self.word_slider.setValue(4)
         self.word_label = QLabel("4")
-        self.word_label.setFont(QFont("Segoe UI", 10, QFont.Weight.Bold))
+        self.word_label.setFont(ui_font(bold=True))
         self.word_slider.valueChanged.connect(lambda v: self.word_label.setText(str(v)))
         word_layout.addWidget(word_label)
         word_layout.addWidget(self.word_slider)
@@ -215,7 +1029,7 @@ class PasswordGenerator(QMainWindow):
         # Separator
         self.separator_input = QLineEdit("-")
         self.separator_input.setMaxLength(1)
-        self.separator_input.setFont(QFont("Segoe UI", 10))
+        self.separator_input.setFont(ui_font())
         settings_layout.addWidget(QLabel("Separator:"))
         settings_layout.addWidget(self.separator_input)
 
@@ -223,6 +1037,28 @@ class PasswordGenerator(QMainWindow):
         self.number_check = self.create_checkbox("Add random number", True)
         settings_layout.addWidget(self.number_check)
 
+        # Casing, repeats and added characters
+        style_group = QWidget()
+        style_layout = QHBoxLayout(style_group)
+        style_layout.setContentsMargins(0, 0, 0, 0)
+        self.case_combo = QComboBox()
+        self.case_combo.setFont(ui_font())
+        self.case_combo.addItems(passphrase.CASES)
+        self.case_combo.setToolTip("Word casing; \"random\" capitalizes each word or not")
+        self.unique_words_check = self.create_checkbox("No repeated words", False)
+        self.digits_spin = QSpinBox()
+        self.digits_spin.setRange(0, 8)
+        self.symbols_spin = QSpinBox()
+        self.symbols_spin.setRange(0, 8)
+        style_layout.addWidget(QLabel("Case:"))
+        style_layout.addWidget(self.case_combo)
+        style_layout.addWidget(self.unique_words_check)
+        style_layout.addWidget(QLabel("Digits:"))
+        style_layout.addWidget(self.digits_spin)
+        style_layout.addWidget(QLabel("Symbols:"))
+        style_layout.addWidget(self.symbols_spin)
+        settings_layout.addWidget(style_group)
+
         # Buttons
         btn_group = QWidget()
         btn_layout = QHBoxLayout(btn_group)
@@ -240,12 +1076,12 @@ class PasswordGenerator(QMainWindow):
 
         # Output
         output_group = QGroupBox("🔤 Passphrase")
-        output_group.setFont(QFont("Segoe UI", 10, QFont.Weight.Bold))
+        output_group.setFont(ui_font(bold=True))
         output_layout = QVBoxLayout()
         
         self.passphrase_output = QLineEdit()
         self.passphrase_output.setReadOnly(True)
-        self.passphrase_output.setFont(QFont("Consolas", 12))
+        self.passphrase_output.setFont(ui_font("Consolas", 12))
         
         copy_btn = self.create_button("📋 Copy", lambda: self.copy_to_clipboard(self.passphrase_output))
         save_btn = self.create_button("💾 Save", lambda: self.save_password(self.passphrase_output.text()))
@@ -255,20 +1091,140 @@ class PasswordGenerator(QMainWindow):
         output_btn_layout.addWidget(copy_btn, 1)
         output_btn_layout.addWidget(save_btn, 1)
         output_layout.addLayout(output_btn_layout)
+        # Exact, from the wordlist size and settings; the analysis on the
+        # Password tab only sees the characters
+        self.passphrase_entropy_label = QLabel("Entropy: -")
+        output_layout.addWidget(self.passphrase_entropy_label)
         output_group.setLayout(output_layout)
         tab_layout.addWidget(output_group)
 
-        self.tabs.addTab(tab, "📝 Passphrase")
+    def setup_bulk_tab(self, tab):
+        tab_layout = QVBoxLayout(tab)
+        tab_layout.setSpacing(15)
 
-    def setup_saved_passwords_tab(self):
-        tab = QWidget()
+        # Settings Group
+        settings_group = QGroupBox("⚙️ Bulk Settings")
+        settings_group.setFont(ui_font(bold=True))
+        settings_layout = QVBoxLayout()
+        settings_layout.setSpacing(10)
+
+        options_group = QWidget()
+        options_layout = QHBoxLayout(options_group)
+        options_layout.setContentsMargins(0, 0, 0, 0)
+        self.bulk_count = QSpinBox()
+        self.bulk_count.setRange(1, 100_000_000)
+        self.bulk_count.setValue(1000)
+        self.bulk_count.setGroupSeparatorShown(True)
+        self.bulk_count.setFont(ui_font())
+        self.bulk_kind = QComboBox()
+        self.bulk_kind.addItems(["Passwords", "Passphrases"])
+        self.bulk_kind.setFont(ui_font())
+        self.bulk_target = QComboBox()
+        self.bulk_target.addItems(["Show in list", "Write to file"])
+        self.bulk_target.setFont(ui_font())
+        self.bulk_score = self.create_checkbox("Score strength", False)
+        self.bulk_unique = self.create_checkbox("Unique", False)
+        self.bulk_unique.setToolTip("Never repeat an item, nor any saved password")
+        self.bulk_target.currentIndexChanged.connect(
+            lambda i: self.bulk_score.setEnabled(i == 0))
+        options_layout.addWidget(QLabel("Count:"))
+        options_layout.addWidget(self.bulk_count, 2)
+        options_layout.addWidget(self.bulk_kind, 2)
+        options_layout.addWidget(self.bulk_target, 2)
+        options_layout.addWidget(self.bulk_score, 1)
+        options_layout.addWidget(self.bulk_unique, 1)
+        settings_layout.addWidget(options_group)
+        settings_layout.addWidget(QLabel("Uses the settings from the Password and Passphrase tabs."))
+
+        # Buttons
+        btn_group = QWidget()
+        btn_layout = QHBoxLayout(btn_group)
+        btn_layout.setContentsMargins(0, 0, 0, 0)
+
+        self.bulk_start_btn = self.create_button("✨ Generate", self.start_bulk)
+        self.bulk_cancel_btn = self.create_button("⏹ Cancel", self.cancel_bulk)
+        self.bulk_cancel_btn.setEnabled(False)
+        clear_btn = self.create_button("🧹 Clear", lambda: self.bulk_model.clear())
+
+        btn_layout.addWidget(self.bulk_start_btn)
+        btn_layout.addWidget(self.bulk_cancel_btn)
+        btn_layout.addWidget(clear_btn)
+        settings_layout.addWidget(btn_group)
+
+        self.bulk_progress = QProgressBar()
+        self.bulk_progress.setRange(0, 100)
+        self.bulk_progress.setValue(0)
+        self.bulk_status = QLabel("")
+        settings_layout.addWidget(self.bulk_progress)
+        settings_layout.addWidget(self.bulk_status)
+
+        settings_group.setLayout(settings_layout)
+        tab_layout.addWidget(settings_group)
+
+        # Results: only visible rows are painted, however many there are
+        self.bulk_model = BulkResultsModel(self)
+        self.bulk_list = QTableView()
+        self.bulk_list.setFont(ui_font("Consolas", 10))
+        self.bulk_list.setModel(self.bulk_model)
+        self.bulk_list.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.bulk_list.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.bulk_list.verticalHeader().setVisible(False)
+        self.bulk_list.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.bulk_list.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.bulk_list.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Fixed)
+        self.bulk_list.doubleClicked.connect(self.copy_bulk_item)
+        tab_layout.addWidget(self.bulk_list)
+
+    def setup_saved_passwords_tab(self, tab):
         tab_layout = QVBoxLayout(tab)
         tab_layout.setSpacing(15)
 
+        # Search
+        search_group = QWidget()
+        search_layout = QHBoxLayout(search_group)
+        search_layout.setContentsMargins(0, 0, 0, 0)
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("🔍 Search by name")
+        self.search_input.setFont(ui_font())
+        self.search_type = QComboBox()
+        self.search_type.addItems(["All types", "password", "passphrase"])
+        self.search_type.setFont(ui_font())
+        self.search_from = QLineEdit()
+        self.search_from.setPlaceholderText("From YYYY-MM-DD")
+        self.search_to = QLineEdit()
+        self.search_to.setPlaceholderText("To YYYY-MM-DD")
+        for date_input in (self.search_from, self.search_to):
+            date_input.setFont(ui_font())
+            date_input.setMaximumWidth(150)
+        search_layout.addWidget(self.search_input, 3)
+        search_layout.addWidget(self.search_type, 1)
+        search_layout.addWidget(self.search_from, 1)
+        search_layout.addWidget(self.search_to, 1)
+        tab_layout.addWidget(search_group)
+
+        # Filter once typing pauses rather than on every keystroke
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(150)
+        self.search_timer.timeout.connect(self.apply_search)
+        for line_edit in (self.search_input, self.search_from, self.search_to):
+            line_edit.textChanged.connect(self.search_timer.start)
+        self.search_type.currentIndexChanged.connect(self.search_timer.start)
+
         # Saved Passwords List
-        self.saved_list = QListWidget()
-        self.saved_list.setFont(QFont("Consolas", 10))
-        self.saved_list.itemDoubleClicked.connect(self.copy_saved_password)
+        self.saved_list = QTableView()
+        self.saved_list.setFont(ui_font("Consolas", 10))
+        self.saved_list.setModel(self.saved_model)
+        self.saved_list.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.saved_list.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.saved_list.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.saved_list.verticalHeader().setVisible(False)
+        # Fixed row heights let the view skip measuring every row
+        self.saved_list.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.saved_list.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.saved_list.horizontalHeader().setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+        self.saved_list.setSortingEnabled(True)
+        self.saved_list.doubleClicked.connect(self.copy_saved_password)
         tab_layout.addWidget(self.saved_list)
 
         # Buttons
@@ -277,152 +1233,219 @@ class PasswordGenerator(QMainWindow):
         btn_layout.setContentsMargins(0, 0, 0, 0)
         
         export_btn = self.create_button("📤 Export", self.export_passwords)
+        import_btn = self.create_button("📥 Import", self.import_passwords)
         clear_all_btn = self.create_button("🗑️ Clear All", self.clear_saved_passwords)
         clear_selected_btn = self.create_button("✖️ Clear Selected", self.clear_selected_password)
+        breach_btn = self.create_button("🛡️ Check Breaches", self.check_breaches)
         theme_btn = self.create_button("🌙 Toggle Theme", self.toggle_theme)
+        self.encrypt_btn = self.create_button("🔐 Encrypt Vault", self.encrypt_vault)
+        self.encrypt_btn.setVisible(not self.store.is_encrypted())
         
         btn_layout.addWidget(export_btn)
+        btn_layout.addWidget(import_btn)
         btn_layout.addWidget(clear_selected_btn)
         btn_layout.addWidget(clear_all_btn)
+        btn_layout.addWidget(breach_btn)
+        btn_layout.addWidget(self.encrypt_btn)
         btn_layout.addWidget(theme_btn)
         tab_layout.addWidget(btn_group)
 
-        self.tabs.addTab(tab, "💾 Saved")
-
     def setup_footer(self, layout):
-        footer = QLabel("© 2025 PassCraft | v1.0")
-        footer.setFont(QFont("Segoe UI", 8))
+        footer = self.footer = QLabel("© 2025 PassCraft | v1.0")
+        footer.setFont(ui_font(size=8))
+        self.apply_theme(footer)
         footer.setAlignment(Qt.AlignmentFlag.AlignCenter)
         layout.addWidget(footer)
 
     def create_button(self, text, action):
         btn = QPushButton(text)
-        btn.setFont(QFont("Segoe UI", 10))
+        btn.setFont(ui_font())
         btn.clicked.connect(action)
         return btn
 
     def create_checkbox(self, text, checked):
         cb = QCheckBox(text)
-        cb.setFont(QFont("Segoe UI", 10))
+        cb.setFont(ui_font())
         cb.setChecked(checked)
         return cb
 
+    def selected_charset(self):
+        return engine.build_charset(
+            upper=self.upper_check.isChecked(),
+            lower=self.lower_check.isChecked(),
+            digits=self.numbers_check.isChecked(),
+            symbols=self.symbols_check.isChecked())
+
+    def class_checks(self):
+        return dict(zip(engine.CHARSETS, (self.upper_check, self.lower_check,
+                                          self.numbers_check, self.symbols_check)))
+
+    def current_profile(self):
+        """The :class:`profiles.Profile` for the password options.
+
+        Settings without a widget (per-set minimums and maximums) come from
+        the last applied profile.
+        """
+        pronounceable = self.pronounceable_check.isChecked()
+        return self.base_profile._replace(
+            kind="pronounceable" if pronounceable else "password",
+            length=self.length_slider.value(),
+            classes=tuple(name for name, check in self.class_checks().items()
+                          if check.isChecked()),
+            keyword=self.keyword_input.text(), each_class=self.each_class_check.isChecked(),
+            exclude=self.exclude_input.text(), avoid_ambiguous=self.ambiguous_check.isChecked(),
+            no_repeat=self.repeat_check.isChecked(),
+            wordlist=WORDLIST_FILE if pronounceable else self.base_profile.wordlist)
+
+    def fill_profile_combo(self, current="Custom"):
+        self.profile_combo.clear()
+        self.profile_combo.addItem("Custom")
+        self.profile_combo.addItems(sorted(name for name, profile in self.profiles.items()
+                                           if profile.kind != "passphrase"))
+        self.profile_combo.setCurrentText(current)
+
+    def apply_profile(self, index):
+        if index <= 0:
+            self.base_profile = profiles.Profile()
+            return
+        profile = self.base_profile = self.profiles[self.profile_combo.itemText(index)]
+        # Profiles may go past the slider's usual 8..64
+        self.length_slider.setRange(min(8, profile.length), max(64, profile.length))
+        self.length_slider.setValue(profile.length)
+        for name, check in self.class_checks().items():
+            check.setChecked(name in profile.classes)
+        self.each_class_check.setChecked(profile.each_class)
+        self.ambiguous_check.setChecked(profile.avoid_ambiguous)
+        self.repeat_check.setChecked(profile.no_repeat)
+        self.pronounceable_check.setChecked(profile.kind == "pronounceable")
+        self.exclude_input.setText(profile.exclude)
+        self.keyword_input.setText(profile.keyword)
+
+    def save_profile(self):
+        name = self.profile_combo.currentText() if self.profile_combo.currentIndex() > 0 else ""
+        name, ok = QInputDialog.getText(self, "Save Profile", "Profile name:", text=name)
+        name = name.strip()
+        if not ok or not name:
+            return
+        profile = self.current_profile()
+        try:
+            bits = profiles.compile_profile(profile).entropy
+            profiles.save_profile(name, profile, CONFIG_FILE)
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self, "Save Profile", str(e))
+            return
+        self.profiles[name] = self.base_profile = profile
+        self.fill_profile_combo(name)
+        QMessageBox.information(self, "Save Profile", f"Saved profile {name!r} ({bits:.1f} bits).")
+
+    def delete_profile(self):
+        if self.profile_combo.currentIndex() <= 0:
+            return
+        name = self.profile_combo.currentText()
+        reply = QMessageBox.question(self, "Delete Profile", f"Delete profile {name!r}?")
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+        try:
+            profiles.delete_profile(name, CONFIG_FILE)
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self, "Delete Profile", str(e))
+            return
+        del self.profiles[name]
+        self.base_profile = profiles.Profile()
+        self.fill_profile_combo()
+
     def generate_password(self):
-        charset = ""
-        if self.upper_check.isChecked(): charset += "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
-        if self.lower_check.isChecked(): charset += "abcdefghijklmnopqrstuvwxyz"
-        if self.numbers_check.isChecked(): charset += "0123456789"
-        if self.symbols_check.isChecked(): charset += "!@#$%^&*"
+        charset = self.selected_charset()
         
-        if not charset:
+        if not charset and not self.pronounceable_check.isChecked():
             QMessageBox.warning(self, "Error", "Please select at least one character set!")
             return None
         
-        length = self.length_slider.value()
-        keyword = self.keyword_input.text()
-        
-        # Generate random part first
-        random_part = ''.join(secrets.choice(charset) for _ in range(length - len(keyword)))
-        random_part = ''.join(secrets.SystemRandom().sample(random_part, len(random_part)))
-        
-        # Combine with keyword (inserted at random position)
-        insert_pos = secrets.randbelow(len(random_part) + 1)
-        password = random_part[:insert_pos] + keyword + random_part[insert_pos:]
+        # Keep the random characters so keyword edits re-use them (see
+        # update_keyword) instead of rolling a new password per keystroke
+        profile = self.current_profile()._replace(keyword="")
+        try:
+            generator = profiles.compile_profile(profile)
+        except ValueError as e:
+            QMessageBox.warning(self, "Error", str(e).capitalize() + ".")
+            return None
+        redraw = None
+        if generator.sampler is not None:
+            redraw = lambda n: profiles.compile_profile(profile._replace(length=n)).generate(1)[0]
+        # Prefixes of a Markov password are correctly distributed, so cutting is fine
+        self.password_draft = PasswordDraft(generator.generate(1)[0], redraw)
+        self.password_model = generator.model
+        password = self.password_draft.compose(self.keyword_input.text())
         
         self.password_output.setText(password)
         self.analyze_password(password)
+        self.show_model_bits()
         return password
 
+    def update_keyword(self):
+        if self.password_draft is None:
+            return
+        password = self.password_draft.compose(self.keyword_input.text())
+        self.password_output.setText(password)
+        self.analyze_password(password)
+        self.show_model_bits()
+
+    def show_model_bits(self):
+        """For a pronounceable password, its exact information content under
+        the model replaces the character-class estimate."""
+        if self.password_model is None:
+            return
+        keyword = self.keyword_input.text()
+        random_len = max(0, len(self.password_draft.chars) - len(keyword))
+        bits = self.password_model.bits(self.password_draft.parts[random_len])
+        if keyword:
+            bits += math.log2(random_len + 1)
+        self.entropy_label.setText(f"Entropy: {bits:.1f} bits (exact, under the Markov model)")
+
+    def current_passphrase_profile(self):
+        return profiles.Profile(kind="passphrase", words=self.word_slider.value(),
+                                separator=self.separator_input.text(),
+                                add_number=self.number_check.isChecked(),
+                                case=self.case_combo.currentText(),
+                                unique_words=self.unique_words_check.isChecked(),
+                                digits=self.digits_spin.value(),
+                                symbols=self.symbols_spin.value(), wordlist=WORDLIST_FILE)
+
     def generate_passphrase(self):
-        words = [secrets.choice(self.wordlist).capitalize() 
-                for _ in range(self.word_slider.value())]
-        
-        if self.number_check.isChecked():
-            words.append(str(secrets.randbelow(90) + 10))
-            
-        separator = self.separator_input.text()[:1] or "-"
-        passphrase = separator.join(words)
+        try:
+            generator = profiles.compile_profile(self.current_passphrase_profile())
+        except ValueError as e:
+            QMessageBox.warning(self, "Error", str(e).capitalize() + ".")
+            return None
+        phrase = generator.generate(1)[0]
         
-        self.passphrase_output.setText(passphrase)
-        self.analyze_password(passphrase)
-        return passphrase
+        self.passphrase_output.setText(phrase)
+        self.passphrase_entropy_label.setText(
+            f"Entropy: {generator.entropy:.1f} bits (exact, {len(generator.wordlist):,} words)")
+        self.analyze_password(phrase)
+        return phrase
 
+    @metrics.timed("gui.analyze_password")
     def analyze_password(self, password):
-        if not password:
+        result = self.analysis_cache.analyze(password)
+        if result is None:
             return
-            
-        # Calculate entropy
-        pool = 0
-        if any(c.isupper() for c in password): pool += 26
-        if any(c.islower() for c in password): pool += 26
-        if any(c.isdigit() for c in password): pool += 10
-        if any(not c.isalnum() for c in password): pool += 32
-        entropy = math.log2(pool ** len(password)) if pool > 0 else 0
-        
-        # Strength score (0-100)
-        length_bonus = min(40, len(password) * 2)
-        complexity_bonus = min(60, entropy * 1.5)
-        score = int(min(100, length_bonus + complexity_bonus))  # Convert to int
-        
-        # Determine strength level
-        if score < 20:
-            strength_text = "Very Weak"
-            strength_color = "#ff0000"  # Red
-        elif score < 40:
-            strength_text = "Weak"
-            strength_color = "#ff5555"  # Light Red
-        elif score < 60:
-            strength_text = "Moderate"
-            strength_color = "#ffb86c"  # Orange
-        elif score < 80:
-            strength_text = "Strong"
-            strength_color = "#50fa7b"  # Green
-        elif score < 95:
-            strength_text = "Very Strong"
-            strength_color = "#00bfff"  # Blue
-        else:
-            strength_text = "Extremely Strong"
-            strength_color = "#8a2be2"  # Purple
-        
-        # Calculate crack time separately
-        crack_speed = 1e9  # 1 billion guesses per second
-        combinations = pool ** len(password)
-        seconds = combinations / crack_speed
-        
-        if seconds < 1:
-            crack_time = "Instant"
-        elif seconds < 60:
-            crack_time = f"{int(seconds)} seconds"
-        elif seconds < 3600:
-            crack_time = f"{int(seconds/60)} minutes"
-        elif seconds < 86400:
-            crack_time = f"{int(seconds/3600)} hours"
-        elif seconds < 31536000:  # 1 year
-            crack_time = f"{int(seconds/86400)} days"
-        elif seconds < 3153600000:  # 100 years
-            crack_time = f"{int(seconds/31536000)} years"
-        else:
-            crack_time = "Centuries"
         
         # Update UI
-        self.entropy_label.setText(f"Entropy: {entropy:.1f} bits")
-        self.crack_time_label.setText(f"Estimated crack time: {crack_time}")
+        self.entropy_label.setText(f"Entropy: {result.entropy:.1f} bits")
+        crack_time = f"Estimated crack time: {result.crack_time}"
+        if result.breaches:
+            crack_time += f"  ⚠️ Found in breaches ({result.breaches:,} times)"
+        self.crack_time_label.setText(crack_time)
         
-        # Strength meter
+        # Strength meter; restyling is costly, so only swap sheets on a change
+        score = result.score
         self.strength_meter.setValue(score)
-        self.strength_meter.setFormat(f"{strength_text} ({score}%)")
-        self.strength_meter.setStyleSheet(f"""
-            QProgressBar {{
-                border: 1px solid {strength_color};
-                border-radius: 5px;
-                text-align: center;
-                color: {'#000000' if score > 50 else '#ffffff'};
-            }}
-            QProgressBar::chunk {{
-                background-color: {strength_color};
-                width: 10px;
-            }}
-        """)
+        self.strength_meter.setFormat(f"{result.strength} ({score}%)")
+        style = (analysis.strength_tier(score)[0], score > 50)
+        if style != self.meter_style:
+            self.meter_style = style
+            self.strength_meter.setStyleSheet(METER_STYLES[style])
 
     def copy_to_clipboard(self, widget):
         text = widget.text()
@@ -433,11 +1456,13 @@ class PasswordGenerator(QMainWindow):
         QToolTip.showText(widget.mapToGlobal(widget.rect().bottomLeft()), "Copied!", msecShowTime=1000)
 
     def erase_password(self):
+        self.password_draft = self.password_model = None
         self.password_output.clear()
         self.strength_meter.setValue(0)
         self.entropy_label.setText("Entropy: 0 bits")
         self.crack_time_label.setText("Estimated crack time: N/A")
 
+    @metrics.timed("gui.save_password")
     def save_password(self, password=None):
         if not password:
             password = self.password_output.text()
@@ -450,37 +1475,34 @@ class PasswordGenerator(QMainWindow):
         if not ok or not name:
             return
             
-        self.saved_passwords.append({
-            'name': name,
-            'password': password,
-            'type': 'passphrase' if ' ' in password or '-' in password else 'password',
-            'date': datetime.now().strftime("%Y-%m-%d %H:%M")
-        })
-        
         try:
-            with open(SAVED_PASSWORDS_FILE, 'w') as f:
-                json.dump(self.saved_passwords, f)
-            self.load_saved_passwords()
+            record = self.store.add(
+                name=name,
+                password=password,
+                type=classify(password))
+            self.saved_model.insert_record(record)
             QMessageBox.information(self, "Success", "Password saved successfully!")
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to save password: {str(e)}")
 
     def load_saved_passwords(self):
-        try:
-            if os.path.exists(SAVED_PASSWORDS_FILE):
-                with open(SAVED_PASSWORDS_FILE, 'r') as f:
-                    self.saved_passwords = json.load(f)
-            
-            self.saved_list.clear()
-            for item in self.saved_passwords:
-                list_item = QListWidgetItem(f"{item['name']} - {item['password']} ({item['date']})")
-                list_item.setData(Qt.ItemDataRole.UserRole, item['password'])
-                self.saved_list.addItem(list_item)
-        except:
-            self.saved_passwords = []
-
-    def copy_saved_password(self, item):
-        password = item.data(Qt.ItemDataRole.UserRole)
+        self.saved_model.reload()
+        # The search index reads the whole vault, so it is built on a worker
+        # thread; a search before it arrives builds one on demand
+        self.vault_task = Task(partial(read_search_index, path=self.store.path))
+        self.vault_task.signals.finished.connect(
+            partial(self.saved_model.adopt_index, version=self.saved_model.version))
+        self.vault_task.start()
+
+    def apply_search(self):
+        self.saved_model.set_filter(
+            text=self.search_input.text(),
+            type=self.search_type.currentText() if self.search_type.currentIndex() > 0 else None,
+            date_from=self.search_from.text().strip() or None,
+            date_to=self.search_to.text().strip() or None)
+
+    def copy_saved_password(self, index):
+        password = index.data(Qt.ItemDataRole.UserRole)
         QApplication.clipboard().setText(password)
         QToolTip.showText(self.mapToGlobal(self.saved_list.rect().topLeft()), "Copied!", msecShowTime=1000)
 
@@ -492,16 +1514,13 @@ class PasswordGenerator(QMainWindow):
         )
         
         if reply == QMessageBox.StandardButton.Yes:
-            self.saved_passwords = []
             try:
-                with open(SAVED_PASSWORDS_FILE, 'w') as f:
-                    json.dump([], f)
-                self.saved_list.clear()
+                self.saved_model.clear()
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Failed to clear passwords: {str(e)}")
 
     def clear_selected_password(self):
-        selected = self.saved_list.currentRow()
+        selected = self.saved_list.currentIndex().row()
         if selected == -1:
             QMessageBox.warning(self, "Error", "No password selected")
             return
@@ -514,200 +1533,264 @@ class PasswordGenerator(QMainWindow):
         
         if reply == QMessageBox.StandardButton.Yes:
             try:
-                self.saved_passwords.pop(selected)
-                with open(SAVED_PASSWORDS_FILE, 'w') as f:
-                    json.dump(self.saved_passwords, f)
-                self.load_saved_passwords()
+                self.saved_model.remove_row(selected)
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Failed to delete password: {str(e)}")
 
     def export_passwords(self):
-        if not self.saved_passwords:
+        total = self.store.count()
+        if not total:
             QMessageBox.warning(self, "Error", "No passwords to export")
             return
             
-        file_name, _ = QFileDialog.getSaveFileName(
+        file_name, selected_filter = QFileDialog.getSaveFileName(
             self, "Export Passwords", "", 
-            "JSON Files (*.json);;CSV Files (*.csv)"
+            "JSON Files (*.json);;JSON Lines (*.jsonl);;CSV Files (*.csv)"
         )
         
         if not file_name:
             return
+        if not file_name.endswith(('.json', '.jsonl', '.csv')):
+            file_name += '.jsonl' if 'jsonl' in selected_filter else '.csv' if 'csv' in selected_filter.lower() else '.json'
             
-        try:
-            if file_name.endswith('.csv'):
-                with open(file_name, 'w', newline='') as f:
-                    writer = csv.writer(f)
-                    writer.writerow(['Name', 'Password', 'Type', 'Date'])
-                    for item in self.saved_passwords:
-                        writer.writerow([item['name'], item['password'], item['type'], item['date']])
-            else:
-                if not file_name.endswith('.json'):
-                    file_name += '.json'
-                with open(file_name, 'w') as f:
-                    json.dump(self.saved_passwords, f, indent=2)
-            
+        self.run_job("Exporting passwords...", total,
+                     partial(export_saved, store=self.store, path=file_name, total=total),
+                     partial(self.export_done, total=total))
+
+    def export_done(self, written, error, total):
+        if error is not None:
+            QMessageBox.critical(self, "Error", f"Failed to export passwords: {error}")
+        elif written < total:
+            QMessageBox.warning(self, "Export", f"Export cancelled after {written} passwords.")
+        else:
             QMessageBox.information(self, "Success", "Passwords exported successfully!")
+
+    def import_passwords(self):
+        file_name, _ = QFileDialog.getOpenFileName(
+            self, "Import Passwords", "",
+            "Password exports (*.csv *.json *.jsonl *.ndjson);;All Files (*)"
+        )
+        
+        if not file_name:
+            return
+            
+        self.run_job("Importing passwords...", 0,
+                     partial(import_saved, store=self.store, path=file_name), self.import_done)
+
+    def import_done(self, result, error):
+        self.saved_model.invalidate_index()
+        if error is not None:
+            QMessageBox.critical(self, "Error", f"Failed to import passwords: {error}")
+            return
+        message = (f"Imported {result.imported} passwords "
+                   f"({result.duplicates} duplicates and {result.invalid} invalid rows skipped).")
+        if result.cancelled:
+            message = "Import cancelled. " + message
+        QMessageBox.information(self, "Import", message)
+
+    def check_breaches(self):
+        index = self.analysis_cache.breaches
+        if index is None:
+            QMessageBox.warning(self, "Check Breaches",
+                                "No breach index found. Build one from a Pwned Passwords dump with:\n"
+                                f"gen.py --build-breach-index DUMP (written to {breach.default_path()})")
+            return
+        self.run_job("Checking saved passwords...", self.store.count(),
+                     partial(check_saved, store=self.store, index=index), self.breaches_checked)
+
+    def breaches_checked(self, result, error):
+        if error is not None:
+            QMessageBox.critical(self, "Error", f"Failed to check passwords: {error}")
+            return
+        done, found = result
+        message = f"{len(found)} of {done} saved passwords appear in the breach corpus."
+        if found:
+            found.sort(key=lambda item: -item[1])
+            message += "\n\n" + "\n".join(f"{name}: seen {count:,} times" for name, count in found[:20])
+            if len(found) > 20:
+                message += f"\n... and {len(found) - 20} more"
+        QMessageBox.information(self, "Check Breaches", message)
+
+    def encrypt_vault(self):
+        from passcraft import vault
+        if not vault.available():
+            QMessageBox.warning(self, "Encrypt Vault",
+                                "Encryption needs the 'cryptography' package (pip install cryptography).")
+            return
+        password, ok = QInputDialog.getText(self, "Encrypt Vault", "Choose a master password:",
+                                            QLineEdit.EchoMode.Password)
+        if not ok or not password:
+            return
+        confirm, ok = QInputDialog.getText(self, "Encrypt Vault", "Repeat the master password:",
+                                           QLineEdit.EchoMode.Password)
+        if not ok:
+            return
+        if confirm != password:
+            QMessageBox.warning(self, "Encrypt Vault", "The passwords do not match.")
+            return
+        try:
+            self.store.close()
+            self.store = vault.EncryptedPasswordStore(SAVED_PASSWORDS_DB, password,
+                                                      legacy_json=SAVED_PASSWORDS_FILE,
+                                                      kdf_params=vault.tune_kdf())
         except Exception as e:
-            QMessageBox.critical(self, "Error", f"Failed to export passwords: {str(e)}")
+            self.store = self.open_store()
+            QMessageBox.critical(self, "Error", f"Failed to encrypt the vault: {str(e)}")
+        self.saved_model.store = self.store
+        self.saved_model.invalidate_index()
+        self.encrypt_btn.setVisible(not self.store.is_encrypted())
+        if self.store.is_encrypted():
+            QMessageBox.information(self, "Encrypt Vault",
+                                    "Saved passwords are now encrypted. Keep the master password safe: "
+                                    "it cannot be recovered.")
+
+    def start_bulk(self):
+        if self.bulk_task is not None:
+            return
+        count = self.bulk_count.value()
+        if self.bulk_kind.currentIndex() == 0:
+            charset = self.selected_charset()
+            if not charset and not self.pronounceable_check.isChecked():
+                QMessageBox.warning(self, "Error", "Please select at least one character set!")
+                return
+            profile = self.current_profile()
+        else:
+            self.ensure_tab(self.setup_passphrase_tab)  # its settings are used
+            profile = self.current_passphrase_profile()
+        try:
+            generator = profiles.compile_profile(profile)
+        except ValueError as e:
+            QMessageBox.warning(self, "Bulk", str(e).capitalize() + ".")
+            return
+        generate, space, field = generator.generate, generator.space, generator.field
+
+        odds = unique.collision_probability(count, space)
+        if self.bulk_unique.isChecked():
+            try:
+                unique.check_capacity(count, generator.capacity)
+            except ValueError as e:
+                QMessageBox.warning(self, "Bulk", str(e).capitalize() + ".")
+                return
+            # Filled with the saved passwords by the task, off the GUI thread
+            self.bulk_seen = unique.UniqueFilter(capacity=count + self.store.count())
+            batches = unique.iter_unique(generate, count, self.bulk_seen, BULK_CHUNK_SIZE)
+        else:
+            batches = (generate(min(BULK_CHUNK_SIZE, count - done))
+                       for done in range(0, count, BULK_CHUNK_SIZE))
 
+        path = None
+        if self.bulk_target.currentIndex() == 1:
+            path, _ = QFileDialog.getSaveFileName(
+                self, "Write Generated Passwords", "",
+                "Text Files (*.txt);;CSV Files (*.csv);;JSON Lines (*.jsonl)")
+            if not path:
+                return
+        else:
+            if count > BULK_VIEW_LIMIT:
+                QMessageBox.warning(self, "Bulk", f"Up to {BULK_VIEW_LIMIT:,} items can be shown; "
+                                                  "choose \"Write to file\" for more.")
+                return
+            self.bulk_model.clear()
+        score = path is None and self.bulk_score.isChecked()
+
+        self.bulk_task = Task(partial(generate_bulk, batches=batches, total=count, path=path,
+                                      field=field, score=score, seen=self.bulk_seen,
+                                      store=self.store))
+        self.bulk_task.signals.chunk.connect(self.bulk_model.append_chunk)
+        self.bulk_task.signals.status.connect(self.bulk_status.setText)
+        self.bulk_task.signals.progress.connect(self.bulk_progressed)
+        self.bulk_task.signals.finished.connect(lambda done: self.bulk_done(done, path))
+        self.bulk_task.signals.failed.connect(
+            lambda error: self.bulk_done(None, path, error))
+        self.bulk_start_btn.setEnabled(False)
+        self.bulk_cancel_btn.setEnabled(True)
+        self.bulk_progress.setValue(0)
+        self.bulk_status.setText("Generating...")
+        self.bulk_status.setToolTip(f"Chance of a repeat without \"Unique\": {odds:.3g}")
+        self.bulk_task.start()
+
+    def bulk_progressed(self, done, total):
+        self.bulk_progress.setValue(int(done * 100 / total) if total else 100)
+        self.bulk_status.setText(f"{done:,} / {total:,}")
+
+    def cancel_bulk(self):
+        if self.bulk_task is not None:
+            self.bulk_task.cancel()
+
+    def bulk_done(self, done, path, error=None):
+        cancelled = self.bulk_task.cancelled
+        self.bulk_task = None
+        if self.bulk_seen is not None:
+            self.bulk_seen.close()
+            self.bulk_seen = None
+        self.bulk_start_btn.setEnabled(True)
+        self.bulk_cancel_btn.setEnabled(False)
+        if error is not None:
+            self.bulk_status.setText("Failed.")
+            QMessageBox.critical(self, "Error", f"Bulk generation failed: {error}")
+            return
+        message = f"{done:,} generated" + (f" and written to {path}" if path else "")
+        self.bulk_status.setText(("Cancelled: " if cancelled else "Done: ") + message + ".")
+
+    def copy_bulk_item(self, index):
+        QApplication.clipboard().setText(index.data(Qt.ItemDataRole.UserRole))
+        QToolTip.showText(self.mapToGlobal(self.bulk_list.rect().topLeft()), "Copied!", msecShowTime=1000)
+
+    def closeEvent(self, event):
+        # Let running tasks stop before the interpreter tears down
+        self.cancel_bulk()
+        for task in (self.vault_task, self.job_task):
+            if task is not None:
+                task.cancel()
+        QThreadPool.globalInstance().waitForDone()
+        super().closeEvent(event)
+
+    def create_progress_dialog(self, label, total):
+        dialog = TransferProgress(label, total, self)
+        dialog.show()
+        return dialog
+
+    def run_job(self, label, total, fn, done):
+        """Run ``fn(task)`` as a :class:`Task` behind a modal progress dialog.
+
+        ``done(result, error)`` is called on the GUI thread when it ends,
+        with ``error`` the failure message or ``None``.
+        """
+        progress = self.create_progress_dialog(label, total)
+        task = self.job_task = Task(fn)
+        task.signals.progress.connect(progress.show_progress)
+        progress.canceled.connect(task.cancel)
+
+        def finish(result, error=None):
+            self.job_task = None
+            progress.close()
+            done(result, error)
+
+        task.signals.finished.connect(finish)
+        task.signals.failed.connect(lambda error: finish(None, error))
+        task.start()
+
+    @metrics.timed("gui.toggle_theme")
     def toggle_theme(self):
         self.dark_mode = not self.dark_mode
         self.setup_styles()
+        # Only the parts on screen; other pages are restyled in tab_shown
+        for scope in (self.tabs.tabBar(), self.footer, self.tabs.currentWidget()):
+            self.apply_theme(scope)
 
+    @metrics.timed("startup.setup_styles")
     def setup_styles(self):
-        if self.dark_mode:
-            # Dark theme
-            self.setStyleSheet("""
-                QWidget {
-                    background-color: #1e1e2e;
-                    color: #cdd6f4;
-                }
-                QGroupBox {
-                    border: 2px solid #89b4fa;
-                    border-radius: 8px;
-                    margin-top: 10px;
-                    padding-top: 15px;
-                }
-                QGroupBox::title {
-                    subcontrol-origin: margin;
-                    left: 10px;
-                    padding: 0 5px;
-                    color: #89b4fa;
-                }
-                QLineEdit, QListWidget {
-                    background-color: #313244;
-                    color: #cdd6f4;
-                    border: 1px solid #45475a;
-                    border-radius: 5px;
-                    padding: 5px;
-                }
-                QPushButton {
-                    background-color: #585b70;
-                    color: #cdd6f4;
-                    border: 1px solid #6c7086;
-                    border-radius: 5px;
-                    padding: 5px 10px;
-                }
-                QPushButton:hover {
-                    background-color: #6c7086;
-                }
-                QCheckBox {
-                    spacing: 5px;
-                }
-                QCheckBox::indicator {
-                    width: 16px;
-                    height: 16px;
-                }
-                QSlider::groove:horizontal {
-                    height: 6px;
-                    background: #45475a;
-                    border-radius: 3px;
-                }
-                QSlider::handle:horizontal {
-                    width: 16px;
-                    height: 16px;
-                    margin: -5px 0;
-                    background: #89b4fa;
-                    border-radius: 8px;
-                }
-                QTabWidget::pane {
-                    border: 1px solid #45475a;
-                }
-                QTabBar::tab {
-                    background: #313244;
-                    color: #cdd6f4;
-                    padding: 5px 10px;
-                    border: 1px solid #45475a;
-                    border-bottom: none;
-                    border-top-left-radius: 5px;
-                    border-top-right-radius: 5px;
-                }
-                QTabBar::tab:selected {
-                    background: #45475a;
-                    color: #89b4fa;
-                }
-                QListWidget::item:selected {
-                    background: #585b70;
-                }
-            """)
-        else:
-            # Light theme
-            self.setStyleSheet("""
-                QWidget {
-                    background-color: #fafafa;
-                    color: #4a4a4a;
-                }
-                QGroupBox {
-                    border: 2px solid #1e88e5;
-                    border-radius: 8px;
-                    margin-top: 10px;
-                    padding-top: 15px;
-                }
-                QGroupBox::title {
-                    subcontrol-origin: margin;
-                    left: 10px;
-                    padding: 0 5px;
-                    color: #1e88e5;
-                }
-                QLineEdit, QListWidget {
-                    background-color: #ffffff;
-                    color: #333333;
-                    border: 1px solid #e0e0e0;
-                    border-radius: 5px;
-                    padding: 5px;
-                }
-                QPushButton {
-                    background-color: #e0e0e0;
-                    color: #333333;
-                    border: 1px solid #bdbdbd;
-                    border-radius: 5px;
-                    padding: 5px 10px;
-                }
-                QPushButton:hover {
-                    background-color: #bdbdbd;
-                }
-                QCheckBox {
-                    spacing: 5px;
-                }
-                QCheckBox::indicator {
-                    width: 16px;
-                    height: 16px;
-                }
-                QSlider::groove:horizontal {
-                    height: 6px;
-                    background: #e0e0e0;
-                    border-radius: 3px;
-                }
-                QSlider::handle:horizontal {
-                    width: 16px;
-                    height: 16px;
-                    margin: -5px 0;
-                    background: #1e88e5;
-                    border-radius: 8px;
-                }
-                QTabWidget::pane {
-                    border: 1px solid #e0e0e0;
-                }
-                QTabBar::tab {
-                    background: #f5f5f5;
-                    color: #666666;
-                    padding: 5px 10px;
-                    border: 1px solid #e0e0e0;
-                    border-bottom: none;
-                    border-top-left-radius: 5px;
-                    border-top-right-radius: 5px;
-                }
-                QTabBar::tab:selected {
-                    background: #ffffff;
-                    color: #1e88e5;
-                }
-                QListWidget::item:selected {
-                    background: #e0e0e0;
-                }
-            """)
+        QApplication.setPalette(theme_palette(self.dark_mode))
+
+    def apply_theme(self, scope):
+        """Give ``scope`` the current theme's stylesheet unless it already has it."""
+        if self.themed.get(scope) != self.dark_mode:
+            self.themed[scope] = self.dark_mode
+            scope.setStyleSheet(DARK_STYLESHEET if self.dark_mode else LIGHT_STYLESHEET)
 
 if __name__ == "__main__":
+    # PASSCRAFT_METRICS / PASSCRAFT_PROFILE (see passcraft.metrics)
+    metrics.configure()
     app = QApplication(sys.argv)
     window = PasswordGenerator()
     sys.exit(app.exec())
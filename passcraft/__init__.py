@@ -0,0 +1,13 @@
+"""Qt-free generation core for PassCraft.
+
+Everything in this package can be imported without PyQt6, so scripts and the
+command-line mode can generate passwords without paying for a window.
+"""
+
+from .engine import (CHARSETS, DEFAULT_WORDS, build_charset, generate_password,
+                     generate_passphrase, load_wordlist)
+
+__all__ = [
+    "CHARSETS", "DEFAULT_WORDS", "build_charset", "generate_password",
+    "generate_passphrase", "load_wordlist",
+]
@@ -0,0 +1,236 @@
+"""Password strength scoring without big integers or UI state.
+
+Entropy and crack time are computed in log space: ``length * log2(pool)``
+instead of ``log2(pool ** length)``, and the crack time is compared as
+``log10(seconds)``, so arbitrarily long inputs never build huge integers or
+overflow a float conversion.
+
+The character-class entropy is an upper bound; by default it is capped by the
+pattern-aware estimate from :mod:`passcraft.patterns`, so dictionary words,
+keyboard walks, repeats and dates are not credited as random characters.
+"""
+
+import hashlib
+import math
+from collections import OrderedDict, namedtuple
+from functools import lru_cache
+
+from . import metrics, patterns, rng
+from .engine import CHARSETS
+
+CRACK_SPEED = 1e9  # 1 billion guesses per second
+_LOG10_2 = math.log10(2)
+_LOG10_CRACK_SPEED = math.log10(CRACK_SPEED)
+
+# (upper score bound, label, colour)
+TIERS = (
+    (20, "Very Weak", "#ff0000"),         # Red
+    (40, "Weak", "#ff5555"),              # Light Red
+    (60, "Moderate", "#ffb86c"),          # Orange
+    (80, "Strong", "#50fa7b"),            # Green
+    (95, "Very Strong", "#00bfff"),       # Blue
+    (None, "Extremely Strong", "#8a2be2"),  # Purple
+)
+
+# Character class bits and their pool sizes
+UPPER, LOWER, DIGIT, SYMBOL = 1, 2, 4, 8
+POOL_SIZES = {UPPER: 26, LOWER: 26, DIGIT: 10, SYMBOL: 32}
+
+# ``breaches``: occurrences in the local breach corpus (see passcraft.breach)
+Analysis = namedtuple("Analysis",
+                      "entropy score strength color crack_seconds_log10 crack_time matches breaches",
+                      defaults=(0,))
+
+
+def _ascii_class_table():
+    table = bytearray(256)
+    for b in range(256):
+        c = chr(b)
+        if b >= 128:
+            continue
+        if c in CHARSETS["upper"]:
+            table[b] = UPPER
+        elif c in CHARSETS["lower"]:
+            table[b] = LOWER
+        elif c in CHARSETS["digits"]:
+            table[b] = DIGIT
+        else:
+            table[b] = SYMBOL
+    return bytes(table)
+
+
+_CLASS_TABLE = _ascii_class_table()
+_POOL_BY_FLAGS = [sum(size for bit, size in POOL_SIZES.items() if flags & bit)
+                  for flags in range(16)]
+
+
+def class_flags(password):
+    """Bitmask of the character classes present in ``password``."""
+    flags = 0
+    for c in set(password):
+        if c.isupper(): flags |= UPPER
+        if c.islower(): flags |= LOWER
+        if c.isdigit(): flags |= DIGIT
+        if not c.isalnum(): flags |= SYMBOL
+    return flags
+
+
+def class_flags_batch(passwords):
+    """Vectorised :func:`class_flags` for a list of non-empty passwords.
+
+    ASCII batches are classified with one table lookup over the concatenated
+    bytes (NumPy ``reduceat`` when available); anything else falls back to
+    the per-password path, which handles full Unicode.
+    """
+    blob = "".join(passwords)
+    if not blob.isascii() or (passwords and not all(passwords)):
+        return [class_flags(p) for p in passwords]
+    np = rng.numpy() if len(passwords) >= 256 else None
+    if np is not None:
+        codes = np.frombuffer(blob.encode("ascii"), dtype=np.uint8)
+        flags = np.frombuffer(_CLASS_TABLE, dtype=np.uint8)[codes]
+        lengths = np.fromiter(map(len, passwords), dtype=np.int64, count=len(passwords))
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        return np.bitwise_or.reduceat(flags, starts).tolist()
+    # Map every byte to its class bit, then OR the distinct bits per password
+    mapped = blob.encode("ascii").translate(_CLASS_TABLE)
+    out = []
+    pos = 0
+    for p in passwords:
+        end = pos + len(p)
+        flags = 0
+        for bit in set(mapped[pos:end]):
+            flags |= bit
+        out.append(flags)
+        pos = end
+    return out
+
+
+def pool_size(flags):
+    return _POOL_BY_FLAGS[flags]
+
+
+def entropy_bits(pool, length):
+    return length * math.log2(pool) if pool > 0 and length > 0 else 0.0
+
+
+def score_from_entropy(entropy, length):
+    # Strength score (0-100)
+    length_bonus = min(40, length * 2)
+    complexity_bonus = min(60, entropy * 1.5)
+    return int(min(100, length_bonus + complexity_bonus))
+
+
+def strength_tier(score):
+    """Return ``(index, label, colour)`` for a 0-100 score."""
+    for index, (bound, label, color) in enumerate(TIERS):
+        if bound is None or score < bound:
+            return index, label, color
+
+
+def crack_seconds_log10(entropy):
+    """log10 of the brute-force time for ``2 ** entropy`` guesses."""
+    if entropy <= 0:
+        return -math.inf
+    return entropy * _LOG10_2 - _LOG10_CRACK_SPEED
+
+
+def format_crack_time(seconds_log10):
+    # Anything past 100 years is "Centuries", so only small values are exponentiated
+    if seconds_log10 >= math.log10(3153600000):
+        return "Centuries"
+    seconds = 10 ** seconds_log10 if seconds_log10 > -math.inf else 0.0
+    if seconds < 1:
+        return "Instant"
+    elif seconds < 60:
+        return f"{int(seconds)} seconds"
+    elif seconds < 3600:
+        return f"{int(seconds/60)} minutes"
+    elif seconds < 86400:
+        return f"{int(seconds/3600)} hours"
+    elif seconds < 31536000:  # 1 year
+        return f"{int(seconds/86400)} days"
+    elif seconds < 3153600000:  # 100 years
+        return f"{int(seconds/31536000)} years"
+    return "Centuries"
+
+
+@metrics.timed("analysis.analyze")
+def analyze(password, flags=None, estimator=None, use_patterns=True, breaches=None):
+    """Score ``password``; returns an :class:`Analysis` or ``None`` if empty.
+
+    ``estimator`` defaults to :func:`patterns.default_estimator`; pass
+    ``use_patterns=False`` for the plain character-class score.
+    ``breaches`` is an optional :class:`passcraft.breach.BreachIndex`.
+    """
+    if not password:
+        return None
+    if flags is None:
+        flags = class_flags(password)
+    result = analyze_shape(flags, len(password))
+    if use_patterns:
+        estimate = (estimator or patterns.default_estimator()).estimate(password)
+        if estimate.bits >= result.entropy:
+            result = result._replace(matches=estimate.matches)
+        else:
+            result = _result(estimate.bits, len(password), estimate.matches)
+    if breaches is not None:
+        result = breached(result, breaches.count(password), len(breaches), len(password))
+    return result
+
+
+def breached(result, count, corpus_size, length):
+    """Cap ``result`` for a password seen ``count`` times in a breach corpus.
+
+    Attackers try known passwords first, so one from the corpus falls
+    within ``corpus_size`` guesses whatever its shape.
+    """
+    if not count:
+        return result
+    bits = min(result.entropy, math.log2(max(2, corpus_size)))
+    return _result(bits, length, result.matches)._replace(breaches=count)
+
+
+@lru_cache(maxsize=4096)
+def analyze_shape(flags, length):
+    """The class-based score only depends on which classes occur and the length."""
+    return _result(entropy_bits(pool_size(flags), length), length, ())
+
+
+def _result(entropy, length, matches):
+    score = score_from_entropy(entropy, length)
+    _, strength, color = strength_tier(score)
+    seconds_log10 = crack_seconds_log10(entropy)
+    return Analysis(entropy, score, strength, color, seconds_log10,
+                    format_crack_time(seconds_log10), matches)
+
+
+class AnalysisCache:
+    """Bounded LRU of :func:`analyze` results for interactive callers.
+
+    Entries are keyed by a BLAKE2b digest of the password, so the keys stay
+    small and fixed-size however long the input is. ``breaches`` is passed
+    on to :func:`analyze`.
+    """
+
+    def __init__(self, size=256, breaches=None):
+        self.size = size
+        self.breaches = breaches
+        self._results = OrderedDict()
+
+    def analyze(self, password, use_patterns=True):
+        key = (hashlib.blake2b(password.encode("utf-8", "surrogatepass"),
+                               digest_size=16).digest(), use_patterns)
+        result = self._results.get(key)
+        if result is not None:
+            self._results.move_to_end(key)
+            return result
+        result = analyze(password, use_patterns=use_patterns, breaches=self.breaches)
+        if result is not None:
+            self._results[key] = result
+            if len(self._results) > self.size:
+                self._results.popitem(last=False)
+        return result
+
+    def clear(self):
+        self._results.clear()
@@ -0,0 +1,129 @@
+"""Streaming strength audit over large password files."""
+
+import json
+import math
+
+from . import analysis, patterns
+
+CHUNK_SIZE = 65536
+_CLASS_NAMES = ((analysis.UPPER, "upper"), (analysis.LOWER, "lower"),
+                (analysis.DIGIT, "digits"), (analysis.SYMBOL, "symbols"))
+
+
+def class_names(flags):
+    return "+".join(name for bit, name in _CLASS_NAMES if flags & bit) or "none"
+
+
+class AuditSummary:
+    """Running totals for an audit; memory use does not grow with input size.
+
+    With a ``breaches`` index (:class:`passcraft.breach.BreachIndex`),
+    passwords found in the breach corpus are counted and scored as such.
+    """
+
+    def __init__(self, use_patterns=True, breaches=None):
+        self.use_patterns = use_patterns
+        self.breaches = breaches
+        self.breached = 0
+        self.total = 0
+        self.blank = 0
+        self.tiers = {label: 0 for _, label, _ in analysis.TIERS}
+        self.classes = {}
+        self.entropy_sum = 0.0
+        self.entropy_min = math.inf
+        self.entropy_max = 0.0
+        self.length_sum = 0
+        self.length_min = math.inf
+        self.length_max = 0
+
+    def add_chunk(self, passwords):
+        """Score a list of non-empty passwords and fold them into the totals."""
+        tiers = self.tiers
+        classes = self.classes
+        estimator = patterns.default_estimator() if self.use_patterns else None
+        breaches = self.breaches
+        counts = breaches.count_many(passwords) if breaches is not None else None
+        for i, (password, flags) in enumerate(zip(passwords, analysis.class_flags_batch(passwords))):
+            length = len(password)
+            if estimator is None:
+                result = analysis.analyze_shape(flags, length)
+            else:
+                result = analysis.analyze(password, flags, estimator)
+            if counts is not None and counts[i]:
+                result = analysis.breached(result, counts[i], len(breaches), length)
+                self.breached += 1
+            tiers[result.strength] += 1
+            classes[flags] = classes.get(flags, 0) + 1
+            self.entropy_sum += result.entropy
+            if result.entropy < self.entropy_min: self.entropy_min = result.entropy
+            if result.entropy > self.entropy_max: self.entropy_max = result.entropy
+            self.length_sum += length
+            if length < self.length_min: self.length_min = length
+            if length > self.length_max: self.length_max = length
+        self.total += len(passwords)
+
+    def as_dict(self):
+        scored = self.total or 1
+        data = {
+            "total": self.total,
+            "blank_lines": self.blank,
+            "strength": self.tiers,
+            "character_classes": {class_names(flags): count for flags, count
+                                  in sorted(self.classes.items(), key=lambda kv: -kv[1])},
+            "entropy": {
+                "min": round(self.entropy_min, 2) if self.total else 0,
+                "mean": round(self.entropy_sum / scored, 2),
+                "max": round(self.entropy_max, 2),
+            },
+            "length": {
+                "min": self.length_min if self.total else 0,
+                "mean": round(self.length_sum / scored, 2),
+                "max": self.length_max,
+            },
+        }
+        if self.breaches is not None:
+            data["breached"] = self.breached
+        return data
+
+    def format_text(self):
+        data = self.as_dict()
+        lines = [f"Passwords audited: {data['total']:,} ({data['blank_lines']:,} blank lines skipped)",
+                 "", "Strength:"]
+        for label, count in data["strength"].items():
+            lines.append(f"  {label:<17} {count:>12,}  {count / (self.total or 1):6.1%}")
+        lines += ["", "Character classes:"]
+        for name, count in data["character_classes"].items():
+            lines.append(f"  {name:<28} {count:>12,}")
+        e, n = data["entropy"], data["length"]
+        lines += ["", f"Entropy (bits): min {e['min']}  mean {e['mean']}  max {e['max']}",
+                  f"Length:         min {n['min']}  mean {n['mean']}  max {n['max']}"]
+        if "breached" in data:
+            lines.append(f"Breached:       {data['breached']:,}  "
+                         f"{data['breached'] / (self.total or 1):.1%} found in the breach corpus")
+        return "\n".join(lines)
+
+    def to_json(self):
+        return json.dumps(self.as_dict(), indent=2)
+
+
+def audit_lines(lines, chunk_size=CHUNK_SIZE, summary=None):
+    """Audit an iterable of lines (newlines are stripped, blank lines skipped)."""
+    summary = summary or AuditSummary()
+    chunk = []
+    for line in lines:
+        password = line.rstrip("\r\n")
+        if not password:
+            summary.blank += 1
+            continue
+        chunk.append(password)
+        if len(chunk) >= chunk_size:
+            summary.add_chunk(chunk)
+            chunk = []
+    if chunk:
+        summary.add_chunk(chunk)
+    return summary
+
+
+def audit_file(path, chunk_size=CHUNK_SIZE, use_patterns=True, breaches=None):
+    with open(path, "r", encoding="utf-8", errors="replace", newline="") as f:
+        return audit_lines(f, chunk_size, AuditSummary(use_patterns, breaches))
@@ -0,0 +1,320 @@
+"""Offline breached-password check against a local sorted SHA-1 corpus.
+
+The raw corpus is a text dump of ``SHA1HEX[:COUNT]`` lines, such as the
+Pwned Passwords download, or plain passwords with ``plaintext=True``.
+:func:`build_index` compacts it into one binary file:
+
+* a header;
+* a fan-out table of 65537 uint64 record offsets, one per leading 16-bit
+  hash prefix (as in git pack indexes);
+* the sorted records, 20 hash bytes plus a big-endian uint32 breach count;
+* an optional Bloom filter over the hashes.
+
+:class:`BreachIndex` memory-maps that file. A lookup hashes the password,
+probes the Bloom filter (most passwords that are not in the corpus stop
+here), then binary-searches the few records under its fan-out prefix.
+Either way only a handful of pages are touched, so lookups take
+microseconds even for a corpus of billions of hashes.
+
+Building uses sorted runs on disk plus a k-way merge, so memory stays
+bounded for dumps far larger than RAM. Input already in hash order, like
+the "ordered by hash" Pwned Passwords download, is copied without the
+merge. NumPy (optional) speeds up the Bloom filter construction.
+"""
+
+import hashlib
+import heapq
+import math
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+from binascii import Error as HexError, unhexlify
+from functools import lru_cache
+
+from . import cache, metrics, rng
+
+INDEX_FILE = "breached.idx"
+HASH_SIZE = 20
+RECORD_SIZE = HASH_SIZE + 4
+BLOOM_BITS_PER_ENTRY = 10
+RUN_RECORDS = 2_000_000  # records sorted in memory per run while building
+MAX_COUNT = 0xFFFFFFFF
+
+_MAGIC = b"PCBRCH\x00\x01"
+_HEADER = struct.Struct("=8sIIQQ")  # magic, record size, bloom hashes, records, bloom bytes
+_FANOUT = 1 << 16
+_DATA_OFFSET = _HEADER.size + 8 * (_FANOUT + 1)
+_COUNT = struct.Struct(">I")
+
+
+def password_hash(password):
+    return hashlib.sha1(password.encode("utf-8", "surrogatepass")).digest()
+
+
+def default_path():
+    """``$PASSCRAFT_BREACH_INDEX``, else ``breached.idx`` in the cache dir."""
+    return os.environ.get("PASSCRAFT_BREACH_INDEX") or cache.cache_path(INDEX_FILE)
+
+
+@lru_cache(maxsize=None)
+def default_index():
+    """The index at :func:`default_path`, or ``None`` when none was built."""
+    path = default_path()
+    return BreachIndex(path) if os.path.exists(path) else None
+
+
+def _bloom_positions(digest, hashes, mask):
+    # Double hashing over two independent 64-bit slices of the SHA-1
+    h1 = int.from_bytes(digest[4:12], "big")
+    h2 = int.from_bytes(digest[12:20], "big") | 1
+    return [(h1 + i * h2) & mask for i in range(hashes)]
+
+
+class BreachIndex:
+    """Read-only view of a compiled breach index.
+
+    ``preload=True`` copies the Bloom filter into process memory, which
+    suits long audits; by default it is read through the memory map like
+    the records.
+    """
+
+    def __init__(self, path, preload=False):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.record_size, self._hashes, self.records, bloom_bytes = \
+            _HEADER.unpack_from(self._mm)
+        bloom_offset = _DATA_OFFSET + self.records * self.record_size
+        if (magic != _MAGIC or self.record_size != RECORD_SIZE
+                or len(self._mm) != bloom_offset + bloom_bytes):
+            self._mm.close()
+            raise ValueError(f"{path} is not a PassCraft breach index")
+        self._fanout = memoryview(self._mm)[_HEADER.size:_DATA_OFFSET].cast("Q")
+        self._bloom = None
+        self._mask = bloom_bytes * 8 - 1
+        if bloom_bytes:
+            self._bloom = (self._mm[bloom_offset:] if preload
+                           else memoryview(self._mm)[bloom_offset:])
+
+    def __len__(self):
+        return self.records
+
+    def __contains__(self, password):
+        return self.count(password) > 0
+
+    def close(self):
+        self._fanout.release()
+        if isinstance(self._bloom, memoryview):
+            self._bloom.release()
+        self._mm.close()
+
+    def count(self, password):
+        """How often ``password`` occurs in the corpus (0 if it does not)."""
+        return self.count_hash(password_hash(password))
+
+    def count_hash(self, digest):
+        bloom = self._bloom
+        if bloom is not None:
+            # Same probes as _bloom_positions, stopping at the first clear bit
+            h1 = int.from_bytes(digest[4:12], "big")
+            h2 = int.from_bytes(digest[12:20], "big") | 1
+            mask = self._mask
+            for i in range(self._hashes):
+                bit = (h1 + i * h2) & mask
+                if not bloom[bit >> 3] & (1 << (bit & 7)):
+                    return 0
+        prefix = digest[0] << 8 | digest[1]
+        lo, hi = self._fanout[prefix], self._fanout[prefix + 1]
+        mm, size = self._mm, self.record_size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            pos = _DATA_OFFSET + mid * size
+            key = mm[pos:pos + HASH_SIZE]
+            if key < digest:
+                lo = mid + 1
+            elif key > digest:
+                hi = mid
+            else:
+                return _COUNT.unpack_from(mm, pos + HASH_SIZE)[0]
+        return 0
+
+    @metrics.timed("breach.count_many")
+    def count_many(self, passwords):
+        return [self.count_hash(password_hash(p)) for p in passwords]
+
+
+# -- building ---------------------------------------------------------------
+
+def _parse_line(line, plaintext):
+    """``(digest, count)`` for one dump line, ``None`` for blank lines."""
+    line = line.rstrip(b"\r\n")
+    if not line:
+        return None
+    if plaintext:
+        return hashlib.sha1(line).digest(), 1
+    digest = unhexlify(line[:40])
+    if len(digest) != HASH_SIZE or (len(line) > 40 and line[40:41] != b":"):
+        raise ValueError("expected SHA1HEX or SHA1HEX:COUNT")
+    return digest, min(int(line[41:]), MAX_COUNT) if len(line) > 41 else 1
+
+
+def _read_run(path):
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(RECORD_SIZE * 4096)
+            if not block:
+                return
+            for pos in range(0, len(block), RECORD_SIZE):
+                yield block[pos:pos + RECORD_SIZE]
+
+
+def _merge_runs(paths, out):
+    """k-way merge of sorted run files, summing the counts of equal hashes."""
+    written = 0
+    last = None
+    total = 0
+    for record in heapq.merge(*map(_read_run, paths)):
+        digest = record[:HASH_SIZE]
+        if digest == last:
+            total = min(total + _COUNT.unpack_from(record, HASH_SIZE)[0], MAX_COUNT)
+            continue
+        if last is not None:
+            out.write(last + _COUNT.pack(total))
+            written += 1
+        last, total = digest, _COUNT.unpack_from(record, HASH_SIZE)[0]
+    if last is not None:
+        out.write(last + _COUNT.pack(total))
+        written += 1
+    return written
+
+
+def _fanout(mm, records):
+    """Record offset of every 16-bit prefix, by binary search over the data."""
+    table = [0] * (_FANOUT + 1)
+    lo = 0
+    for prefix in range(1, _FANOUT):
+        key = prefix.to_bytes(2, "big")
+        hi = records
+        while lo < hi:
+            mid = (lo + hi) // 2
+            pos = _DATA_OFFSET + mid * RECORD_SIZE
+            if mm[pos:pos + 2] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        table[prefix] = lo
+    table[_FANOUT] = records
+    return table
+
+
+def _bloom(mm, records, bits_per_entry):
+    """``(hash count, filter bytes)``; the filter size is a power of two."""
+    bits = 1 << max(6, math.ceil(math.log2(max(1, records * bits_per_entry))))
+    # Sized for the requested density; rounding up the size only lowers the error
+    hashes = max(1, round(bits_per_entry * math.log(2)))
+    mask = bits - 1
+    bloom = bytearray(bits // 8)
+    np = rng.numpy()
+    step = 1 << 20
+    for start in range(0, records, step):
+        count = min(step, records - start)
+        offset = _DATA_OFFSET + start * RECORD_SIZE
+        if np is not None:
+            rows = np.frombuffer(mm, np.uint8, count * RECORD_SIZE, offset).reshape(count, RECORD_SIZE)
+            h1 = rows[:, 4:12].copy().view(">u8").ravel().astype(np.uint64)
+            h2 = rows[:, 12:20].copy().view(">u8").ravel().astype(np.uint64) | np.uint64(1)
+            del rows  # the map is closed by the caller
+            target = np.frombuffer(bloom, np.uint8)
+            for i in range(hashes):
+                bit = (h1 + np.uint64(i) * h2) & np.uint64(mask)
+                np.bitwise_or.at(target, (bit >> np.uint64(3)).astype(np.intp),
+                                 (np.uint8(1) << (bit & np.uint64(7)).astype(np.uint8)))
+            continue
+        for pos in range(offset, offset + count * RECORD_SIZE, RECORD_SIZE):
+            for bit in _bloom_positions(mm[pos:pos + HASH_SIZE], hashes, mask):
+                bloom[bit >> 3] |= 1 << (bit & 7)
+    return hashes, bloom
+
+
+@metrics.timed("breach.build")
+def build_index(source, path=None, plaintext=False, bloom_bits=BLOOM_BITS_PER_ENTRY,
+                run_records=RUN_RECORDS, progress=None):
+    """Compile the text dump at ``source`` into an index at ``path``.
+
+    ``bloom_bits`` is the Bloom filter size in bits per record (0 for none).
+    ``progress(lines)`` is called after every run. Returns the record count.
+    """
+    path = path or default_path()
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    workdir = tempfile.mkdtemp(dir=directory, prefix=".tmp-breach-")
+    try:
+        runs = []
+        in_order = True
+        last = b""
+        lines = 0
+
+        def flush(run):
+            if not in_order:
+                run.sort()
+            runs.append(os.path.join(workdir, f"run{len(runs)}"))
+            with open(runs[-1], "wb") as f:
+                f.write(b"".join(run))
+            if progress is not None:
+                progress(lines)
+
+        with open(source, "rb") as f:
+            run = []
+            for lines, line in enumerate(f, 1):
+                try:
+                    parsed = _parse_line(line, plaintext)
+                except (HexError, ValueError):
+                    raise ValueError(f"{source}:{lines}: not a SHA-1 dump line "
+                                     "(expected SHA1HEX or SHA1HEX:COUNT)") from None
+                if parsed is None:
+                    continue
+                digest, count = parsed
+                if in_order and digest <= last:
+                    in_order = False  # the runs written so far are sorted already
+                last = digest
+                run.append(digest + _COUNT.pack(count))
+                if len(run) >= run_records:
+                    flush(run)
+                    run = []
+            if run:
+                flush(run)
+
+        output = os.path.join(workdir, "index")
+        with open(output, "w+b") as out:
+            out.write(bytes(_DATA_OFFSET))
+            if in_order:
+                # Strictly ascending input: the runs are already the final data
+                records = 0
+                for run_path in runs:
+                    with open(run_path, "rb") as f:
+                        shutil.copyfileobj(f, out, 1 << 20)
+                    records += os.path.getsize(run_path) // RECORD_SIZE
+            else:
+                records = _merge_runs(runs, out)
+            for run_path in runs:
+                os.unlink(run_path)
+            out.flush()
+
+            hashes, bloom = 0, b""
+            with mmap.mmap(out.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                fanout = _fanout(mm, records)
+                if bloom_bits and records:
+                    hashes, bloom = _bloom(mm, records, bloom_bits)
+            out.write(bloom)
+            out.seek(0)
+            out.write(_HEADER.pack(_MAGIC, RECORD_SIZE, hashes, records, len(bloom)))
+            out.write(struct.pack(f"={_FANOUT + 1}Q", *fanout))
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(output, path)
+        default_index.cache_clear()
+        return records
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
@@ -0,0 +1,57 @@
+"""On-disk cache for compiled data (dictionaries, wordlists, models)."""
+
+import os
+import sys
+
+
+def cache_dir():
+    """``$PASSCRAFT_CACHE_DIR``, else ``$XDG_CACHE_HOME/passcraft`` (``~/.cache``)."""
+    path = os.environ.get("PASSCRAFT_CACHE_DIR")
+    if not path:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+        path = os.path.join(base, "passcraft")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def cache_path(name):
+    return os.path.join(cache_dir(), name)
+
+
+def file_fingerprint(path):
+    """Cheap identity of a source file: absolute path, size and mtime."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return f"{path}:missing"
+    return f"{os.path.abspath(path)}:{st.st_size}:{st.st_mtime_ns}"
+
+
+def cache_key(*parts):
+    """Short hex digest of ``parts``; native byte order is included because
+    compiled caches store raw machine-order arrays."""
+    import hashlib
+    h = hashlib.sha1(sys.byteorder.encode())
+    for part in parts:
+        h.update(b"\0" + str(part).encode("utf-8", "surrogatepass"))
+    return h.hexdigest()[:16]
+
+
+def atomic_write(path, chunks):
+    """Write an iterable of byte strings to ``path`` via a temp file + rename."""
+    import tempfile
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
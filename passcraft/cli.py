@@ -0,0 +1,303 @@
+"""Command-line bulk generation.
+
+Invoked as ``gen.py --count N ...``; never imports PyQt6.
+"""
+
+import argparse
+import os
+import sys
+
+from . import engine, markov, metrics, passphrase, policy, profiles, unique
+from .output import FORMATS, BatchWriter, open_output
+
+
+def parse_charset(spec):
+    names = [name.strip() for name in spec.split(",") if name.strip()]
+    unknown = [name for name in names if name not in engine.CHARSETS]
+    if unknown:
+        raise argparse.ArgumentTypeError(
+            f"unknown charset {', '.join(unknown)} (choose from {', '.join(engine.CHARSETS)})")
+    return tuple(name for name in engine.CHARSETS if name in names)
+
+
+def parse_class_count(spec):
+    name, _, count = spec.partition("=")
+    if name not in engine.CHARSETS or not count.isdigit():
+        raise argparse.ArgumentTypeError(
+            f"expected CLASS=N with CLASS one of {', '.join(engine.CHARSETS)}")
+    return name, int(count)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="gen.py",
+        description="PassCraft - run without arguments to open the GUI.")
+    parser.add_argument("--count", type=int, default=1, help="number of items to generate")
+    parser.add_argument("--length", type=int, default=16, help="password length")
+    parser.add_argument("--charset", type=parse_charset, default="upper,lower,digits",
+                        help="comma-separated classes: upper,lower,digits,symbols")
+    parser.add_argument("--keyword", default="", help="custom word inserted into each password")
+    parser.add_argument("--each-class", action="store_true",
+                        help="at least one character from every --charset class")
+    parser.add_argument("--min", type=parse_class_count, action="append", default=[],
+                        metavar="CLASS=N", help="at least N characters of CLASS (repeatable)")
+    parser.add_argument("--max", type=parse_class_count, action="append", default=[],
+                        metavar="CLASS=N", help="at most N characters of CLASS (repeatable)")
+    parser.add_argument("--exclude", default="", metavar="CHARS",
+                        help="never use these characters")
+    parser.add_argument("--no-ambiguous", action="store_true",
+                        help=f"leave out look-alike characters ({policy.AMBIGUOUS})")
+    parser.add_argument("--no-repeat", action="store_true",
+                        help="use every character at most once per password")
+    parser.add_argument("--passphrase", action="store_true", help="generate passphrases instead")
+    parser.add_argument("--words", type=int, default=4, help="words per passphrase")
+    parser.add_argument("--separator", default="-", help="passphrase separator")
+    parser.add_argument("--no-number", action="store_true",
+                        help="do not append a number to passphrases")
+    parser.add_argument("--case", choices=passphrase.CASES, default="capitalize",
+                        help="passphrase word casing (random: capitalized or lowercase per word)")
+    parser.add_argument("--unique-words", action="store_true",
+                        help="never repeat a word within a passphrase")
+    parser.add_argument("--add-digits", type=int, default=0, metavar="N",
+                        help="append N random digits to a random passphrase word")
+    parser.add_argument("--add-symbols", type=int, default=0, metavar="N",
+                        help="append N random symbols to a random passphrase word")
+    parser.add_argument("--pronounceable", action="store_true",
+                        help="generate pronounceable passwords from a letter n-gram model "
+                             "trained on --wordlist (lowercase letters only)")
+    parser.add_argument("--markov-order", type=int, choices=markov.ORDERS,
+                        default=markov.DEFAULT_ORDER,
+                        help="n-gram order of --pronounceable (default: %(default)s)")
+    parser.add_argument("--wordlist", default=engine.WORDLIST_FILE,
+                        help="passphrase wordlist file, or the --pronounceable corpus")
+    parser.add_argument("--format", choices=FORMATS, default="plain", help="output format")
+    parser.add_argument("-o", "--output", help="output file (default: stdout)")
+    parser.add_argument("--audit", metavar="FILE",
+                        help="score every password in FILE (one per line) and print a summary")
+    parser.add_argument("--report", choices=("text", "json"), default="text",
+                        help="summary format for --audit")
+    parser.add_argument("--no-patterns", action="store_true",
+                        help="--audit with character classes only (skip dictionary/pattern checks)")
+    parser.add_argument("--breach-index", metavar="PATH",
+                        help="breach index for --audit (default: $PASSCRAFT_BREACH_INDEX or the "
+                             "cache dir, used when built)")
+    parser.add_argument("--no-breach", action="store_true",
+                        help="--audit without the breached-password check")
+    parser.add_argument("--build-breach-index", metavar="DUMP",
+                        help="compile a SHA1HEX[:COUNT] dump (e.g. Pwned Passwords) into the "
+                             "breach index at -o or the default path")
+    parser.add_argument("--plaintext", action="store_true",
+                        help="--build-breach-index from a list of plain passwords instead")
+    parser.add_argument("--serve", action="store_true",
+                        help="run the generation daemon on a Unix socket (see --socket)")
+    parser.add_argument("--socket", help="daemon socket path (default: $XDG_RUNTIME_DIR/passcraft.sock)")
+    parser.add_argument("--load-profile", metavar="NAME",
+                        help="generate with a profile saved in --config (replaces the "
+                             "length, charset, rule and passphrase options)")
+    parser.add_argument("--save-profile", metavar="NAME",
+                        help="save the generation options as a profile in --config and exit")
+    parser.add_argument("--list-profiles", action="store_true",
+                        help="list the profiles in --config with their entropy")
+    parser.add_argument("--config", default=profiles.CONFIG_FILE,
+                        help="profiles file (default: %(default)s)")
+    parser.add_argument("--unique", action="store_true",
+                        help="guarantee that no item repeats (see --unique-memory, --exclude-vault)")
+    parser.add_argument("--unique-memory", type=int, default=unique.DEFAULT_MEMORY >> 20,
+                        metavar="MB", help="memory for the --unique filter (default %(default)s MB)")
+    parser.add_argument("--exclude-vault", metavar="DB",
+                        help="with --unique, also avoid every password saved in this vault")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="generator processes (0 = one per CPU core)")
+    parser.add_argument("--metrics", metavar="PATH",
+                        help="record timings and write them at exit (JSON for *.json, "
+                             "else Prometheus text; - for stderr)")
+    parser.add_argument("--cprofile", metavar="PATH", help="write a cProfile dump at exit")
+    parser.add_argument("--batch-size", type=int, help=argparse.SUPPRESS)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    metrics.configure(args.metrics, args.cprofile)
+
+    if args.count < 0:
+        parser.error("--count must not be negative")
+    if args.length < 1:
+        parser.error("--length must be at least 1")
+
+    if args.build_breach_index:
+        return run_build_breach_index(args, parser)
+
+    if args.audit:
+        return run_audit(args, parser)
+
+    if args.serve:
+        from . import daemon
+        try:
+            daemon.serve(args.socket, args.wordlist, config=args.config)
+        except (OSError, ValueError) as e:
+            parser.exit(1, f"{parser.prog}: error: {e}\n")
+        return 0
+
+    if args.workers < 0:
+        parser.error("--workers must not be negative")
+
+    try:
+        if args.list_profiles:
+            return list_profiles(args)
+        if args.load_profile:
+            errors = {}
+            found = profiles.load_profiles(args.config, errors)
+            if args.load_profile in errors:
+                parser.error(f"{args.config}: profile {args.load_profile!r}: "
+                             f"{errors[args.load_profile]}")
+            if args.load_profile not in found:
+                parser.error(f"no profile {args.load_profile!r} in {args.config}")
+            profile = found[args.load_profile]
+        else:
+            profile = profile_from_args(args)
+        # Compiled before any output, so an impossible policy is reported first
+        generator = profiles.compile_profile(profile)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.save_profile:
+        try:
+            profiles.save_profile(args.save_profile, profile, args.config)
+        except ValueError as e:
+            parser.error(str(e))
+        except OSError as e:
+            parser.exit(1, f"{parser.prog}: error: {e}\n")
+        print(f"Saved profile {args.save_profile!r} to {args.config} "
+              f"({generator.entropy:.1f} bits)", file=sys.stderr)
+        return 0
+
+    from . import parallel
+    if args.batch_size is None:
+        args.batch_size = parallel.DEFAULT_CHUNK_SIZE
+    job = parallel.profile_job(profile)
+    field = generator.field
+
+    seen = None
+    if args.unique:
+        seen = unique_filter(args, parser, generator)
+    elif args.exclude_vault:
+        parser.error("--exclude-vault needs --unique")
+
+    stream, close = open_output(args.output)
+    try:
+        writer = BatchWriter(stream, args.format, field)
+        parallel.run_bulk(writer, args.count, job,
+                          args.workers or parallel.default_workers(), args.batch_size, seen)
+    except BrokenPipeError:
+        # Output was piped into something like `head`; stop quietly
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 0
+    except ValueError as e:
+        parser.exit(1, f"{parser.prog}: error: {e}\n")
+    finally:
+        if close:
+            stream.close()
+        if seen is not None:
+            seen.close()
+    return 0
+
+
+def profile_from_args(args):
+    return profiles.Profile(
+        kind="passphrase" if args.passphrase else (
+            "pronounceable" if args.pronounceable else "password"),
+        length=args.length, classes=args.charset, keyword=args.keyword,
+        each_class=args.each_class, minimums=tuple(sorted(dict(args.min).items())),
+        maximums=tuple(sorted(dict(args.max).items())), exclude=args.exclude,
+        avoid_ambiguous=args.no_ambiguous, no_repeat=args.no_repeat,
+        words=args.words, separator=args.separator, add_number=not args.no_number,
+        case=args.case, unique_words=args.unique_words, digits=args.add_digits,
+        symbols=args.add_symbols, markov_order=args.markov_order, wordlist=args.wordlist)
+
+
+def list_profiles(args):
+    errors = {}
+    for name, profile in profiles.load_profiles(args.config, errors).items():
+        try:
+            bits = f"{profiles.compile_profile(profile).entropy:6.1f} bits"
+        except ValueError as e:
+            bits = f"invalid: {e}"
+        print(f"{name:<24} {profile.kind:<10} {bits}")
+    for name, error in errors.items():
+        print(f"{name:<24} {'?':<10} invalid: {error}")
+    return 0
+
+
+def unique_filter(args, parser, generator):
+    """The :class:`unique.UniqueFilter` for ``--unique``; reports the collision odds."""
+    space = generator.space
+    try:
+        unique.check_capacity(args.count, generator.capacity)
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"{args.count:,} items from ~2^{generator.entropy:.1f} possible: collision probability "
+          f"{unique.collision_probability(args.count, space):.3g} without --unique",
+          file=sys.stderr)
+    seen = unique.UniqueFilter(capacity=args.count, memory=args.unique_memory << 20)
+    if args.exclude_vault:
+        from .store import PasswordStore
+        store = PasswordStore(args.exclude_vault)
+        try:
+            if store.is_encrypted():
+                parser.error(f"{args.exclude_vault} is encrypted; unlock it in the GUI instead")
+            batch = []
+            for record in store.records():
+                batch.append(record['password'])
+                if len(batch) >= args.batch_size:
+                    seen.update(batch)
+                    batch = []
+            seen.update(batch)
+        finally:
+            store.close()
+    return seen
+
+
+def run_build_breach_index(args, parser):
+    from . import breach
+    path = args.output or breach.default_path()
+    progress = lambda lines: print(f"\r{lines:,} lines read", end="", file=sys.stderr, flush=True)
+    try:
+        records = breach.build_index(args.build_breach_index, path, plaintext=args.plaintext,
+                                     progress=progress)
+    except (OSError, ValueError) as e:
+        parser.exit(1, f"\n{parser.prog}: error: {e}\n")
+    print(f"\n{records:,} hashes written to {path}", file=sys.stderr)
+    return 0
+
+
+def run_audit(args, parser):
+    from . import audit
+    breaches = None
+    if not args.no_breach:
+        from . import breach
+        if args.breach_index:
+            try:
+                breaches = breach.BreachIndex(args.breach_index, preload=True)
+            except (OSError, ValueError) as e:
+                parser.exit(1, f"{parser.prog}: error: {e}\n")
+        else:
+            breaches = breach.default_index()
+    try:
+        summary = audit.audit_file(args.audit, use_patterns=not args.no_patterns,
+                                   breaches=breaches)
+    except (OSError, ValueError) as e:
+        parser.exit(1, f"{parser.prog}: error: {e}\n")
+    report = summary.to_json() if args.report == "json" else summary.format_text()
+    stream, close = open_output(args.output)
+    try:
+        stream.write(report + "\n")
+    finally:
+        if close:
+            stream.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
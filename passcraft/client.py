@@ -0,0 +1,115 @@
+"""Thin client for the generation daemon (see :mod:`passcraft.daemon`).
+
+Keeps one Unix socket open across calls, so each request costs a round trip
+instead of an interpreter start::
+
+    with Client() as client:
+        client.password(length=20)
+        client.passphrase(count=100, words=5)
+        client.batch([{"op": "password"}, {"op": "analyze", "password": "hunter2"}])
+
+Only the standard library is imported.
+"""
+
+import json
+import os
+import socket
+
+from . import cache
+
+
+class DaemonError(RuntimeError):
+    pass
+
+
+def default_socket_path():
+    """``$PASSCRAFT_SOCKET``, else ``$XDG_RUNTIME_DIR/passcraft.sock``, else the cache dir."""
+    path = os.environ.get("PASSCRAFT_SOCKET")
+    if path:
+        return path
+    runtime = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime:
+        return os.path.join(runtime, "passcraft.sock")
+    return cache.cache_path("daemon.sock")
+
+
+class Client:
+    def __init__(self, path=None, timeout=30):
+        self.path = path or default_socket_path()
+        self.timeout = timeout
+        self._sock = None
+        self._file = None
+        self._next_id = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def connect(self):
+        if self._sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.path)
+            except OSError:
+                sock.close()
+                raise
+            self._sock = sock
+            self._file = sock.makefile("rwb")
+        return self
+
+    def close(self):
+        if self._sock is not None:
+            self._file.close()
+            self._sock.close()
+            self._sock = self._file = None
+
+    def _roundtrip(self, message):
+        line = json.dumps(message, separators=(",", ":")).encode("utf-8") + b"\n"
+        # A daemon restart drops the connection; reconnect once and resend
+        for attempt in (0, 1):
+            self.connect()
+            try:
+                self._file.write(line)
+                self._file.flush()
+                reply = self._file.readline()
+                if reply:
+                    return json.loads(reply)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            self.close()
+        raise DaemonError("connection closed by the daemon")
+
+    @staticmethod
+    def _unwrap(response):
+        if "error" in response:
+            raise DaemonError(response["error"])
+        return response["result"]
+
+    def call(self, op, **params):
+        self._next_id += 1
+        return self._unwrap(self._roundtrip(dict(params, op=op, id=self._next_id)))
+
+    def batch(self, requests):
+        """Send several requests in one message; returns their results in order.
+
+        A failed request yields a :class:`DaemonError` instance in its slot
+        instead of raising, so one bad entry does not discard the rest.
+        """
+        responses = self._roundtrip(list(requests))
+        if isinstance(responses, dict):  # the whole batch was rejected
+            raise DaemonError(responses.get("error", "invalid response"))
+        return [DaemonError(r["error"]) if "error" in r else r["result"] for r in responses]
+
+    def password(self, **params):
+        return self.call("password", **params)
+
+    def passphrase(self, **params):
+        return self.call("passphrase", **params)
+
+    def analyze(self, password=None, passwords=None, **params):
+        if passwords is not None:
+            return self.call("analyze", passwords=list(passwords), **params)
+        return self.call("analyze", password=password, **params)
@@ -0,0 +1,314 @@
+"""Long-lived generation daemon on a Unix domain socket.
+
+Started with ``gen.py --serve``. The wordlist and pattern dictionary are
+loaded once, so a request costs a socket round trip rather than an
+interpreter start. The protocol is newline-delimited JSON; each line is one
+request object or an array of them (a batch, answered by one array)::
+
+    {"id": 1, "op": "password", "length": 20, "charset": "upper,lower,digits"}
+    {"id": 1, "result": "..."}
+
+Operations:
+
+* ``password``: ``length``, ``charset`` (names, comma-separated or a list),
+  ``keyword``;
+* ``passphrase``: ``words``, ``separator``, ``add_number``, ``case``,
+  ``unique_words``, ``digits``, ``symbols`` (see :mod:`passcraft.passphrase`);
+* ``pronounceable``: ``length``, ``order``, ``keyword``, from the letter
+  n-gram model of the wordlist (see :mod:`passcraft.markov`);
+* ``profile``: ``name``, a profile from ``config.json`` (read at startup,
+  see :mod:`passcraft.profiles`);
+* ``analyze``: ``password`` or ``passwords`` (a list), ``patterns``; results
+  include ``breaches``, the password's count in the local breach index
+  (0 when not found or no index was built, see :mod:`passcraft.breach`);
+* ``ping``;
+* ``metrics``: the :func:`passcraft.metrics.snapshot` (empty unless enabled).
+
+``password``, ``passphrase``, ``pronounceable`` and ``profile`` take an
+optional ``count`` and then return a list. Failures come back as ``{"id": ..., "error": "..."}``. Requests on one
+connection may be pipelined and are answered in order.
+
+Limits: ``max_connections`` concurrent clients (extra ones get an error and
+are closed), ``max_items`` items per line (counts and analyzed passwords,
+summed over a batch), ``MAX_LINE`` bytes per line and
+``MAX_ANALYZE_LENGTH`` characters per analyzed password. A client that stops
+reading its responses stops being read from once its output buffer is full.
+"""
+
+import asyncio
+import json
+import os
+import signal
+import stat
+import sys
+import traceback
+
+from . import analysis, breach, engine, markov, metrics, passphrase, patterns, profiles, rng
+from .client import default_socket_path
+
+MAX_CONNECTIONS = 64
+MAX_ITEMS = 100_000
+MAX_LINE = 1 << 20
+# Longer passwords would hold up every client while they are analyzed
+MAX_ANALYZE_LENGTH = 1024
+# Wait for the client to drain its responses beyond this many buffered bytes
+HIGH_WATER = 1 << 18
+# Requests served back to back on one connection before yielding to others
+YIELD_EVERY = 64
+
+
+class RequestError(ValueError):
+    pass
+
+
+def _charset(spec):
+    names = spec.split(",") if isinstance(spec, str) else spec
+    if not isinstance(names, list):
+        raise RequestError("charset must be a string or a list of names")
+    names = [str(name).strip() for name in names if str(name).strip()]
+    unknown = [name for name in names if name not in engine.CHARSETS]
+    if unknown:
+        raise RequestError(f"unknown charset {', '.join(unknown)}")
+    return "".join(engine.CHARSETS[name] for name in engine.CHARSETS if name in names)
+
+
+def _int(request, key, default, low, high):
+    value = request.get(key, default)
+    if not isinstance(value, int) or isinstance(value, bool) or not low <= value <= high:
+        raise RequestError(f"{key} must be an integer between {low} and {high}")
+    return value
+
+
+def _item_count(request):
+    """Work units a request asks for, checked against ``max_items`` up front."""
+    if not isinstance(request, dict):
+        return 0
+    if request.get("op") == "analyze":
+        passwords = request.get("passwords")
+        return len(passwords) if isinstance(passwords, list) else 1
+    count = request.get("count", 1)
+    return count if isinstance(count, int) and count > 0 else 1
+
+
+class Daemon:
+    def __init__(self, path=None, wordlist=engine.WORDLIST_FILE,
+                 max_connections=MAX_CONNECTIONS, max_items=MAX_ITEMS,
+                 config=profiles.CONFIG_FILE):
+        self.path = path or default_socket_path()
+        self.wordlist_file = wordlist
+        self.wordlist = engine.load_wordlist(wordlist)
+        errors = {}
+        self.profiles = profiles.load_profiles(config, errors)
+        for name, error in errors.items():
+            print(f"{config}: skipping profile {name!r}: {error}", file=sys.stderr)
+        self.breaches = breach.default_index()
+        self.max_connections = max_connections
+        self.max_items = max_items
+        self.connections = 0
+        self.handlers = {
+            "password": self.op_password,
+            "passphrase": self.op_passphrase,
+            "pronounceable": self.op_pronounceable,
+            "profile": self.op_profile,
+            "analyze": self.op_analyze,
+            "ping": lambda request: "pong",
+            "metrics": lambda request: metrics.snapshot(),
+        }
+
+    # -- operations ---------------------------------------------------------
+
+    def op_password(self, request):
+        count = _int(request, "count", 1, 1, self.max_items)
+        length = _int(request, "length", 16, 1, 4096)
+        charset = _charset(request.get("charset", "upper,lower,digits"))
+        keyword = request.get("keyword", "")
+        if not isinstance(keyword, str) or len(keyword) > length:
+            raise RequestError("keyword must be a string no longer than the password")
+        try:
+            passwords = engine.generate_passwords(count, length, charset, keyword)
+        except ValueError as e:
+            raise RequestError(str(e)) from None
+        return passwords if "count" in request else passwords[0]
+
+    def op_passphrase(self, request):
+        count = _int(request, "count", 1, 1, self.max_items)
+        words = _int(request, "words", 4, 1, 64)
+        separator = request.get("separator", "-")
+        if not isinstance(separator, str):
+            raise RequestError("separator must be a string")
+        case = request.get("case", "capitalize")
+        if case not in passphrase.CASES:
+            raise RequestError(f"case must be one of {', '.join(passphrase.CASES)}")
+        try:
+            phrases = engine.generate_passphrases(
+                count, self.wordlist, words, separator, bool(request.get("add_number", True)),
+                case, bool(request.get("unique_words", False)),
+                _int(request, "digits", 0, 0, 16), _int(request, "symbols", 0, 0, 16))
+        except ValueError as e:
+            raise RequestError(str(e)) from None
+        return phrases if "count" in request else phrases[0]
+
+    def op_pronounceable(self, request):
+        count = _int(request, "count", 1, 1, self.max_items)
+        length = _int(request, "length", 16, 1, 4096)
+        order = request.get("order", markov.DEFAULT_ORDER)
+        if order not in markov.ORDERS:
+            raise RequestError(f"order must be one of {', '.join(map(str, markov.ORDERS))}")
+        keyword = request.get("keyword", "")
+        if not isinstance(keyword, str) or len(keyword) > length:
+            raise RequestError("keyword must be a string no longer than the password")
+        profile = profiles.Profile(kind="pronounceable", length=length, keyword=keyword,
+                                   markov_order=order, wordlist=self.wordlist_file)
+        try:
+            passwords = profiles.compile_profile(profile).generate(count)
+        except ValueError as e:
+            raise RequestError(str(e)) from None
+        return passwords if "count" in request else passwords[0]
+
+    def op_profile(self, request):
+        count = _int(request, "count", 1, 1, self.max_items)
+        profile = self.profiles.get(request.get("name"))
+        if profile is None:
+            raise RequestError(f"unknown profile {request.get('name')!r}")
+        try:
+            items = profiles.compile_profile(profile).generate(count)
+        except ValueError as e:
+            raise RequestError(str(e)) from None
+        return items if "count" in request else items[0]
+
+    def op_analyze(self, request):
+        use_patterns = bool(request.get("patterns", True))
+        passwords = request.get("passwords")
+        single = passwords is None
+        if single:
+            passwords = [request.get("password")]
+        if not isinstance(passwords, list) or not all(isinstance(p, str) for p in passwords):
+            raise RequestError("password must be a string (or passwords a list of strings)")
+        if not all(0 < len(p) <= MAX_ANALYZE_LENGTH for p in passwords):
+            raise RequestError(f"passwords must be 1 to {MAX_ANALYZE_LENGTH} characters long")
+        results = []
+        for password in passwords:
+            result = analysis.analyze(password, use_patterns=use_patterns, breaches=self.breaches)
+            results.append({"entropy": round(result.entropy, 2), "score": result.score,
+                            "strength": result.strength, "crack_time": result.crack_time,
+                            "breaches": result.breaches})
+        return results[0] if single else results
+
+    def handle(self, request):
+        """Answer one decoded request object."""
+        if not isinstance(request, dict):
+            return {"error": "request must be a JSON object"}
+        response = {"id": request["id"]} if "id" in request else {}
+        op = request.get("op")
+        handler = self.handlers.get(op)
+        if handler is None:
+            response["error"] = f"unknown op {op!r}"
+            return response
+        try:
+            with metrics.timer(f"daemon.{op}"):
+                response["result"] = handler(request)
+        except RequestError as e:
+            metrics.count("daemon.errors")
+            response["error"] = str(e)
+        except Exception as e:  # a bug in one request must not drop the connection
+            metrics.count("daemon.errors")
+            traceback.print_exc()
+            response["error"] = f"internal error ({type(e).__name__})"
+        return response
+
+    def handle_line(self, line):
+        try:
+            message = json.loads(line)
+        except ValueError:
+            return {"error": "invalid JSON"}
+        requests = message if isinstance(message, list) else [message]
+        if sum(_item_count(r) for r in requests) > self.max_items:
+            return {"error": f"too many items in one message (limit {self.max_items})"}
+        if isinstance(message, list):
+            return [self.handle(request) for request in message]
+        return self.handle(message)
+
+    # -- server -------------------------------------------------------------
+
+    async def _client(self, reader, writer):
+        if self.connections >= self.max_connections:
+            writer.write(b'{"error":"too many connections"}\n')
+            writer.close()
+            return
+        self.connections += 1
+        handled = 0
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:  # line longer than MAX_LINE
+                    writer.write(b'{"error":"request too large"}\n')
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                response = self.handle_line(line)
+                writer.write(json.dumps(response, separators=(",", ":")).encode("utf-8") + b"\n")
+                # Pipelined requests are already buffered, so readline()
+                # returns without a context switch; only wait on the client
+                # when it falls behind reading responses
+                if writer.transport.get_write_buffer_size() > HIGH_WATER:
+                    await writer.drain()
+                handled += 1
+                if handled % YIELD_EVERY == 0:
+                    await asyncio.sleep(0)  # let other connections in
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    def _remove_stale_socket(self):
+        try:
+            if not stat.S_ISSOCK(os.stat(self.path).st_mode):
+                raise OSError(f"{self.path} exists and is not a socket")
+        except FileNotFoundError:
+            return
+        try:
+            from .client import Client
+            Client(self.path, timeout=1).connect().close()
+        except OSError:
+            os.unlink(self.path)  # left over from a daemon that did not exit cleanly
+            return
+        raise OSError(f"a daemon is already listening on {self.path}")
+
+    async def serve(self, ready=None):
+        self._remove_stale_socket()
+        patterns.default_estimator()  # load the dictionary before accepting
+        umask = os.umask(0o077)  # the socket is only usable by its owner
+        try:
+            server = await asyncio.start_unix_server(self._client, self.path, limit=MAX_LINE)
+        finally:
+            os.umask(umask)
+        stop = asyncio.get_running_loop().create_future()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            asyncio.get_running_loop().add_signal_handler(signum, _set_once, stop)
+        if ready is not None:
+            ready(self.path)
+        try:
+            async with server:
+                await stop
+        finally:
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+
+
+def _set_once(future):
+    if not future.done():
+        future.set_result(None)
+
+def serve(path=None, wordlist=engine.WORDLIST_FILE, **limits):
+    """Run a daemon until SIGINT or SIGTERM; the socket is removed on exit."""
+    rng.use_pool_from_env()
+    daemon = Daemon(path, wordlist, **limits)
+    asyncio.run(daemon.serve(ready=lambda p: print(f"PassCraft daemon listening on {p}",
+                                                   flush=True)))
@@ -0,0 +1,123 @@
+"""Password and passphrase generation, independent of any UI."""
+
+import os
+
+from . import metrics, rng
+
+WORDLIST_FILE = "wordlist.txt"
+
+# Character classes, in the order the GUI checkboxes are laid out
+CHARSETS = {
+    "upper": "ABCDEFGHIJKLMNOPQRSTUVWXYZ",
+    "lower": "abcdefghijklmnopqrstuvwxyz",
+    "digits": "0123456789",
+    "symbols": "!@#$%^&*",
+}
+
+DEFAULT_WORDS = [
+    "apple", "banana", "cherry", "dragon", "elephant", "falcon",
+    "giraffe", "hunter", "island", "jungle", "knight", "lizard",
+    "mountain", "ninja", "octopus", "penguin", "queen", "rocket",
+    "sunset", "tiger", "unicorn", "viking", "wizard", "xylophone",
+    "yacht", "zebra"
+]
+
+
+def build_charset(upper=True, lower=True, digits=True, symbols=False):
+    charset = ""
+    if upper: charset += CHARSETS["upper"]
+    if lower: charset += CHARSETS["lower"]
+    if digits: charset += CHARSETS["digits"]
+    if symbols: charset += CHARSETS["symbols"]
+    return charset
+
+
+def load_wordlist(path=WORDLIST_FILE):
+    """Return the words in ``path`` as an indexable sequence.
+
+    Existing files are served from a memory-mapped compiled copy (see
+    :mod:`passcraft.wordlist`); the built-in words are used otherwise.
+    """
+    from .wordlist import open_wordlist
+
+    try:
+        if os.path.exists(path):
+            words = open_wordlist(path)
+            if len(words):
+                return words
+        return list(DEFAULT_WORDS)
+    except (OSError, ValueError):
+        return list(DEFAULT_WORDS)
+
+
+def generate_password(length, charset, keyword=""):
+    if not charset:
+        raise ValueError("Please select at least one character set!")
+
+    return generate_passwords(1, length, charset, keyword)[0]
+
+
+@metrics.timed("generate.passwords")
+def generate_passwords(count, length, charset, keyword=""):
+    """Generate ``count`` passwords from one batched draw of randomness."""
+    if not charset:
+        raise ValueError("Please select at least one character set!")
+
+    # Random part first, then the keyword inserted at a random position
+    metrics.count("generate.passwords.items", count)
+    random_len = max(0, length - len(keyword))
+    return insert_keyword(rng.random_strings(count, random_len, charset), keyword)
+
+
+def generate_policy_passwords(count, length, policy, keyword=""):
+    """Like :func:`generate_passwords`, from a :class:`passcraft.policy.Policy`.
+
+    The policy applies to the random characters; the keyword is kept as is.
+    """
+    from .policy import sampler
+
+    random_len = max(0, length - len(keyword))
+    return insert_keyword(sampler(policy, random_len).generate(count), keyword)
+
+
+def insert_keyword(parts, keyword):
+    """Put ``keyword`` at an independent uniformly random position of each part."""
+    if not keyword:
+        return parts
+    random_len = len(parts[0]) if parts else 0
+    positions = rng.random_indices(len(parts), random_len + 1)
+    return [part[:pos] + keyword + part[pos:] for part, pos in zip(parts, positions)]
+
+
+def generate_passphrase(wordlist, words=4, separator="-", add_number=True, **options):
+    return generate_passphrases(1, wordlist, words, separator, add_number, **options)[0]
+
+
+@metrics.timed("generate.passphrases")
+def generate_passphrases(count, wordlist, words=4, separator="-", add_number=True,
+                         case="capitalize", unique_words=False, digits=0, symbols=0):
+    """Generate ``count`` passphrases from one batched draw of randomness.
+
+    See :class:`passcraft.passphrase.Style` for the options.
+    """
+    from .passphrase import Sampler, Style
+
+    metrics.count("generate.passphrases.items", count)
+    style = Style(words, separator, add_number, case, unique_words, digits, symbols)
+    return Sampler(wordlist, style).generate(count)
+
+
+def iter_passwords(count, length, charset, keyword="", batch_size=1024):
+    """Yield lists of at most ``batch_size`` passwords until ``count`` are made."""
+    while count > 0:
+        n = min(batch_size, count)
+        yield generate_passwords(n, length, charset, keyword)
+        count -= n
+
+
+def iter_passphrases(count, wordlist, words=4, separator="-", add_number=True,
+                     batch_size=1024, **options):
+    while count > 0:
+        n = min(batch_size, count)
+        yield generate_passphrases(n, wordlist, words, separator, add_number, **options)
+        count -= n
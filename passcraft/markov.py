@@ -0,0 +1,357 @@
+"""Pronounceable passwords from a character n-gram model.
+
+:func:`train` counts, for every context of ``order - 1`` letters (padded
+with a start marker at the beginning of a word), how often each letter
+``a``-``z`` follows it in a corpus, one word per line (``wordlist.txt`` or
+anything larger). Contexts that never occur, or only at the end of a word,
+back off to the counts of their shorter suffix. Each row of counts is then
+quantized to integer weights summing to exactly ``2**32``; every letter
+keeps a weight of at least 1, so a letter never seen after a context still
+has a ``2**-32`` chance. A row is stored as the inclusive upper bounds
+``cumulative - 1`` of its 26 letters, which fit in uint32, padded to 32
+entries with ``2**32 - 1``::
+
+    header   magic, order, row width, source fingerprint
+    table    (27 ** (order - 1)) * 32 uint32 bounds
+
+:func:`load_model` compiles the table into the cache directory once and
+memory-maps it afterwards; it is rebuilt when the corpus changes.
+
+A password is drawn left to right: per character, one uniform 32-bit value
+``u`` and one binary search for the first bound ``>= u`` in the row of the
+current context. Since the weights sum to exactly ``2**32`` no value is
+ever rejected. A batch reads all its random values from one buffer
+(``count * length`` uint32s) and runs the searches a column at a time with
+NumPy, as five branch-free halving steps over the padded rows. Cutting a
+password short leaves a correctly distributed shorter one.
+
+The quantized table *is* the model, so probabilities are exact:
+:meth:`Model.bits` gives the information content of one password,
+:meth:`Model.entropy` the Shannon entropy of all passwords of a length, and
+:meth:`Model.collision_space` the number of equally likely passwords with
+the same chance of a repeat, for :mod:`passcraft.unique`.
+"""
+
+import math
+import mmap
+import os
+import re
+import struct
+from array import array
+from bisect import bisect_left
+from collections import Counter
+
+from . import cache, engine, metrics, rng
+
+ALPHABET = "abcdefghijklmnopqrstuvwxyz"
+ORDERS = (2, 3, 4)
+DEFAULT_ORDER = 3
+# Smallest batch worth generating with NumPy
+NUMPY_MIN_COUNT = 256
+# Passwords generated per NumPy block, bounding the memory of huge batches
+BLOCK = 1 << 14
+
+_START = "^"
+_SYMBOLS = len(ALPHABET) + 1  # the letters and the start marker
+_ONE = 1 << 32
+_WIDTH = 32  # table entries per row, the 26 letters padded to a power of two
+_MAGIC = b"PCMARKV1"
+_HEADER = struct.Struct("=8sII64s")
+_CODES = bytes.maketrans((_START + ALPHABET).encode(), bytes(range(_SYMBOLS)))
+_NOT_LETTERS = re.compile(r"[^a-z\n]+")
+_BREAKS = re.compile(r"\n+")
+
+
+def _check_order(order):
+    if order not in ORDERS:
+        raise ValueError(f"order must be one of {', '.join(map(str, ORDERS))}")
+
+
+def _stream(text, order):
+    """Symbol codes of ``text``, each word preceded by ``order - 1`` start markers."""
+    pad = _START * (order - 1)
+    words = _BREAKS.sub(pad, _NOT_LETTERS.sub("", text.lower()).strip("\n"))
+    return (pad + words).encode("ascii").translate(_CODES)
+
+
+def _count(codes, order):
+    """Flat ``rows * 26`` list of letter counts per context."""
+    rows = _SYMBOLS ** (order - 1)
+    np = rng.numpy()
+    if np is not None:
+        data = np.frombuffer(codes, dtype=np.uint8).astype(np.int64)
+        n = len(data) - order + 1
+        if n <= 0:
+            return [0] * (rows * len(ALPHABET))
+        context = np.zeros(n, dtype=np.int64)
+        for i in range(order - 1):
+            context = context * _SYMBOLS + data[i:i + n]
+        letter = data[order - 1:]
+        keep = letter > 0
+        cells = context[keep] * len(ALPHABET) + letter[keep] - 1
+        return np.bincount(cells, minlength=rows * len(ALPHABET)).tolist()
+    counts = [0] * (rows * len(ALPHABET))
+    for gram, n in Counter(zip(*(codes[i:] for i in range(order)))).items():
+        if gram[-1]:
+            context = 0
+            for symbol in gram[:-1]:
+                context = context * _SYMBOLS + symbol
+            counts[context * len(ALPHABET) + gram[-1] - 1] += n
+    return counts
+
+
+def _back_off(counts, rows):
+    """Give every context without counts those of its suffix one shorter."""
+    a = len(ALPHABET)
+    if rows == 1:
+        return counts if any(counts) else [1] * a
+    lower_rows = rows // _SYMBOLS
+    lower = [0] * (lower_rows * a)
+    for context in range(rows):
+        base = (context % lower_rows) * a
+        for j in range(a):
+            lower[base + j] += counts[context * a + j]
+    lower = _back_off(lower, lower_rows)
+    for context in range(rows):
+        if not any(counts[context * a:(context + 1) * a]):
+            base = (context % lower_rows) * a
+            counts[context * a:(context + 1) * a] = lower[base:base + a]
+    return counts
+
+
+def _quantize(counts, rows):
+    """The table: each row's weights scaled to sum to exactly ``2**32``."""
+    a = len(ALPHABET)
+    table = array("I")
+    for context in range(rows):
+        row = counts[context * a:(context + 1) * a]
+        total = sum(row)
+        weights = [max(1, c * _ONE // total) for c in row]
+        # Rounding error goes to the most likely letter
+        weights[row.index(max(row))] += _ONE - sum(weights)
+        cumulative = 0
+        for w in weights:
+            cumulative += w
+            table.append(cumulative - 1)
+        table.extend([_ONE - 1] * (_WIDTH - a))
+    return table
+
+
+@metrics.timed("markov.train")
+def train(text, order=DEFAULT_ORDER):
+    """The quantized table of ``text`` (one word per line) as an ``array``."""
+    _check_order(order)
+    rows = _SYMBOLS ** (order - 1)
+    counts = _back_off(_count(_stream(text, order), order), rows)
+    return _quantize(counts, rows)
+
+
+class Model:
+    """An n-gram table, in memory or memory-mapped; see :func:`load_model`."""
+
+    def __init__(self, table, order, source=None, mapped=None):
+        self.order = order
+        self.source = source
+        self.rows = _SYMBOLS ** (order - 1)
+        self.table = table  # sequence of uint32 bounds, rows * _WIDTH
+        if len(table) != self.rows * _WIDTH:
+            raise ValueError("model table does not match its order")
+        self._arrays = None
+        self._entropy = {}
+        self._mapped = mapped
+
+    def _next(self, context, letter):
+        return (context * _SYMBOLS + letter + 1) % self.rows
+
+    def probability(self, context, letter):
+        lo = context * _WIDTH
+        below = self.table[lo + letter - 1] + 1 if letter else 0
+        return (self.table[lo + letter] + 1 - below) / _ONE
+
+    def bits(self, password):
+        """Information content of ``password`` under the model (``inf`` for
+        characters outside :data:`ALPHABET`)."""
+        bits = 0.0
+        context = 0
+        for c in password:
+            letter = ALPHABET.find(c)
+            p = self.probability(context, letter) if letter >= 0 else 0
+            if not p:
+                return math.inf
+            bits -= math.log2(p)
+            context = self._next(context, letter)
+        return bits
+
+    def _flows(self, length, power):
+        """Yield, per position, the mass of each context raised through ``power``."""
+        a = len(ALPHABET)
+        np = rng.numpy()
+        if np is not None:
+            bounds = np.asarray(self.table, dtype=np.int64).reshape(self.rows, _WIDTH)[:, :a]
+            p = np.diff(bounds + 1, axis=1, prepend=0) / float(_ONE)
+            targets = (np.arange(self.rows)[:, None] * _SYMBOLS + np.arange(1, a + 1)) % self.rows
+            mass = np.zeros(self.rows)
+            mass[0] = 1.0
+            for _ in range(length):
+                yield mass, p
+                mass = np.bincount(targets.ravel(), weights=(mass[:, None] * p ** power).ravel(),
+                                   minlength=self.rows)
+            yield mass, p
+            return
+        probs = [[self.probability(context, j) for j in range(a)] for context in range(self.rows)]
+        mass = {0: 1.0}
+        for _ in range(length):
+            yield mass, probs
+            following = {}
+            for context, m in mass.items():
+                for j, q in enumerate(probs[context]):
+                    if q:
+                        nxt = self._next(context, j)
+                        following[nxt] = following.get(nxt, 0.0) + m * q ** power
+            mass = following
+        yield mass, probs
+
+    def entropy(self, length):
+        """Shannon entropy in bits of the ``length``-letter passwords."""
+        if length not in self._entropy:
+            total = 0.0
+            flows = list(self._flows(length, 1))[:-1]
+            for mass, p in flows:
+                if isinstance(mass, dict):
+                    total += sum(m * -sum(q * math.log2(q) for q in p[c] if q)
+                                 for c, m in mass.items())
+                else:
+                    np = rng.numpy()
+                    logs = np.log2(np.where(p > 0, p, 1.0))
+                    total += float(mass @ -(p * logs).sum(axis=1))
+            self._entropy[length] = total
+        return self._entropy[length]
+
+    def collision_space(self, length):
+        """``1 / sum(p**2)`` over the ``length``-letter passwords: two draws are
+        equal as often as from that many equally likely passwords."""
+        *_, (mass, _) = self._flows(length, 2)
+        total = sum(mass.values()) if isinstance(mass, dict) else float(mass.sum())
+        return max(1, int(1 / total))
+
+    def support(self, length):
+        """Number of ``length``-letter passwords that can come out: every
+        letter keeps a nonzero weight, so all of them."""
+        return len(ALPHABET) ** length
+
+    def generate(self, count, length):
+        """``count`` passwords of ``length`` letters."""
+        if count <= 0:
+            return []
+        if length <= 0:
+            return [""] * count
+        np = rng.numpy() if count >= NUMPY_MIN_COUNT else None
+        if np is not None:
+            out = []
+            for done in range(0, count, BLOCK):
+                out += self._generate_numpy(np, min(BLOCK, count - done), length)
+            return out
+        table = self.table
+        a = len(ALPHABET)
+        draws = iter(rng.random_indices(count * length, _ONE))
+        out = []
+        for _ in range(count):
+            context = 0
+            letters = []
+            for _ in range(length):
+                lo = context * _WIDTH
+                letter = bisect_left(table, next(draws), lo, lo + a) - lo
+                letters.append(ALPHABET[letter])
+                context = (context * _SYMBOLS + letter + 1) % self.rows
+            out.append("".join(letters))
+        return out
+
+    def _generate_numpy(self, np, count, length):
+        if self._arrays is None:
+            # Start of the row each (row, letter) cell leads to
+            following = (np.arange(self.rows)[:, None] * _SYMBOLS
+                         + np.arange(1, _WIDTH + 1)) % self.rows * _WIDTH
+            self._arrays = (np.frombuffer(self.table, dtype=np.uint32),
+                            following.astype(np.int32).ravel())
+        table, following = self._arrays
+        draws = rng.random_uint32_array(count * length)
+        letters = np.empty((length, count), dtype=np.uint8)
+        start = np.zeros(count, dtype=np.int32)
+        pos = np.empty_like(start)
+        probe = np.empty_like(start)
+        bounds = np.empty(count, dtype=np.uint32)
+        below = np.empty(count, dtype=bool)
+        for t in range(length):
+            u = draws[t * count:(t + 1) * count]
+            # Count the bounds below u in each row, halving the range each step
+            pos[:] = start
+            step = _WIDTH // 2
+            while step:
+                np.add(pos, step - 1, out=probe)
+                np.take(table, probe, out=bounds)
+                np.less(bounds, u, out=below)
+                pos += below * np.int32(step) if step > 1 else below
+                step //= 2
+            np.subtract(pos, start, out=probe)
+            letters[t] = probe
+            np.take(following, pos, out=start)
+        codes = np.frombuffer(ALPHABET.encode("ascii"), dtype=np.uint8)[letters.T]
+        blob = codes.tobytes().decode("ascii")
+        return [blob[i:i + length] for i in range(0, len(blob), length)]
+
+    def close(self):
+        if self._mapped is not None:
+            self._arrays = None
+            self.table.release()
+            self._mapped.close()
+
+
+def compiled_path(source, order=DEFAULT_ORDER):
+    return cache.cache_path(f"markov-{order}-{cache.cache_key(os.path.abspath(source))}.bin")
+
+
+def compile_model(source, order=DEFAULT_ORDER, target=None):
+    """Train on ``source`` and write the table; returns the compiled path."""
+    target = target or compiled_path(source, order)
+    fingerprint = cache.cache_key(cache.file_fingerprint(source)).encode()
+    with open(source, encoding="utf-8", errors="replace") as f:
+        table = train(f.read(), order)
+    cache.atomic_write(target, [_HEADER.pack(_MAGIC, order, _WIDTH, fingerprint),
+                                table.tobytes()])
+    return target
+
+
+def _open(path, order, fingerprint):
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, stored_order, width, stored = _HEADER.unpack_from(mm)
+    if (magic != _MAGIC or stored_order != order or width != _WIDTH
+            or stored.rstrip(b"\0") != fingerprint):
+        mm.close()
+        return None
+    try:
+        return Model(memoryview(mm)[_HEADER.size:].cast("I"), order, path, mm)
+    except (TypeError, ValueError):
+        mm.close()
+        return None
+
+
+@metrics.timed("markov.load")
+def load_model(source=engine.WORDLIST_FILE, order=DEFAULT_ORDER):
+    """The model of ``source``, compiled on first use; the built-in words
+    when ``source`` does not exist."""
+    _check_order(order)
+    if not os.path.exists(source):
+        return Model(train("\n".join(engine.DEFAULT_WORDS), order), order)
+    target = compiled_path(source, order)
+    fingerprint = cache.cache_key(cache.file_fingerprint(source)).encode()
+    try:
+        model = _open(target, order, fingerprint)
+        if model is not None:
+            return model
+    except (OSError, ValueError):
+        pass
+    model = _open(compile_model(source, order, target), order, fingerprint)
+    if model is None:
+        raise ValueError(f"could not compile a model of {source}")
+    return model
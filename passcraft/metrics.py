@@ -0,0 +1,226 @@
+"""Opt-in timing instrumentation: counters, latency histograms and profiling.
+
+Hot paths are wrapped with :func:`timed` or :func:`timer`. While metrics are
+disabled (the default) a wrapped call costs one global flag check, so the
+hooks can stay in place permanently. Enable them with::
+
+    PASSCRAFT_METRICS=metrics.json    gen.py ...   # or --metrics PATH on the CLI
+    PASSCRAFT_PROFILE=run.prof        gen.py ...   # or --cprofile PATH
+
+and the collected data is written when the process exits: JSON for ``.json``
+paths, Prometheus text exposition format otherwise (``-`` means stderr).
+The profile is a regular ``cProfile`` dump for ``pstats`` or snakeviz.
+
+Histograms use fixed power-of-two buckets from 1 us to ~17 s, so recording
+is a ``bisect`` and memory is constant. Percentiles in the JSON dump are
+estimated from the buckets (upper bound of the bucket holding the rank).
+Metrics are per process; bulk-generation worker processes are not merged.
+"""
+
+import atexit
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+
+# Upper bucket bounds in seconds: 1 us * 2**i
+BUCKETS = tuple(1e-6 * (1 << i) for i in range(25))
+
+_enabled = False
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+
+
+class _Histogram:
+    __slots__ = ("counts", "total", "sum", "min", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # last slot is +Inf
+        self.total = 0
+        self.sum = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.total += 1
+        self.sum += seconds
+        if seconds < self.min: self.min = seconds
+        if seconds > self.max: self.max = seconds
+
+    def quantile(self, q):
+        rank = q * self.total
+        seen = 0
+        for bound, count in zip(BUCKETS + (self.max,), self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def as_dict(self):
+        return {
+            "count": self.total,
+            "sum": self.sum,
+            "min": self.min if self.total else 0.0,
+            "max": self.max,
+            "mean": self.sum / self.total if self.total else 0.0,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+        }
+
+
+def enable(flag=True):
+    global _enabled
+    _enabled = flag
+
+
+def enabled():
+    return _enabled
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+def count(name, n=1):
+    if _enabled:
+        with _lock:
+            _counters[name] = _counters.get(name, 0) + n
+
+
+def observe(name, seconds):
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = _Histogram()
+        histogram.observe(seconds)
+
+
+class _Timer:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def timer(name):
+    """``with timer("store.commit"): ...`` records the block's duration."""
+    return _Timer(name) if _enabled else _NULL_TIMER
+
+
+def timed(name):
+    """Decorator recording every call's duration under ``name``."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                observe(name, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+# -- export -----------------------------------------------------------------
+
+def snapshot():
+    with _lock:
+        return {
+            "counters": dict(sorted(_counters.items())),
+            "histograms": {name: h.as_dict() for name, h in sorted(_histograms.items())},
+        }
+
+
+def to_json():
+    return json.dumps(snapshot(), indent=2)
+
+
+def _metric_name(name):
+    return "passcraft_" + "".join(c if c.isalnum() else "_" for c in name)
+
+
+def to_prometheus():
+    lines = []
+    with _lock:
+        for name, value in sorted(_counters.items()):
+            metric = _metric_name(name) + "_total"
+            lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+        for name, h in sorted(_histograms.items()):
+            metric = _metric_name(name) + "_seconds"
+            lines.append(f"# TYPE {metric} histogram")
+            cumulative = 0
+            for bound, count in zip(BUCKETS, h.counts):
+                cumulative += count
+                lines.append(f'{metric}_bucket{{le="{bound:.6g}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{le="+Inf"}} {h.total}')
+            lines.append(f"{metric}_sum {h.sum:.9f}")
+            lines.append(f"{metric}_count {h.total}")
+    return "\n".join(lines) + "\n"
+
+
+def dump(path):
+    """Write the metrics to ``path`` (``-`` for stderr); JSON for ``*.json``."""
+    text = to_json() + "\n" if path.endswith(".json") else to_prometheus()
+    if path == "-":
+        sys.stderr.write(text)
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+# -- activation -------------------------------------------------------------
+
+def start_profile(path):
+    """Profile the rest of the process with cProfile; stats go to ``path`` at exit."""
+    import cProfile
+    profiler = cProfile.Profile()
+    profiler.enable()
+
+    def save():
+        profiler.disable()
+        profiler.dump_stats(path)
+
+    atexit.register(save)
+    return profiler
+
+
+def configure(metrics_path=None, profile_path=None):
+    """Enable metrics (dumped at exit) and/or profiling from paths, env as fallback."""
+    metrics_path = metrics_path or os.environ.get("PASSCRAFT_METRICS")
+    profile_path = profile_path or os.environ.get("PASSCRAFT_PROFILE")
+    if metrics_path and not _enabled:
+        enable()
+        atexit.register(dump, metrics_path)
+    if profile_path:
+        start_profile(profile_path)
@@ -0,0 +1,66 @@
+"""Streaming writers for bulk output (plain text, JSON lines, CSV)."""
+
+import csv
+import io
+import json
+import os
+import sys
+
+FORMATS = ("plain", "jsonl", "csv")
+
+
+def format_batch(items, fmt="plain", field="password"):
+    """Render a batch of generated strings as one block of text."""
+    if not items:
+        return ""
+    if fmt == "plain":
+        return "\n".join(items) + "\n"
+    if fmt == "jsonl":
+        key = json.dumps(field)
+        return "".join(f"{{{key}: {json.dumps(item)}}}\n" for item in items)
+    buf = io.StringIO()
+    csv.writer(buf, lineterminator="\n").writerows([item] for item in items)
+    return buf.getvalue()
+
+
+def output_format(path):
+    """Pick a format from a file name: ``.csv``, ``.jsonl``/``.ndjson``, else plain."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        return "csv"
+    if ext in (".jsonl", ".ndjson"):
+        return "jsonl"
+    return "plain"
+
+
+class BatchWriter:
+    """Writes batches of generated strings to a text stream.
+
+    Each batch is formatted and written in a single call, so memory use stays
+    proportional to the batch size no matter how many items are produced.
+    """
+
+    def __init__(self, stream, fmt="plain", field="password"):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown output format: {fmt}")
+        self.stream = stream
+        self.fmt = fmt
+        self.field = field
+        self.written = 0
+        if fmt == "csv":
+            stream.write(format_batch([field], "csv"))
+
+    def write_batch(self, items):
+        self.write_formatted(format_batch(items, self.fmt, self.field), len(items))
+
+    def write_formatted(self, text, count):
+        """Write a block already rendered by :func:`format_batch`."""
+        if text:
+            self.stream.write(text)
+        self.written += count
+
+
+def open_output(path):
+    if not path or path == "-":
+        return sys.stdout, False
+    return open(path, "w", newline="", encoding="utf-8"), True
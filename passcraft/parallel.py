@@ -0,0 +1,112 @@
+"""Multi-process bulk generation with ordered, backpressured output.
+
+The work is split into fixed-size chunks. Each worker process generates and
+formats whole chunks; randomness comes from ``os.urandom`` inside the worker,
+so every process draws from its own OS-seeded source and nothing is shared
+or inherited across the fork. The parent writes finished chunks strictly in
+submission order and keeps at most ``workers * PENDING_PER_WORKER`` chunks in
+flight: when the sink is slow, the parent blocks on the write, stops
+submitting, and the workers go idle instead of piling up output in memory.
+"""
+
+import os
+from collections import deque
+from functools import partial
+
+from . import profiles, unique
+from .output import format_batch
+
+PENDING_PER_WORKER = 2
+DEFAULT_CHUNK_SIZE = 8192
+
+def profile_job(profile):
+    """Items for a :class:`passcraft.profiles.Profile`, compiled once per worker."""
+    return ("profile", profile)
+
+
+def _init_worker(job):
+    profiles.compile_profile(job[1])
+
+
+def _generate(job, count):
+    return profiles.compile_profile(job[1]).generate(count)
+
+
+def _run_chunk(job, count, fmt, field):
+    return format_batch(_generate(job, count), fmt, field)
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+def _chunks(count, chunk_size):
+    while count > 0:
+        n = min(chunk_size, count)
+        yield n
+        count -= n
+
+
+def run_bulk(writer, count, job, workers=1, chunk_size=DEFAULT_CHUNK_SIZE, seen=None):
+    """Generate ``count`` items described by ``job`` into a :class:`BatchWriter`.
+
+    With a :class:`passcraft.unique.UniqueFilter` as ``seen``, repeats are
+    dropped and replaced in the parent, so all ``count`` items are distinct.
+    """
+    if seen is not None:
+        return _run_unique(writer, count, job, workers, chunk_size, seen)
+    if workers <= 1:
+        _init_worker(job)
+        for n in _chunks(count, chunk_size):
+            writer.write_batch(_generate(job, n))
+        return writer.written
+
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(job,)) as pool:
+        pending = deque()
+        max_pending = workers * PENDING_PER_WORKER
+        try:
+            for n in _chunks(count, chunk_size):
+                if len(pending) >= max_pending:
+                    writer.write_formatted(*_result(pending.popleft()))
+                pending.append((pool.submit(_run_chunk, job, n, writer.fmt, writer.field), n))
+            while pending:
+                writer.write_formatted(*_result(pending.popleft()))
+        finally:
+            for future, _ in pending:
+                future.cancel()
+    return writer.written
+
+
+def _run_unique(writer, count, job, workers, chunk_size, seen):
+    if workers <= 1:
+        _init_worker(job)
+        for batch in unique.iter_unique(partial(_generate, job), count, seen, chunk_size):
+            writer.write_batch(batch)
+        return writer.written
+
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(job,)) as pool:
+        # Workers return raw items; only the parent knows what was seen
+        pending = deque(pool.submit(_generate, job, chunk_size)
+                        for _ in range(workers * PENDING_PER_WORKER))
+
+        def generate(n):
+            batch = pending.popleft().result()
+            pending.append(pool.submit(_generate, job, chunk_size))
+            return batch
+
+        try:
+            for batch in unique.iter_unique(generate, count, seen, chunk_size):
+                writer.write_batch(batch)
+        finally:
+            for future in pending:
+                future.cancel()
+    return writer.written
+
+
+def _result(item):
+    future, n = item
+    return future.result(), n
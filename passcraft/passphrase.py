@@ -0,0 +1,173 @@
+"""Passphrases in batches, with exact entropy.
+
+A :class:`Style` sets the word count, whether a word may repeat within a
+phrase, the casing, and how many random digits and symbols are added.
+:class:`Sampler` lays out every random value one phrase needs as a row of
+bounds; a batch of ``count`` phrases is one :func:`rng.random_below` call
+over ``count`` rows, so the whole batch reads a single random buffer
+(redrawing only the rare values past the rejection threshold).
+
+Words are drawn without replacement by rank: the ``t``-th word is a
+uniform index below ``n - t``, shifted past the indices already taken in
+the phrase, which is a partial Fisher-Yates shuffle that never copies the
+wordlist. With NumPy the shift is done a column at a time for the batch.
+
+Digits go at the end of one random word, symbols after them (on the same
+word or another), so ``"Tiger-Moon7$-Apple-Queen-42"``. Every combination
+of random values gives a different phrase as long as the words are
+distinct, contain no digits, symbols or separator, and differ in more than
+case, so :attr:`Sampler.space` counts phrases exactly and
+:attr:`Sampler.entropy` is ``log2`` of it.
+"""
+
+from collections import namedtuple
+from math import log2, perm
+
+from . import engine, rng
+
+CASES = ("capitalize", "lower", "upper", "random")
+DIGITS = engine.CHARSETS["digits"]
+SYMBOLS = engine.CHARSETS["symbols"]
+# Smallest batch worth drawing with NumPy
+NUMPY_MIN_COUNT = 256
+# Largest wordlist kept as a cased copy for batches that read at least as many words
+CASED_TABLE_LIMIT = 1 << 20
+
+Style = namedtuple("Style", "words separator add_number case unique_words digits symbols",
+                   defaults=(4, "-", True, "capitalize", False, 0, 0))
+Style.__doc__ = """Passphrase settings; ``case`` is one of :data:`CASES`.
+
+``random`` casing capitalizes each word or leaves it lowercase, one bit
+per word. ``add_number`` appends a two-digit number as a last part;
+``digits`` and ``symbols`` are counts added inside the phrase.
+"""
+
+_CASERS = {
+    "capitalize": (str.capitalize,),
+    "lower": (str.lower,),
+    "upper": (str.upper,),
+    "random": (str.lower, str.capitalize),
+}
+_NUMBERS = [str(v) for v in range(10, 100)]
+
+
+def space(wordlist_size, style):
+    """Number of distinct passphrases for ``style`` over ``wordlist_size`` words."""
+    n, w = wordlist_size, style.words
+    out = perm(n, w) if style.unique_words else n ** w
+    if style.case == "random":
+        out <<= w
+    if style.digits:
+        out *= w * len(DIGITS) ** style.digits
+    if style.symbols:
+        out *= w * len(SYMBOLS) ** style.symbols
+    return out * 90 if style.add_number else out
+
+
+class Sampler:
+    """Batched passphrases for one wordlist and :class:`Style`."""
+
+    def __init__(self, wordlist, style=Style()):
+        n, w = len(wordlist), style.words
+        if style.case not in CASES:
+            raise ValueError(f"case must be one of {', '.join(CASES)}")
+        if w < 1 or style.digits < 0 or style.symbols < 0:
+            raise ValueError("words must be positive and digits, symbols not negative")
+        if not n:
+            raise ValueError("the wordlist is empty")
+        if style.unique_words and w > n:
+            raise ValueError(f"only {n} distinct words are available for {w} words per phrase")
+        self.wordlist = wordlist
+        self.style = style
+        self.separator = style.separator[:1] or "-"
+        self.space = space(n, style)
+        self.entropy = log2(self.space)
+        self._cased = None
+
+        # One row of bounds per phrase: words, case bits, then the digit
+        # slot and digits, the symbol slot and symbols, then the number
+        bounds = [n - t for t in range(w)] if style.unique_words else [n] * w
+        if style.case == "random":
+            bounds += [2] * w
+        if style.digits:
+            bounds += [w] + [len(DIGITS)] * style.digits
+        if style.symbols:
+            bounds += [w] + [len(SYMBOLS)] * style.symbols
+        if style.add_number:
+            bounds.append(90)
+        self._bounds = bounds
+
+    def _tables(self, count):
+        """Cased copies of the wordlist (lowercase and capitalized for random
+        casing), made once a batch reads as many words as the list holds."""
+        words = self.wordlist
+        if self._cased is None and count * self.style.words >= len(words) \
+                and len(words) <= CASED_TABLE_LIMIT:
+            self._cased = tuple([form(word) for word in words]
+                                for form in _CASERS[self.style.case])
+        return self._cased
+
+    def _columns(self, count):
+        """The random values of ``count`` phrases, one list per row position,
+        with the word indices already made distinct within each phrase."""
+        w, width = self.style.words, len(self._bounds)
+        np = rng.numpy() if count >= NUMPY_MIN_COUNT else None
+        if np is not None:
+            bounds = np.tile(np.array(self._bounds, dtype=np.uint64), count)
+            rows = rng.random_below(bounds).astype(np.int64).reshape(count, width)
+            if self.style.unique_words:
+                for t in range(1, w):
+                    taken = np.sort(rows[:, :t], axis=1)
+                    index = rows[:, t]
+                    for k in range(t):  # in ascending order, so one pass shifts fully
+                        index += taken[:, k] <= index
+            return rows.T.tolist()
+        values = rng.random_below(self._bounds * count)
+        if self.style.unique_words:
+            for start in range(0, len(values), width):
+                for t in range(start + 1, start + w):
+                    index = values[t]
+                    for taken in sorted(values[start:t]):
+                        if taken <= index:
+                            index += 1
+                    values[t] = index
+        return [values[j::width] for j in range(width)]
+
+    def generate(self, count):
+        """``count`` independent passphrases."""
+        if count <= 0:
+            return []
+        style = self.style
+        w = style.words
+        columns = self._columns(count)
+        tables = self._tables(count)
+        forms = _CASERS[style.case]
+        if style.case == "random":
+            bits = columns[w:2 * w]
+            del columns[w:2 * w]
+            if tables is None:
+                words = self.wordlist
+                parts = [[forms[bit](words[i]) for i, bit in zip(column, flips)]
+                         for column, flips in zip(columns[:w], bits)]
+            else:
+                parts = [[tables[bit][i] for i, bit in zip(column, flips)]
+                         for column, flips in zip(columns[:w], bits)]
+        elif tables is None:
+            words, form = self.wordlist, forms[0]
+            parts = [[form(words[i]) for i in column] for column in columns[:w]]
+        else:
+            table = tables[0]
+            parts = [[table[i] for i in column] for column in columns[:w]]
+
+        # Digits, then symbols, appended to the word in the slot drawn for each
+        at = w
+        for n, chars in ((style.digits, DIGITS), (style.symbols, SYMBOLS)):
+            if not n:
+                continue
+            added = zip(*[[chars[v] for v in column] for column in columns[at + 1:at + 1 + n]])
+            for row, (slot, extra) in enumerate(zip(columns[at], added)):
+                parts[slot][row] += "".join(extra)
+            at += 1 + n
+        if style.add_number:
+            parts.append([_NUMBERS[v] for v in columns[at]])
+        return list(map(self.separator.join, zip(*parts)))
@@ -0,0 +1,496 @@
+"""Pattern-aware strength estimation (in the spirit of zxcvbn).
+
+A password is searched for dictionary words (including capitalised and l33t
+variants), keyboard walks, repeats, alphabetic/numeric sequences and dates.
+Each match carries a guess count; the cheapest way to cover the whole
+password with matches and brute-forced characters gives the estimate.
+Only the first ``MAX_LENGTH`` characters are scored and the rest is
+ignored, as zxcvbn does; a password that long is out of reach either way.
+
+Dictionaries are compiled once into a flat, array-backed trie and cached on
+disk (see :mod:`passcraft.cache`), then memory-mapped on later runs, so
+startup cost does not depend on the dictionary size.
+"""
+
+import math
+import mmap
+import os
+import re
+import struct
+from array import array
+from bisect import bisect_left
+from collections import namedtuple
+from datetime import date
+
+from . import cache
+from .engine import DEFAULT_WORDS, WORDLIST_FILE
+
+COMMON_PASSWORDS_FILE = os.path.join(os.path.dirname(__file__), "data", "common_passwords.txt")
+
+# Bump when the compiled trie layout or scoring of dictionary entries changes
+TRIE_VERSION = 1
+_TRIE_MAGIC = b"PCTRIE\x00\x01"
+_TRIE_HEADER = struct.Struct("=8sII")
+
+MIN_WORD_LENGTH = 3
+MAX_LENGTH = 100  # characters scored; the rest of the input is ignored
+REFERENCE_YEAR = date.today().year
+MIN_YEAR_SPACE = 20
+
+Match = namedtuple("Match", "start end guesses pattern token")
+Estimate = namedtuple("Estimate", "bits matches")
+
+_L33T = str.maketrans({"4": "a", "@": "a", "8": "b", "(": "c", "3": "e", "6": "g",
+                       "1": "i", "!": "i", "|": "l", "0": "o", "$": "s", "5": "s",
+                       "7": "t", "+": "t", "2": "z"})
+
+
+class CompiledTrie:
+    """Read-only trie stored as four flat uint32 arrays.
+
+    Node ``n`` owns edges ``first[n]:first[n + 1]``; ``labels`` holds the
+    edge code points (sorted per node) and ``targets`` the child nodes.
+    ``values[n]`` is the guess count of the word ending at ``n`` (0 if none).
+    """
+
+    def __init__(self, first, labels, targets, values, _keepalive=None):
+        self.first = first
+        self.labels = labels
+        self.targets = targets
+        self.values = values
+        self._keepalive = _keepalive
+        # First letters of all words, to skip hopeless start positions cheaply
+        self.initials = frozenset(chr(labels[i]) for i in range(first[0], first[1]))
+
+    @classmethod
+    def build(cls, entries):
+        """Compile ``{word: guesses}`` into a trie."""
+        root = {}
+        for word, guesses in entries.items():
+            node = root
+            for ch in word:
+                node = node.setdefault(ch, {})
+            node[None] = guesses
+
+        first = array("I", [0])
+        labels = array("I")
+        targets = array("I")
+        values = array("I")
+        queue = [root]
+        for node in queue:  # breadth-first: children get consecutive ids
+            values.append(min(node.get(None, 0), 0xFFFFFFFF))
+            for ch in sorted(k for k in node if k is not None):
+                labels.append(ord(ch))
+                targets.append(len(queue))
+                queue.append(node[ch])
+            first.append(len(labels))
+        return cls(first, labels, targets, values)
+
+    def save(self, path):
+        header = _TRIE_HEADER.pack(_TRIE_MAGIC, len(self.values), len(self.labels))
+        cache.atomic_write(path, [header, self.first.tobytes(), self.labels.tobytes(),
+                                  self.targets.tobytes(), self.values.tobytes()])
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, nodes, edges = _TRIE_HEADER.unpack_from(mm)
+        if magic != _TRIE_MAGIC or len(mm) != _TRIE_HEADER.size + 4 * (2 * nodes + 1 + 2 * edges):
+            mm.close()
+            raise ValueError(f"{path} is not a compiled PassCraft trie")
+        view = memoryview(mm)[_TRIE_HEADER.size:].cast("I")
+        pos = 0
+        parts = []
+        for size in (nodes + 1, edges, edges, nodes):
+            parts.append(view[pos:pos + size])
+            pos += size
+        return cls(*parts, _keepalive=mm)
+
+    def prefixes(self, text, start):
+        """Yield ``(end, guesses)`` for each dictionary word at ``text[start:end]``."""
+        first, labels, targets, values = self.first, self.labels, self.targets, self.values
+        node = 0
+        for pos in range(start, len(text)):
+            lo, hi = first[node], first[node + 1]
+            code = ord(text[pos])
+            i = bisect_left(labels, code, lo, hi)
+            if i == hi or labels[i] != code:
+                return
+            node = targets[i]
+            if values[node]:
+                yield pos + 1, values[node]
+
+
+def _read_words(path):
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            return [line.strip() for line in f if line.strip()]
+    except OSError:
+        return []
+
+
+def dictionary_entries(wordlist=None, wordlist_path=WORDLIST_FILE):
+    """Map each lower-cased dictionary word to its guess count.
+
+    Common passwords are ranked by position. Passphrase words are drawn
+    uniformly by the generator, so each costs exactly ``len(wordlist)``.
+    """
+    entries = {}
+    for rank, word in enumerate(_read_words(COMMON_PASSWORDS_FILE), 1):
+        word = word.lower()
+        if len(word) >= MIN_WORD_LENGTH and word not in entries:
+            entries[word] = rank
+    if wordlist is None:
+        wordlist = _read_words(wordlist_path) or DEFAULT_WORDS
+    size = len(wordlist)
+    for word in wordlist:
+        word = word.lower()
+        if len(word) >= MIN_WORD_LENGTH and entries.get(word, size + 1) > size:
+            entries[word] = size
+    return entries
+
+
+def load_trie(wordlist_path=WORDLIST_FILE):
+    """Load the compiled dictionary trie, rebuilding the disk cache if stale."""
+    key = cache.cache_key(TRIE_VERSION, cache.file_fingerprint(COMMON_PASSWORDS_FILE),
+                          cache.file_fingerprint(wordlist_path))
+    path = None
+    try:
+        path = cache.cache_path(f"patterns-{key}.trie")
+        return CompiledTrie.load(path)
+    except (OSError, ValueError):
+        pass
+    trie = CompiledTrie.build(dictionary_entries(wordlist_path=wordlist_path))
+    if path is not None:
+        try:
+            trie.save(path)
+        except OSError:
+            pass  # read-only cache directory: keep the in-memory trie
+    return trie
+
+
+# Keyboard layout used for walk detection (unshifted, shifted, x offset)
+_KEYBOARD_ROWS = (
+    ("`1234567890-=", "~!@#$%^&*()_+", 0.0),
+    ("qwertyuiop[]\\", "QWERTYUIOP{}|", 1.5),
+    ("asdfghjkl;'", 'ASDFGHJKL:"', 1.75),
+    ("zxcvbnm,./", "ZXCVBNM<>?", 2.25),
+)
+
+
+def _keyboard_graph():
+    positions = {}
+    shifted = set()
+    for row, (plain, shift, offset) in enumerate(_KEYBOARD_ROWS):
+        for col, (a, b) in enumerate(zip(plain, shift)):
+            positions[a] = positions[b] = (row, offset + col)
+            shifted.add(b)
+    keys = {}
+    for a, (ra, xa) in positions.items():
+        keys.setdefault((ra, xa), set()).add(a)
+    graph = {}
+    for (ra, xa), chars in keys.items():
+        adjacent = set()
+        for (rb, xb), others in keys.items():
+            if (ra == rb and abs(xa - xb) == 1) or (abs(ra - rb) == 1 and abs(xa - xb) <= 0.75):
+                adjacent |= others
+        for ch in chars:
+            graph[ch] = adjacent
+    degree = sum(len(adj) for adj in graph.values()) / len(graph) / 2  # shift doubles entries
+    return graph, shifted, len(keys), degree
+
+
+_KEYBOARD, _SHIFTED, _KEYBOARD_STARTS, _KEYBOARD_DEGREE = _keyboard_graph()
+
+_REPEAT_GREEDY = re.compile(r"(.+)\1+", re.S)
+_REPEAT_LAZY = re.compile(r"(.+?)\1+", re.S)
+_DATE_SEPARATED = re.compile(r"(\d{1,4})([\s/\\_.-])(\d{1,2})\2(\d{1,4})")
+_DIGITS = re.compile(r"\d{4,8}")
+
+
+def _ncr(n, k):
+    return math.comb(n, k) if 0 <= k <= n else 0
+
+
+def _uppercase_variations(token):
+    if not any(c.isupper() for c in token) or token.islower():
+        return 1
+    lower = token.lower()
+    if token.isupper() or token[0] + lower[1:] == token or lower[:-1] + token[-1] == token:
+        return 2
+    upper_count = sum(c.isupper() for c in token)
+    lower_count = sum(c.islower() for c in token)
+    return sum(_ncr(upper_count + lower_count, i) for i in range(1, min(upper_count, lower_count) + 1))
+
+
+def _char_cardinality(c):
+    if c.isdigit():
+        return 10
+    if c.isupper() or c.islower():
+        return 26
+    return 32
+
+
+class PatternEstimator:
+    """Estimates guesses needed for a password from the patterns it contains."""
+
+    def __init__(self, trie):
+        self.trie = trie
+
+    @classmethod
+    def from_wordlist(cls, wordlist, wordlist_path=WORDLIST_FILE):
+        """Build (uncached) from an in-memory wordlist."""
+        return cls(CompiledTrie.build(dictionary_entries(wordlist, wordlist_path)))
+
+    def estimate(self, password):
+        if not password:
+            return Estimate(0.0, [])
+        # Matching is quadratic in the length, so only a bounded prefix is scored
+        password = password[:MAX_LENGTH]
+        return self._minimum_guesses(password, self.matches(password))
+
+    def bits(self, password):
+        return self.estimate(password).bits
+
+    # -- matchers ---------------------------------------------------------
+
+    def matches(self, password):
+        out = []
+        out.extend(self._dictionary(password))
+        out.extend(self._keyboard(password))
+        out.extend(self._sequences(password))
+        out.extend(self._repeats(password))
+        out.extend(self._dates(password))
+        out.extend(self._separators(password))
+        return out
+
+    def _dictionary(self, password):
+        lower = password.lower()
+        unleet = lower.translate(_L33T)
+        prefixes = self.trie.prefixes
+        initials = self.trie.initials
+        for text, l33t in ((lower, False), (unleet, True)):
+            if l33t and unleet == lower:
+                break
+            for start in range(len(text)):
+                if text[start] not in initials:
+                    continue
+                for end, rank in prefixes(text, start):
+                    token = password[start:end]
+                    guesses = rank * _uppercase_variations(token)
+                    if l33t:
+                        subs = sum(a != b for a, b in zip(lower[start:end], text[start:end]))
+                        if not subs:
+                            continue
+                        guesses *= 2 ** subs
+                    yield Match(start, end, guesses, "l33t" if l33t else "dictionary", token)
+
+    def _keyboard(self, password):
+        n = len(password)
+        start = 0
+        while start < n - 2:
+            end = start + 1
+            while end < n and password[end] in _KEYBOARD.get(password[end - 1], ()):
+                end += 1
+            if end - start >= 3:
+                yield self._keyboard_match(password, start, end)
+                start = end
+            else:
+                start += 1
+
+    @staticmethod
+    def _keyboard_match(password, start, end):
+        token = password[start:end]
+        length = len(token)
+        turns = 1 + sum(1 for i in range(2, length)
+                        if _direction(token[i - 2], token[i - 1]) != _direction(token[i - 1], token[i]))
+        guesses = 0
+        for i in range(2, length + 1):
+            for j in range(1, min(turns, i - 1) + 1):
+                guesses += _ncr(i - 1, j - 1) * _KEYBOARD_STARTS * _KEYBOARD_DEGREE ** j
+        shifted = sum(c in _SHIFTED for c in token)
+        if shifted and shifted < length:
+            guesses *= sum(_ncr(length, i) for i in range(1, min(shifted, length - shifted) + 1))
+        elif shifted:
+            guesses *= 2
+        return Match(start, end, max(guesses, 1), "keyboard", token)
+
+    @staticmethod
+    def _sequences(password):
+        n = len(password)
+        start = 0
+        while start < n - 2:
+            delta = ord(password[start + 1]) - ord(password[start])
+            end = start + 1
+            if delta in (1, -1) and _same_class(password[start], password[start + 1]):
+                while (end < n - 1 and ord(password[end + 1]) - ord(password[end]) == delta
+                       and _same_class(password[end], password[end + 1])):
+                    end += 1
+            end += 1
+            if end - start >= 3:
+                token = password[start:end]
+                first = token[0]
+                base = 4 if first in "aAzZ019" else (10 if first.isdigit() else 26)
+                yield Match(start, end, base * len(token) * (2 if delta < 0 else 1), "sequence", token)
+                start = end - 1
+            else:
+                start += 1
+
+    def _repeats(self, password):
+        pos = 0
+        while pos < len(password):
+            greedy = _REPEAT_GREEDY.search(password, pos)
+            if not greedy:
+                return
+            lazy = _REPEAT_LAZY.search(password, pos)
+            # Prefer the longer overall match, the shorter repeating unit
+            if len(greedy.group(0)) > len(lazy.group(0)):
+                match, unit = greedy, _REPEAT_LAZY.fullmatch(greedy.group(0)).group(1)
+            else:
+                match, unit = lazy, lazy.group(1)
+            count = len(match.group(0)) // len(unit)
+            base_bits = self.estimate(unit).bits if len(unit) < len(password) else 0
+            guesses = max(2 ** base_bits, 1) * count
+            yield Match(match.start(), match.end(), guesses, "repeat", match.group(0))
+            pos = match.end()
+
+    @staticmethod
+    def _dates(password):
+        for m in _DATE_SEPARATED.finditer(password):
+            year = _date_year(int(m.group(1)), int(m.group(3)), int(m.group(4)), m.group(1), m.group(4))
+            if year is not None:
+                yield Match(m.start(), m.end(), 4 * _date_guesses(year), "date", m.group(0))
+        for m in _DIGITS.finditer(password):
+            digits = m.group(0)
+            for start in range(len(digits)):
+                for end in range(start + 4, min(len(digits), start + 8) + 1):
+                    token = digits[start:end]
+                    guesses = _digit_date_guesses(token)
+                    if guesses:
+                        yield Match(m.start() + start, m.start() + end, guesses, "date", token)
+
+    @staticmethod
+    def _separators(password):
+        # A symbol reused as a separator costs far less than a fresh one
+        seen = set()
+        for i, c in enumerate(password):
+            if not c.isalnum():
+                if c in seen:
+                    yield Match(i, i + 1, 2, "separator", c)
+                seen.add(c)
+
+    # -- search -----------------------------------------------------------
+
+    @staticmethod
+    def _minimum_guesses(password, matches):
+        n = len(password)
+        by_end = [[] for _ in range(n + 1)]
+        for m in matches:
+            by_end[m.end].append(m)
+        best = [0.0] * (n + 1)
+        back = [None] * (n + 1)
+        for j in range(1, n + 1):
+            best[j] = best[j - 1] + math.log2(_char_cardinality(password[j - 1]))
+            back[j] = None
+            for m in by_end[j]:
+                bits = best[m.start] + math.log2(m.guesses)
+                if bits < best[j]:
+                    best[j] = bits
+                    back[j] = m
+        sequence = []
+        j = n
+        while j > 0:
+            m = back[j]
+            if m is None:
+                j -= 1
+            else:
+                sequence.append(m)
+                j = m.start
+        sequence.reverse()
+        return Estimate(best[n], sequence)
+
+
+def _direction(a, b):
+    ra, xa = _key_position(a)
+    rb, xb = _key_position(b)
+    return (rb - ra, (xb > xa) - (xb < xa))
+
+
+def _key_position(c):
+    for row, (plain, shift, offset) in enumerate(_KEYBOARD_ROWS):
+        i = plain.find(c)
+        if i < 0:
+            i = shift.find(c)
+        if i >= 0:
+            return row, offset + i
+    return -1, 0
+
+
+def _same_class(a, b):
+    return (a.isdigit() and b.isdigit()) or (a.islower() and b.islower()) or (a.isupper() and b.isupper())
+
+
+def _expand_year(year, digits):
+    if len(digits) == 4:
+        return year if 1000 <= year <= 2099 else None
+    if len(digits) == 2:
+        return 1900 + year if year > 50 else 2000 + year
+    return None
+
+
+def _valid_day_month(day, month):
+    return 1 <= month <= 12 and 1 <= day <= 31
+
+
+def _date_year(a, b, c, a_digits, c_digits):
+    """Year of a separated ``a/b/c`` date in any common order, else ``None``."""
+    if len(c_digits) in (2, 4) and (_valid_day_month(a, b) or _valid_day_month(b, a)):
+        return _expand_year(c, c_digits)
+    if len(a_digits) == 4 and (_valid_day_month(c, b) or _valid_day_month(b, c)):
+        return _expand_year(a, a_digits)
+    return None
+
+
+def _date_guesses(year):
+    return 365 * max(abs(year - REFERENCE_YEAR), MIN_YEAR_SPACE)
+
+
+def _digit_date_guesses(token):
+    n = len(token)
+    if n == 4:
+        year = int(token)
+        if 1900 <= year <= 2099:
+            return max(abs(year - REFERENCE_YEAR), MIN_YEAR_SPACE)
+    candidates = []
+    # year first or last, with one- or two-digit day and month
+    for year_len in (4, 2):
+        for split in range(1, n - year_len):
+            for year_first in (True, False):
+                if year_first:
+                    ydig, rest = token[:year_len], token[year_len:]
+                else:
+                    ydig, rest = token[-year_len:], token[:-year_len]
+                if len(rest) < 2 or len(rest) > 4 or split >= len(rest):
+                    continue
+                a, b = int(rest[:split]), int(rest[split:])
+                if len(rest[:split]) > 2 or len(rest[split:]) > 2:
+                    continue
+                if _valid_day_month(a, b) or _valid_day_month(b, a):
+                    year = _expand_year(int(ydig), ydig)
+                    if year is not None:
+                        candidates.append(year)
+    if not candidates:
+        return 0
+    return min(_date_guesses(year) for year in candidates)
+
+
+_default = None
+
+
+def default_estimator():
+    """Process-wide estimator over the common-password list and ``wordlist.txt``."""
+    global _default
+    if _default is None:
+        _default = PatternEstimator(load_trie())
+    return _default
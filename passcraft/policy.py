@@ -0,0 +1,314 @@
+"""Password policies, sampled exactly in a single pass.
+
+A :class:`Policy` sets per-class minimum and maximum counts, characters to
+exclude (optionally the ambiguous ones such as ``O``/``0`` and ``I``/``l``)
+and whether a character may repeat. Regenerating until a random password
+happens to comply has no bound on the number of retries, and with short
+lengths or small classes (there are only 8 symbols) most candidates fail.
+Here no candidate is ever thrown away.
+
+For a ``length`` and class counts ``c_1 .. c_m`` there are
+
+    length! / (c_1! ... c_m!) * N_1(c_1) * ... * N_m(c_m)
+
+compliant passwords, where ``N_i(c)`` is ``n_i ** c`` for a class of
+``n_i`` characters, or ``n_i! / (n_i - c)!`` when characters may not
+repeat. :func:`sampler` tabulates these counts as exact integers once per
+policy and length. A password then costs:
+
+1. one uniform integer below the number of compliant passwords, walked
+   down the cumulative tables with one bisect per class, which picks the
+   class counts with exactly the right probability;
+2. one uniform draw per character to fill each class's share (a partial
+   Fisher-Yates over the class when characters may not repeat);
+3. a Fisher-Yates shuffle of the positions.
+
+All draws come from :mod:`passcraft.rng`, where a value below ``b`` is
+redrawn with probability under ``b / 2**32``, so the cost is fixed but for
+those rare redraws. The result
+is uniform over all compliant passwords, and ``Sampler.entropy`` is exact.
+Batches of passwords are built column-wise with NumPy when it is installed.
+"""
+
+from bisect import bisect_right
+from collections import namedtuple
+from functools import lru_cache
+from math import comb, log2, perm
+
+from . import engine, metrics, rng
+
+AMBIGUOUS = "O0oIl1|"
+# Smallest batch worth building with NumPy
+NUMPY_MIN_COUNT = 256
+# Class-count combinations kept in one flat table (one bisect per password)
+FLAT_LIMIT = 1 << 16
+
+Policy = namedtuple("Policy", "classes minimums maximums exclude avoid_ambiguous no_repeat")
+Policy.__doc__ = """Rules for generated passwords; build with :func:`make_policy`.
+
+``classes`` are names from :data:`engine.CHARSETS`; ``minimums`` and
+``maximums`` hold one count per class (``None``: no maximum).
+"""
+
+
+def make_policy(classes=("upper", "lower", "digits"), minimum=1, minimums=None,
+                maximums=None, exclude="", avoid_ambiguous=False, no_repeat=False):
+    """A :class:`Policy` over ``classes``.
+
+    Every class needs at least ``minimum`` characters unless ``minimums``
+    (a dict by class name) says otherwise; ``maximums`` is a dict too.
+    """
+    unknown = [name for name in classes if name not in engine.CHARSETS]
+    unknown += [name for name in (minimums or {}) if name not in classes]
+    unknown += [name for name in (maximums or {}) if name not in classes]
+    if unknown:
+        raise ValueError(f"unknown or unselected character set {', '.join(unknown)}")
+    classes = tuple(name for name in engine.CHARSETS if name in classes)
+    minimums = minimums or {}
+    maximums = maximums or {}
+    return Policy(classes,
+                  tuple(minimums.get(name, minimum) for name in classes),
+                  tuple(maximums.get(name) for name in classes),
+                  "".join(sorted(set(exclude))), bool(avoid_ambiguous), bool(no_repeat))
+
+
+@lru_cache(maxsize=64)
+def class_chars(policy):
+    """``{name: characters}`` for each class that keeps any characters."""
+    removed = set(policy.exclude) | (set(AMBIGUOUS) if policy.avoid_ambiguous else set())
+    out = {}
+    for name in policy.classes:
+        chars = "".join(c for c in engine.CHARSETS[name] if c not in removed)
+        if chars:
+            out[name] = chars
+    return out
+
+
+@lru_cache(maxsize=64)
+def _labels(policy):
+    # Every allowed character translates to a private-use marker of its class
+    chars = class_chars(policy)
+    markers = [chr(0xE000 + i) for i in range(len(policy.classes))]
+    table = str.maketrans({c: marker for name, marker in zip(policy.classes, markers)
+                           for c in chars.get(name, "")})
+    return table, markers
+
+
+def complies(policy, password):
+    """Whether ``password`` follows ``policy`` (used to check, never to generate)."""
+    if policy.no_repeat and len(set(password)) != len(password):
+        return False
+    table, markers = _labels(policy)
+    labels = password.translate(table)
+    counted = 0
+    for marker, low, high in zip(markers, policy.minimums, policy.maximums):
+        n = labels.count(marker)
+        if n < low or (high is not None and n > high):
+            return False
+        counted += n
+    return counted == len(password)
+
+
+class Sampler:
+    """Exact uniform sampler for one policy and length; see :func:`sampler`."""
+
+    def __init__(self, policy, length):
+        chars = class_chars(policy)
+        self.policy = policy
+        self.length = length
+        self.classes = []  # (characters, lowest count, highest count)
+        for name, low, high in zip(policy.classes, policy.minimums, policy.maximums):
+            if name not in chars:
+                if low > 0:
+                    raise ValueError(f"no characters from {name} are left after the exclusions")
+                continue
+            high = length if high is None else min(high, length)
+            if policy.no_repeat:
+                high = min(high, len(chars[name]))
+            if low > high:
+                raise ValueError(f"at most {high} characters from {name} fit, "
+                                 f"but {low} are required")
+            self.classes.append((chars[name], low, high))
+        if not self.classes:
+            raise ValueError("Please select at least one character set!")
+        self.alphabet = "".join(c for c, _, _ in self.classes)
+
+        # counts[i][s]: compliant strings of length s over the first i classes
+        counts = [[1] + [0] * length]
+        for chars, low, high in self.classes:
+            n = len(chars)
+            fills = [perm(n, c) if policy.no_repeat else n ** c for c in range(high + 1)]
+            prev = counts[-1]
+            counts.append([sum(prev[s - c] * comb(s, c) * fills[c]
+                               for c in range(low, min(high, s) + 1))
+                           for s in range(length + 1)])
+        self._counts = counts
+        self._tables = {}
+        self._flat = None
+        self._combos = ()  # the flat table's combinations as a NumPy array
+        self.space = counts[-1][length]
+        if not self.space:
+            raise ValueError(f"no {length}-character password satisfies this policy")
+        self.entropy = log2(self.space)
+
+    def _table(self, i, s):
+        """Cumulative weights and divisors for the count of class ``i`` given ``s``."""
+        key = (i, s)
+        table = self._tables.get(key)
+        if table is None:
+            chars, low, high = self.classes[i - 1]
+            n = len(chars)
+            prev = self._counts[i - 1]
+            cumulative, divisors = [], []
+            total = 0
+            for c in range(low, min(high, s) + 1):
+                divisor = comb(s, c) * (perm(n, c) if self.policy.no_repeat else n ** c)
+                total += prev[s - c] * divisor
+                cumulative.append(total)
+                divisors.append(divisor)
+            table = self._tables[key] = (low, cumulative, divisors)
+        return table
+
+    def _flat_table(self):
+        """``(rng.WeightedIndex, combinations)`` over every class-count
+        combination with a nonzero weight, or ``None`` past FLAT_LIMIT."""
+        if self._flat is None:
+            cumulative, combos = [], []
+            total = 0
+
+            def walk(i, s, weight, counts):
+                nonlocal total
+                if len(combos) > FLAT_LIMIT:
+                    return
+                if i == 0:
+                    total += weight
+                    cumulative.append(total)
+                    combos.append(counts[::-1])
+                    return
+                low, _, divisors = self._table(i, s)
+                for k, divisor in enumerate(divisors):
+                    if self._counts[i - 1][s - low - k]:
+                        walk(i - 1, s - low - k, weight * divisor, counts + [low + k])
+
+            walk(len(self.classes), self.length, 1, [])
+            self._flat = False
+            if len(combos) <= FLAT_LIMIT:
+                self._flat = (rng.WeightedIndex(cumulative), combos)
+        return self._flat or None
+
+    def compositions(self, count):
+        """``count`` lists of per-class character counts, exactly weighted."""
+        flat = self._flat_table()
+        if flat is not None:
+            index, combos = flat
+            return [combos[k] for k in index.sample(count)]
+        out = []
+        m = len(self.classes)
+        for x in rng.random_indices(count, self.space):
+            s = self.length
+            counts = [0] * m
+            for i in range(m, 0, -1):
+                low, cumulative, divisors = self._table(i, s)
+                k = bisect_right(cumulative, x)
+                # x is now uniform over the strings of the remaining classes
+                x = (x - (cumulative[k - 1] if k else 0)) // divisors[k]
+                counts[i - 1] = low + k
+                s -= low + k
+            out.append(counts)
+        return out
+
+    @metrics.timed("policy.generate")
+    def generate(self, count):
+        """``count`` independent passwords, uniform over all compliant ones."""
+        if count <= 0:
+            return []
+        metrics.count("policy.generate.items", count)
+        if self.length == 0:
+            return [""] * count
+        np = rng.numpy() if count >= NUMPY_MIN_COUNT and self.alphabet.isascii() else None
+        if np is not None:
+            return self._generate_numpy(np, count)
+        compositions = self.compositions(count)
+        return [self._build(counts, draws)
+                for counts, draws in zip(compositions, self._draws(compositions))]
+
+    def _draws(self, compositions):
+        # All the bounded draws of a batch in one call, handed out per password
+        bounds = []
+        shuffle = list(range(self.length, 1, -1))
+        for counts in compositions:
+            for (chars, _, _), c in zip(self.classes, counts):
+                n = len(chars)
+                bounds += range(n, n - c, -1) if self.policy.no_repeat else [n] * c
+            bounds += shuffle
+        values = iter(rng.random_below(bounds))
+        for _ in compositions:
+            yield values
+
+    def _build(self, counts, draws):
+        out = []
+        for (chars, _, _), c in zip(self.classes, counts):
+            if self.policy.no_repeat:
+                pool = list(chars)
+                for t in range(c):
+                    j = t + next(draws)
+                    pool[t], pool[j] = pool[j], pool[t]
+                out += pool[:c]
+            else:
+                out += [chars[next(draws)] for _ in range(c)]
+        for j in range(self.length - 1, 0, -1):
+            k = next(draws)
+            out[j], out[k] = out[k], out[j]
+        return "".join(out)
+
+    def _generate_numpy(self, np, count):
+        length = self.length
+        flat = self._flat_table()
+        if flat is not None:
+            index, combos = flat
+            if len(self._combos) != len(combos):
+                self._combos = np.array(combos, dtype=np.intp)
+            counts = self._combos[index.sample_array(count)]
+        else:
+            counts = np.array(self.compositions(count), dtype=np.intp)
+        rows = np.arange(count)
+        ends = counts.cumsum(axis=1)
+        # Class of every cell, the classes laid out in order before the shuffle
+        labels = np.zeros((count, length), dtype=np.intp)
+        for i in range(len(self.classes) - 1):
+            labels += np.arange(length)[None, :] >= ends[:, i:i + 1]
+        codes = np.empty((count, length), dtype=np.uint8)
+        for i, (chars, _, _) in enumerate(self.classes):
+            table = np.frombuffer(chars.encode("ascii"), dtype=np.uint8)
+            mask = labels == i
+            cells = int(counts[:, i].sum())
+            if not cells:
+                continue
+            if not self.policy.no_repeat:
+                codes[mask] = table[rng.random_index_array(cells, len(table))]
+                continue
+            # Partial Fisher-Yates over the class, one column per drawn character
+            n, most = len(table), int(counts[:, i].max())
+            picks = np.tile(np.arange(n, dtype=np.intp), (count, 1))
+            for t in range(most):
+                j = t + rng.random_index_array(count, n - t)
+                picked = picks[rows, j]
+                picks[rows, j] = picks[:, t]
+                picks[:, t] = picked
+            # Row-major order of the mask matches each row's picks in order
+            taken = np.arange(n)[None, :] < counts[:, i:i + 1]
+            codes[mask] = table[picks[:, :n][taken]]
+        # Fisher-Yates over the positions, column by column for the whole batch
+        for j in range(length - 1, 0, -1):
+            k = rng.random_index_array(count, j + 1)
+            picked = codes[rows, k]
+            codes[rows, k] = codes[:, j]
+            codes[:, j] = picked
+        blob = codes.tobytes().decode("ascii")
+        return [blob[i:i + length] for i in range(0, len(blob), length)]
+
+
+@lru_cache(maxsize=64)
+def sampler(policy, length):
+    """The compiled :class:`Sampler` for ``policy`` and ``length``, cached."""
+    return Sampler(policy, length)
@@ -0,0 +1,159 @@
+"""Pre-filled entropy pool for low-latency small draws.
+
+A ring of fixed-size blocks is kept full of ``os.urandom`` output by a
+background thread, so an interactive generation takes its few dozen random
+bytes from memory instead of making system calls on the caller's thread.
+
+Draws are zero-copy: :meth:`EntropyPool.draw` leases a ``memoryview`` slice
+of the current block and the slice is overwritten with zeros as soon as the
+lease ends, so every byte is handed out once and does not linger. A block
+goes back to the refill thread once it has been read to the end and every
+lease on it has ended.
+
+The pool never blocks a caller: draws larger than a block, or made while the
+pool is still empty, read ``os.urandom`` directly. In a forked child the
+pooled bytes are discarded before any draw (``os.register_at_fork`` plus a
+pid check), so parent and child never share random bytes.
+"""
+
+import os
+import threading
+import weakref
+from collections import deque
+from contextlib import nullcontext
+
+BLOCK_SIZE = 4096
+BLOCKS = 16
+
+_pools = weakref.WeakSet()
+
+
+class _Lease:
+    """Context manager returned by :meth:`EntropyPool.draw`."""
+
+    __slots__ = ("pool", "epoch", "block", "view")
+
+    def __init__(self, pool, epoch, block, view):
+        self.pool = pool
+        self.epoch = epoch
+        self.block = block
+        self.view = view
+
+    def __enter__(self):
+        return self.view
+
+    def __exit__(self, *exc):
+        self.pool._release(self)
+        return False
+
+
+class EntropyPool:
+    def __init__(self, block_size=BLOCK_SIZE, blocks=BLOCKS):
+        self.block_size = block_size
+        self._blocks = [bytearray(block_size) for _ in range(blocks)]
+        self._views = [memoryview(block) for block in self._blocks]
+        self._zeros = memoryview(bytes(block_size))
+        self._closed = False
+        self._reset()
+        _pools.add(self)
+
+    def _reset(self):
+        """Forget every pooled byte and schedule all blocks for refilling."""
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._pid = os.getpid()
+        self._epoch = getattr(self, "_epoch", 0) + 1
+        for view in self._views:
+            view[:] = self._zeros
+        self._full = deque()
+        self._empty = deque(range(len(self._blocks)))
+        self._leases = [0] * len(self._blocks)
+        self._current = None
+        self._offset = 0
+        self._thread = None
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            self._wake.notify_all()
+
+    # -- refill thread ------------------------------------------------------
+
+    def _start(self):
+        self._thread = threading.Thread(target=self._refill, args=(self._epoch,),
+                                        name="passcraft-entropy", daemon=True)
+        self._thread.start()
+
+    def _refill(self, epoch):
+        while True:
+            with self._lock:
+                while not self._empty and not self._closed and epoch == self._epoch:
+                    self._wake.wait()
+                if self._closed or epoch != self._epoch:
+                    return
+                index = self._empty.popleft()
+            self._views[index][:] = os.urandom(self.block_size)
+            with self._lock:
+                if epoch != self._epoch:
+                    return
+                self._full.append(index)
+
+    # -- draws --------------------------------------------------------------
+
+    def draw(self, n):
+        """Lease ``n`` random bytes; use as ``with pool.draw(n) as buf: ...``.
+
+        ``buf`` is only valid inside the ``with`` block.
+        """
+        if os.getpid() != self._pid:  # forked without register_at_fork
+            self._reset()
+        if n > self.block_size or self._closed:
+            return nullcontext(os.urandom(n))
+        with self._lock:
+            if self._thread is None:
+                self._start()
+            if self._current is None or self._offset + n > self.block_size:
+                if not self._next_block():
+                    return nullcontext(os.urandom(n))
+            index, start = self._current, self._offset
+            self._offset += n
+            self._leases[index] += 1
+            return _Lease(self, self._epoch, index, self._views[index][start:start + n])
+
+    def _next_block(self):
+        # Caller holds the lock
+        if self._current is not None:
+            self._retire(self._current, self._offset)
+            self._current = None
+        if not self._full:
+            return False
+        self._current = self._full.popleft()
+        self._offset = 0
+        return True
+
+    def _retire(self, index, offset):
+        # The unread tail is wiped too; a block is reused once unleased
+        self._views[index][offset:] = self._zeros[offset:]
+        if self._leases[index] == 0:
+            self._empty.append(index)
+            self._wake.notify()
+
+    def _release(self, lease):
+        lease.view[:] = self._zeros[:len(lease.view)]
+        with self._lock:
+            if lease.epoch != self._epoch:  # the pool was reset meanwhile
+                return
+            self._leases[lease.block] -= 1
+            # A leased block is either current or retired; recycle retired ones
+            if self._leases[lease.block] == 0 and lease.block != self._current:
+                self._empty.append(lease.block)
+                self._wake.notify()
+
+
+def _after_fork_in_child():
+    for pool in list(_pools):
+        pool._reset()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
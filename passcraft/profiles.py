@@ -0,0 +1,267 @@
+"""Named generation profiles, kept in ``config.json``.
+
+A :class:`Profile` holds every setting that shapes the generated items:
+length, character sets, keyword and policy rules for passwords; word
+count, separator, number, casing, repeated words and added digits and
+symbols for passphrases; the n-gram order for pronounceable passwords,
+trained on ``wordlist``. :func:`compile_profile` turns one into a
+:class:`Generator` that holds everything derived from those settings: the
+compiled charset table with its rejection threshold, the policy or
+passphrase sampler with its tables, the loaded wordlist or Markov model,
+the size of the output space and its entropy. Profiles are hashable tuples, and compiled
+generators sit in an LRU keyed by them and the state of their wordlist
+file, so the GUI, the CLI and bulk workers can switch between many
+profiles without compiling any of them twice.
+
+``config.json`` maps profile names to the settings that differ from the
+defaults::
+
+    {"profiles": {
+        "wifi": {"length": 24, "classes": ["upper", "lower", "digits"],
+                 "avoid_ambiguous": true},
+        "pin": {"length": 6, "classes": ["digits"], "no_repeat": true},
+        "memorable": {"kind": "passphrase", "words": 5, "separator": " ",
+                      "case": "random", "unique_words": true, "digits": 1},
+        "spoken": {"kind": "pronounceable", "length": 12, "markov_order": 4}
+    }}
+"""
+
+import json
+import math
+import os
+from collections import namedtuple
+from functools import lru_cache
+
+from . import cache, engine, markov, metrics, passphrase, policy, rng, unique
+
+CONFIG_FILE = "config.json"
+KINDS = ("password", "passphrase", "pronounceable")
+
+_FIELDS = {
+    "kind": "password",
+    "length": 16,
+    "classes": ("upper", "lower", "digits"),
+    "keyword": "",
+    "each_class": False,
+    "minimums": (),  # ((class name, count), ...) sorted by name
+    "maximums": (),
+    "exclude": "",
+    "avoid_ambiguous": False,
+    "no_repeat": False,
+    "words": 4,
+    "separator": "-",
+    "add_number": True,
+    "case": "capitalize",
+    "unique_words": False,
+    "digits": 0,
+    "symbols": 0,
+    "markov_order": markov.DEFAULT_ORDER,
+    "wordlist": engine.WORDLIST_FILE,
+}
+
+
+class Profile(namedtuple("Profile", _FIELDS, defaults=_FIELDS.values())):
+    """Generation settings; every field has a default."""
+
+    __slots__ = ()
+
+    def policy(self):
+        """The :class:`policy.Policy` for the rules, ``None`` when there are none."""
+        if not (self.each_class or self.minimums or self.maximums or self.exclude
+                or self.avoid_ambiguous or self.no_repeat):
+            return None
+        return policy.make_policy(self.classes, minimum=int(self.each_class),
+                                  minimums=dict(self.minimums), maximums=dict(self.maximums),
+                                  exclude=self.exclude, avoid_ambiguous=self.avoid_ambiguous,
+                                  no_repeat=self.no_repeat)
+
+    def style(self):
+        """The :class:`passphrase.Style` for the passphrase settings."""
+        return passphrase.Style(self.words, self.separator, self.add_number, self.case,
+                                self.unique_words, self.digits, self.symbols)
+
+    def to_dict(self):
+        """The settings that differ from the defaults, JSON-ready."""
+        out = {}
+        for key, default in _FIELDS.items():
+            value = getattr(self, key)
+            if value != default:
+                out[key] = dict(value) if key in ("minimums", "maximums") else (
+                    list(value) if isinstance(value, tuple) else value)
+        return out
+
+    @classmethod
+    def from_dict(cls, data):
+        """Validate one ``config.json`` entry; raises ``ValueError``."""
+        if not isinstance(data, dict):
+            raise ValueError("a profile must be an object")
+        unknown = [key for key in data if key not in _FIELDS]
+        if unknown:
+            raise ValueError(f"unknown setting {', '.join(unknown)}")
+        values = {}
+        for key, value in data.items():
+            default = _FIELDS[key]
+            if key in ("minimums", "maximums"):
+                if not isinstance(value, dict) or not all(
+                        isinstance(n, int) and not isinstance(n, bool) and n >= 0
+                        for n in value.values()):
+                    raise ValueError(f"{key} must map class names to counts")
+                value = tuple(sorted(value.items()))
+            elif key == "classes":
+                if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+                    raise ValueError("classes must be a list of names")
+                value = tuple(name for name in engine.CHARSETS if name in value)
+            elif type(value) is not type(default):
+                raise ValueError(f"{key} must be a {type(default).__name__}")
+            values[key] = value
+        profile = cls(**values)
+        if profile.kind not in KINDS:
+            raise ValueError(f"kind must be one of {', '.join(KINDS)}")
+        if profile.case not in passphrase.CASES:
+            raise ValueError(f"case must be one of {', '.join(passphrase.CASES)}")
+        if not 1 <= profile.length <= 4096 or not 1 <= profile.words <= 64:
+            raise ValueError("length or words out of range")
+        if not 0 <= profile.digits <= 16 or not 0 <= profile.symbols <= 16:
+            raise ValueError("digits or symbols out of range")
+        if profile.markov_order not in markov.ORDERS:
+            raise ValueError(f"markov_order must be one of {', '.join(map(str, markov.ORDERS))}")
+        return profile
+
+
+class Generator:
+    """Everything needed to generate items for one profile, computed once.
+
+    Shared through :func:`compile_profile`, so never modified after
+    construction.
+    """
+
+    __slots__ = ("profile", "field", "table", "sampler", "wordlist", "model", "random_len",
+                 "space", "capacity", "entropy")
+
+    def __init__(self, profile):
+        self.profile = profile
+        self.table = self.sampler = self.wordlist = self.model = None
+        self.random_len = 0
+        if profile.kind == "passphrase":
+            self.field = "passphrase"
+            self.wordlist = engine.load_wordlist(profile.wordlist)
+            self.sampler = passphrase.Sampler(self.wordlist, profile.style())
+            self.space = self.sampler.space
+        elif profile.kind == "pronounceable":
+            # Not uniform: entropy is the model's Shannon entropy, space the
+            # uniform count with the same collision odds, and capacity (at
+            # most) how many passwords can come out at all
+            self.field = "password"
+            self.random_len = max(0, profile.length - len(profile.keyword))
+            self.model = markov.load_model(profile.wordlist, profile.markov_order)
+            extra = self.random_len + 1 if profile.keyword else 1
+            self.space = self.model.collision_space(self.random_len) * extra
+            self.capacity = self.model.support(self.random_len) * extra
+            self.entropy = self.model.entropy(self.random_len) + math.log2(extra)
+            return
+        else:
+            self.field = "password"
+            self.random_len = max(0, profile.length - len(profile.keyword))
+            charset = engine.build_charset(
+                **{name: name in profile.classes for name in engine.CHARSETS})
+            if not charset:
+                raise ValueError("Please select at least one character set!")
+            rules = profile.policy()
+            if rules is not None:
+                self.sampler = policy.sampler(rules, self.random_len)
+            else:
+                self.table = rng.charset_table(charset)
+            self.space = unique.password_space(profile.length, charset, profile.keyword, rules)
+        self.capacity = self.space
+        self.entropy = math.log2(self.space)
+
+    @metrics.timed("profile.generate")
+    def generate(self, count):
+        profile = self.profile
+        if self.wordlist is not None:
+            return self.sampler.generate(count)
+        if self.model is not None:
+            parts = self.model.generate(count, self.random_len)
+        elif self.sampler is not None:
+            parts = self.sampler.generate(count)
+        else:
+            parts = rng.random_strings(count, self.random_len, self.table)
+        return engine.insert_keyword(parts, profile.keyword)
+
+
+def compile_profile(profile):
+    """The shared :class:`Generator` for ``profile``; raises ``ValueError``.
+
+    A wordlist or corpus file that changed since is compiled afresh, so a
+    long-running GUI or daemon picks up the edit without a restart.
+    """
+    source = None if profile.kind == "password" else cache.file_fingerprint(profile.wordlist)
+    return _compile_profile(profile, source)
+
+
+@lru_cache(maxsize=128)
+def _compile_profile(profile, source):
+    metrics.count("profile.compile")
+    return Generator(profile)
+
+
+compile_profile.cache_clear = _compile_profile.cache_clear
+
+
+# -- config.json --------------------------------------------------------------
+
+def read_config(path=CONFIG_FILE):
+    """The parsed config file, ``{}`` when there is none."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            config = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except json.JSONDecodeError as e:
+        raise ValueError(f"{path}: {e}") from None
+    if not isinstance(config, dict):
+        raise ValueError(f"{path}: expected a JSON object")
+    return config
+
+
+def load_profiles(path=CONFIG_FILE, errors=None):
+    """``{name: Profile}`` from ``path``.
+
+    A bad entry raises ``ValueError``; with a dict as ``errors`` it is
+    skipped instead and its message stored there under its name.
+    """
+    entries = read_config(path).get("profiles", {})
+    if not isinstance(entries, dict):
+        raise ValueError(f"{path}: profiles must be an object")
+    out = {}
+    for name, data in entries.items():
+        try:
+            out[name] = Profile.from_dict(data)
+        except ValueError as e:
+            if errors is None:
+                raise ValueError(f"{path}: profile {name!r}: {e}") from None
+            errors[name] = str(e)
+    return out
+
+
+def _write_config(path, config):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    text = json.dumps(config, indent=2, ensure_ascii=False) + "\n"
+    cache.atomic_write(path, [text.encode("utf-8")])
+
+
+def save_profile(name, profile, path=CONFIG_FILE):
+    """Add or replace profile ``name``, keeping everything else in the file.
+
+    The profile is checked as it will be read back, so what is saved loads.
+    """
+    Profile.from_dict(profile.to_dict())
+    config = read_config(path)
+    config.setdefault("profiles", {})[name] = profile.to_dict()
+    _write_config(path, config)
+
+
+def delete_profile(name, path=CONFIG_FILE):
+    config = read_config(path)
+    if config.get("profiles", {}).pop(name, None) is not None:
+        _write_config(path, config)
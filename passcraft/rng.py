@@ -0,0 +1,332 @@
+"""Batched CSPRNG sampling.
+
+Instead of one ``secrets.choice`` call per character, randomness is pulled
+from ``os.urandom`` in large buffers and mapped to indices with rejection
+sampling: a raw value ``v`` drawn uniformly from ``[0, 2**bits)`` is kept only
+if ``v < limit``, where ``limit`` is the largest multiple of ``k`` that fits,
+so ``v % k`` is exactly uniform over ``range(k)``. The result has the same
+distribution as ``secrets.choice`` / ``secrets.randbelow``.
+
+ASCII charsets are filtered and mapped in C with ``bytes.translate``. Index
+batches use NumPy when it is installed and the batch is large enough to pay
+for importing it; otherwise a ``memoryview`` loop does the same job.
+
+Interactive callers can :func:`use_pool` to take small draws from a
+pre-filled :class:`~passcraft.pool.EntropyPool` instead of calling
+``os.urandom`` each time. The GUI and the daemon do so when
+``$PASSCRAFT_ENTROPY_POOL`` is set. Charset tables are cached, so a single
+password costs one small draw and a ``translate``.
+"""
+
+import os
+from bisect import bisect_right
+from collections import namedtuple
+from contextlib import nullcontext
+from functools import lru_cache
+
+# Upper bound on a single os.urandom call, keeps memory bounded for huge batches
+MAX_BUFFER = 1 << 20
+# Smallest index batch worth handing to NumPy
+NUMPY_MIN_COUNT = 4096
+
+_np = False  # not imported yet
+_pool = None
+
+
+def numpy():
+    """Return the NumPy module, imported on first use, or ``None``.
+
+    Importing NumPy takes ~100 ms, which would dominate a short CLI run, so
+    it is only loaded once a caller actually has a large batch to process.
+    """
+    global _np
+    if _np is False:
+        try:
+            import numpy as np
+        except ImportError:  # optional dependency
+            np = None
+        _np = np
+    return _np
+
+
+def use_pool(pool=True):
+    """Route small draws through an entropy pool (``True`` creates one).
+
+    Pass ``None`` to go back to plain ``os.urandom``. Returns the pool.
+    """
+    global _pool
+    if pool is True:
+        from .pool import EntropyPool
+        pool = EntropyPool()
+    _pool = pool
+    return pool
+
+
+def use_pool_from_env():
+    """Enable the pool when ``$PASSCRAFT_ENTROPY_POOL`` is set (and not ``0``)."""
+    if os.environ.get("PASSCRAFT_ENTROPY_POOL", "0") != "0":
+        return use_pool()
+    return None
+
+
+def _random_bytes(n):
+    """``with _random_bytes(n) as buf``: ``n`` random bytes, valid inside the block."""
+    return nullcontext(os.urandom(n)) if _pool is None else _pool.draw(n)
+
+
+_WIDTHS = ((1 << 8, 1, "B"), (1 << 16, 2, "H"), (1 << 32, 4, "I"))
+
+
+def _width_for(k):
+    for span, nbytes, code in _WIDTHS:
+        if k <= span:
+            return span, nbytes, code
+    return None
+
+
+def _limit(k, span):
+    return span - span % k
+
+
+def random_indices(count, k):
+    """Return ``count`` independent uniform integers in ``range(k)``.
+
+    ``k`` may be any size; beyond 32 bits the values are Python ints.
+    """
+    if k <= 0:
+        raise ValueError("k must be positive")
+    if count <= 0:
+        return []
+    if k == 1:
+        return [0] * count
+
+    width = _width_for(k)
+    if width is None:
+        return _random_big(count, k)
+    span, nbytes, code = width
+    limit = _limit(k, span)
+    # Expected number of raw values needed, plus a little slack for rejections
+    want = int(count * span / limit) + 16
+    np = numpy() if count >= NUMPY_MIN_COUNT else None
+    out = []
+    while len(out) < count:
+        n = min(want, MAX_BUFFER // nbytes)
+        with _random_bytes(n * nbytes) as buf:
+            if np is not None:
+                raw = np.frombuffer(buf, dtype=np.dtype(code))
+                out.extend((raw if k == span else raw[raw < limit] % k).tolist())
+            else:
+                out.extend([v % k for v in memoryview(buf).cast(code) if v < limit])
+        want = int((count - len(out)) * span / limit) + 16
+    del out[count:]
+    return out
+
+
+def random_index_array(count, k):
+    """NumPy array counterpart of :func:`random_indices` for ``k`` up to ``2**32``.
+
+    Only call this when :func:`numpy` returned the module.
+    """
+    np = numpy()
+    if k <= 0:
+        raise ValueError("k must be positive")
+    if k == 1 or count <= 0:
+        return np.zeros(max(0, count), dtype=np.intp)
+    span, nbytes, code = _width_for(k)
+    limit = _limit(k, span)
+    parts = []
+    have = 0
+    while have < count:
+        n = min(int((count - have) * span / limit) + 16, MAX_BUFFER // nbytes)
+        with _random_bytes(n * nbytes) as buf:
+            raw = np.frombuffer(buf, dtype=np.dtype(code))
+            parts.append((raw if k == span else raw[raw < limit] % k).astype(np.intp))
+        have += len(parts[-1])
+    return np.concatenate(parts)[:count]
+
+
+def random_uint32_array(count):
+    """``count`` uniform 32-bit values as a NumPy ``uint32`` array.
+
+    The random buffer as is, with no rejection or widening. Only call this
+    when :func:`numpy` returned the module.
+    """
+    np = numpy()
+    parts = [np.empty(0, dtype=np.uint32)]
+    step = MAX_BUFFER // 4
+    for done in range(0, count, step):
+        with _random_bytes(4 * min(step, count - done)) as buf:
+            parts.append(np.frombuffer(buf, dtype=np.uint32).copy())
+    return np.concatenate(parts)
+
+
+def _random_big(count, k):
+    # 64 spare bits make a rejection (and a second buffer) a 2**-64 event
+    nbytes = (k.bit_length() + 64 + 7) // 8
+    limit = _limit(k, 1 << (8 * nbytes))
+    out = []
+    while len(out) < count:
+        n = min(count - len(out), max(1, MAX_BUFFER // nbytes))
+        with _random_bytes(n * nbytes) as buf:
+            buf = bytes(buf)
+        for pos in range(0, n * nbytes, nbytes):
+            v = int.from_bytes(buf[pos:pos + nbytes], "little")
+            if v < limit:
+                out.append(v % k)
+    return out
+
+
+def random_below(bounds):
+    """One uniform integer in ``range(b)`` for every ``b`` in ``bounds``.
+
+    Bounds may differ from value to value (up to ``2**32``), as in a
+    Fisher-Yates shuffle. A NumPy array of bounds gives a NumPy array back.
+    """
+    if type(bounds).__module__ == "numpy":
+        np = numpy()
+        bounds = bounds.astype(np.uint64)
+        out = np.empty(len(bounds), dtype=np.uint64)
+        todo = np.arange(len(bounds))
+        while len(todo):
+            b = bounds[todo]
+            with _random_bytes(4 * len(todo)) as buf:
+                raw = np.frombuffer(buf, dtype=np.uint32).astype(np.uint64)
+            ok = raw < np.uint64(1 << 32) - np.uint64(1 << 32) % b
+            out[todo[ok]] = raw[ok] % b[ok]
+            todo = todo[~ok]
+        return out
+    bounds = list(bounds)
+    out = [0] * len(bounds)
+    todo = range(len(bounds))
+    while todo:
+        with _random_bytes(4 * len(todo)) as buf:
+            raw = memoryview(bytes(buf)).cast("I")
+        redo = []
+        for i, v in zip(todo, raw):
+            b = bounds[i]
+            if v < (1 << 32) - (1 << 32) % b:
+                out[i] = v % b
+            else:
+                redo.append(i)
+        todo = redo
+    return out
+
+
+class WeightedIndex:
+    """Exact sampler of ``k`` with weight ``cumulative[k] - cumulative[k - 1]``.
+
+    The weights are arbitrary-size integers, so float rounding never skews
+    them. The total is scaled to just under ``2**(bits + 64)``; with NumPy
+    the top 64 bits of each draw pick the index by one ``searchsorted``, and
+    only a draw whose top bits equal a boundary's (a ~``len / 2**64``
+    event) reads its low bits to decide.
+    """
+
+    def __init__(self, cumulative):
+        self.cumulative = list(cumulative)
+        self.total = self.cumulative[-1]
+        bits = self.total.bit_length() + 64
+        self._shift = bits - 64
+        self._scaled = [c * (((1 << bits) - 1) // self.total) for c in self.cumulative]
+        self._tops = None
+
+    def __len__(self):
+        return len(self.cumulative)
+
+    def sample(self, count):
+        """``count`` indices as a list."""
+        cumulative = self.cumulative
+        return [bisect_right(cumulative, x) for x in random_indices(count, self.total)]
+
+    def sample_array(self, count):
+        """``count`` indices as a NumPy array; only call this when NumPy is available."""
+        np = numpy()
+        if self._tops is None:
+            self._tops = np.array([c >> self._shift for c in self._scaled], dtype=np.uint64)
+        tops, last = self._tops, len(self._scaled) - 1
+        limit, shift = self._scaled[-1], self._shift
+        out = np.empty(count, dtype=np.intp)
+        todo = np.arange(count)
+        while len(todo):
+            with _random_bytes(8 * len(todo)) as buf:
+                top = np.frombuffer(buf, dtype=np.uint64).copy()
+            index = np.searchsorted(tops, top)
+            clear = (top < tops[last]) & (tops[np.minimum(index, last)] != top)
+            out[todo[clear]] = index[clear]
+            retry = []
+            for t, u in zip(todo[~clear].tolist(), top[~clear].tolist()):
+                with _random_bytes((shift + 7) // 8) as buf:
+                    x = u << shift | int.from_bytes(buf, "little") & ((1 << shift) - 1)
+                if x < limit:
+                    out[t] = bisect_right(self._scaled, x)
+                else:
+                    retry.append(t)
+            todo = np.array(retry, dtype=np.intp)
+        return out
+
+
+CharsetTable = namedtuple("CharsetTable", "chars table reject limit")
+CharsetTable.__doc__ = """A compiled ASCII charset; see :func:`charset_table`."""
+
+
+@lru_cache(maxsize=64)
+def charset_table(charset):
+    """Compile an ASCII ``charset`` of up to 256 characters for sampling.
+
+    ``limit`` is the rejection threshold: random bytes below it map to
+    ``charset[b % len(charset)]`` through ``table``, and the ``reject``
+    bytes (the rest) are deleted by the same ``bytes.translate`` call.
+    """
+    k = len(charset)
+    limit = _limit(k, 256)
+    codes = charset.encode("ascii")
+    table = bytes(codes[b % k] if b < limit else 0 for b in range(256))
+    return CharsetTable(charset, table, bytes(range(limit, 256)), limit)
+
+
+def _random_ascii(total, compiled):
+    table, reject, limit = compiled.table, compiled.reject, compiled.limit
+    chunks = []
+    have = 0
+    while have < total:
+        n = min(int((total - have) * 256 / limit) + 16, MAX_BUFFER)
+        with _random_bytes(n) as buf:
+            chunk = bytes(buf).translate(table, reject)
+        chunks.append(chunk)
+        have += len(chunk)
+    return b"".join(chunks)[:total].decode("ascii")
+
+
+def random_string(length, charset):
+    """Return a string of ``length`` characters drawn uniformly from ``charset``."""
+    return random_strings(1, length, charset)[0] if length > 0 else ""
+
+
+def random_strings(count, length, charset):
+    """Return ``count`` random strings of ``length`` characters from ``charset``.
+
+    ``charset`` is a string or a :func:`charset_table` compiled from one.
+    """
+    compiled = charset if isinstance(charset, CharsetTable) else None
+    if compiled is not None:
+        charset = compiled.chars
+    if not charset:
+        raise ValueError("charset must not be empty")
+    if count <= 0:
+        return []
+    if length <= 0:
+        return [""] * count
+
+    total = count * length
+    if compiled is None and len(charset) <= 256 and charset.isascii():
+        compiled = charset_table(charset)
+    if compiled is not None:
+        blob = _random_ascii(total, compiled)
+    else:
+        blob = "".join([charset[i] for i in random_indices(total, len(charset))])
+    return [blob[i:i + length] for i in range(0, total, length)]
+
+
+def randbelow(k):
+    """Single-value counterpart of ``secrets.randbelow`` drawn from the same source."""
+    return random_indices(1, k)[0]
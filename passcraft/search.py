@@ -0,0 +1,406 @@
+"""In-memory search index over saved entries, stored column by column.
+
+Each entry takes a slot in a few parallel arrays rather than a dict or a
+tuple of its own:
+
+* ids: record ids, ascending, so an id is found with ``bisect``;
+* names: the lower-cased names as UTF-8, back to back in one ``bytearray``
+  (an arena) with an array of start offsets. Each name is followed by a
+  ``0xff`` byte, which never occurs in UTF-8, so a match never spans two
+  names;
+* types: one byte per slot, a code into the handful of type names;
+* dates: the timestamps.
+
+Names are looked up through trigram postings: for every three-byte
+sequence, the ascending slots of the names containing it. A query reads
+the shortest posting of its trigrams and checks only those names. Queries
+shorter than three characters match name prefixes instead, which are a
+range of the name order.
+
+Orders are sorted arrays per type and for all entries together: the ids
+themselves, and the slots by ``(date, id)`` and by ``(name, id)``. The date and name orders
+are built on first use. A type filter, a date range or a name prefix is
+one slice of an order, so the common queries never visit entries outside
+their result; combined filters start from the smallest candidate set.
+Large candidate sets are filtered and sorted with NumPy when it is
+installed.
+
+Removed entries are only marked dead in ``types`` (postings skip them)
+and dropped from the orders; everything is rebuilt once too many dead
+entries accumulate, or when a deleted id is reused.
+"""
+
+from array import array
+from bisect import bisect_left, insort
+from itertools import accumulate, compress, repeat
+
+from . import rng
+from .store import date_span
+
+# Rebuild the columns when dead entries exceed this share of the live ones
+COMPACT_RATIO = 0.5
+# Type code of a removed entry
+DEAD = 255
+# Build postings with NumPy from this many entries, when it is installed
+NUMPY_MIN_ENTRIES = 10_000
+_END = b"\xff"
+
+
+def _encode(text):
+    return text.encode("utf-8", "surrogatepass")
+
+
+def _trigrams(name):
+    return {name[i:i + 3] for i in range(len(name) - 2)}
+
+
+class SearchIndex:
+    def __init__(self, records=()):
+        self.type_names = []           # type code -> type
+        self._codes = {}               # type -> type code
+        self._bulk_load(records)
+
+    def __len__(self):
+        return self._live
+
+    def _load(self, ids, names, types, dates):
+        """Fill the columns from lists in strictly ascending id order."""
+        codes = self._codes
+        for type_ in set(types).difference(codes):
+            codes[type_] = len(self.type_names)
+            self.type_names.append(type_)
+        if len(codes) >= DEAD:
+            raise ValueError(f"at most {DEAD} record types can be indexed")
+        encoded = [_encode(name) for name in names]
+        self.ids = array("q", ids)     # slot -> record id
+        self.dates = array("q", dates)  # slot -> timestamp
+        self.types = bytearray(map(codes.__getitem__, types))  # slot -> code, DEAD once removed
+        self._arena = bytearray(_END.join(encoded) + _END if encoded else b"")
+        # slot -> start of its name, plus the end of the arena
+        self._starts = array("q", accumulate((len(e) + 1 for e in encoded), initial=0))
+        self._postings = self._build_postings(encoded)  # trigram -> ascending slots
+        self._orders = {}              # (type code or None, column) -> slots
+        self._live = len(ids)
+        self._dead = 0
+
+    def _build_postings(self, encoded):
+        np = rng.numpy() if len(encoded) >= NUMPY_MIN_ENTRIES else None
+        if np is None:
+            postings = {}
+            for slot, name in enumerate(encoded):
+                for gram in _trigrams(name):
+                    slots = postings.get(gram)
+                    if slots is None:
+                        postings[gram] = array("i", (slot,))
+                    else:
+                        slots.append(slot)
+            return postings
+        # Every three-byte window of the arena as (trigram << 32 | slot), minus
+        # those that cross a name end; sorting them groups the postings
+        data = np.frombuffer(self._arena, np.uint8).astype(np.int64)
+        grams = (data[:-2] << 16) | (data[1:-1] << 8) | data[2:]
+        inside = (data[:-2] != 0xff) & (data[1:-1] != 0xff) & (data[2:] != 0xff)
+        lengths = np.frombuffer(self._starts, np.int64)
+        slots = np.repeat(np.arange(len(encoded), dtype=np.int64), np.diff(lengths))[:-2]
+        keys = (grams[inside] << 32) | slots[inside]
+        del data, grams, inside, slots
+        if not len(keys):
+            return {}
+        keys.sort()
+        keys = keys[np.concatenate(([True], keys[1:] != keys[:-1]))]  # once per name
+        grams = keys >> 32
+        slots = (keys & 0xffffffff).astype(np.int32)
+        bounds = np.concatenate(([0], np.flatnonzero(np.diff(grams)) + 1, [len(keys)])).tolist()
+        return {gram.to_bytes(3, "big"): array("i", slots[lo:hi].tobytes())
+                for gram, lo, hi in zip(grams[bounds[:-1]].tolist(), bounds, bounds[1:])}
+
+    def _name(self, slot):
+        return self._arena[self._starts[slot]:self._starts[slot + 1] - 1]
+
+    def _slot(self, record_id):
+        """The live slot of ``record_id``, else ``None``."""
+        slot = bisect_left(self.ids, record_id)
+        if slot < len(self.ids) and self.ids[slot] == record_id and self.types[slot] != DEAD:
+            return slot
+        return None
+
+    def _sort_key(self, column):
+        """Key of a slot in the ``column`` order; ``None`` for id order."""
+        if column == "date":
+            dates = self.dates
+            return lambda slot: (dates[slot], slot)
+        if column == "name":
+            return lambda slot: (self._name(slot), slot)
+        return None
+
+    def _order(self, group, column):
+        """Entries of ``group`` (a type code, or None for all) sorted by
+        ``column``: the ids themselves for ``id``, else their slots."""
+        order = self._orders.get((group, column))
+        if order is None:
+            test = DEAD.__ne__ if group is None else group.__eq__
+            if column == "id":
+                order = array("q", compress(self.ids, map(test, self.types)))
+            else:
+                order = array("i", compress(range(len(self.ids)), map(test, self.types)))
+            if column == "date":
+                order = array("i", sorted(order, key=self.dates.__getitem__))  # stable
+            elif column == "name":
+                order = array("i", sorted(order, key=self._name))
+            self._orders[group, column] = order
+        return order
+
+    def _ids(self, slots, descending=False):
+        """The ids at ``slots``, an array of slots, as an array."""
+        if descending:
+            slots = slots[::-1]
+        np = rng.numpy() if len(slots) >= NUMPY_MIN_ENTRIES else None
+        if np is None:
+            return array("q", map(self.ids.__getitem__, slots))
+        return array("q", np.frombuffer(self.ids, np.int64)[np.frombuffer(slots, np.int32)]
+                     .tobytes())
+
+    # -- updates ------------------------------------------------------------
+
+    def _bulk_load(self, records):
+        # Column lists first, then every array in one go
+        ids, names, types, dates = [], [], [], []
+        for record in records:
+            ids.append(record.id)
+            names.append(record.name.lower())
+            types.append(record.type)
+            dates.append(record.date)
+        self._fill(ids, names, types, dates)
+
+    def _fill(self, ids, names, types, dates):
+        if any(b <= a for a, b in zip(ids, ids[1:])):
+            # Out of order or repeated: keep the last entry per id
+            entries = sorted({entry[0]: entry for entry in zip(ids, names, types, dates)}.values())
+            ids, names, types, dates = map(list, zip(*entries))
+        self._load(ids, names, types, dates)
+
+    def _rebuild(self, extra=None):
+        """Reload the live entries (and an ``extra`` one) into fresh arrays."""
+        live = list(compress(range(len(self.ids)), map(DEAD.__ne__, self.types)))
+        columns = ([self.ids[s] for s in live],
+                   [self._name(s).decode("utf-8", "surrogatepass") for s in live],
+                   [self.type_names[self.types[s]] for s in live],
+                   [self.dates[s] for s in live])
+        if extra is not None:
+            for column, value in zip(columns, extra):
+                column.append(value)
+        self._fill(*columns)
+
+    def add(self, record):
+        entry = (record.id, record.name.lower(), record.type, record.date)
+        if self.ids and record.id <= self.ids[-1]:
+            self._rebuild(entry)  # a deleted id came back
+            return
+        code = self._codes.get(record.type)
+        if code is None:
+            code = self._codes[record.type] = len(self.type_names)
+            self.type_names.append(record.type)
+        slot = len(self.ids)
+        name = _encode(entry[1])
+        self.ids.append(record.id)
+        self.dates.append(record.date)
+        self.types.append(code)
+        self._arena += name + _END
+        self._starts.append(len(self._arena))
+        postings = self._postings
+        for gram in _trigrams(name):
+            slots = postings.get(gram)
+            if slots is None:
+                postings[gram] = array("i", (slot,))
+            else:
+                slots.append(slot)
+        for (group, column), order in self._orders.items():
+            if group is None or group == code:
+                insort(order, record.id if column == "id" else slot, key=self._sort_key(column))
+        self._live += 1
+
+    def remove(self, record_id):
+        slot = self._slot(record_id)
+        if slot is None:
+            return
+        code = self.types[slot]
+        for (group, column), order in self._orders.items():
+            if group is None or group == code:
+                key = self._sort_key(column)
+                target = record_id if key is None else key(slot)
+                del order[bisect_left(order, target, key=key)]
+        self.types[slot] = DEAD
+        self._live -= 1
+        self._dead += 1
+        if self._dead > COMPACT_RATIO * max(self._live, 1000):
+            self._rebuild()
+
+    def clear(self):
+        self.__init__()
+
+    # -- queries ------------------------------------------------------------
+
+    def search(self, text="", type=None, date_from=None, date_to=None, column="id",
+               descending=False):
+        """Return an array of the ids matching every given filter, sorted by
+        ``column`` (``name``, ``type`` or ``date``, then id; anything else is
+        id order).
+
+        ``text`` matches anywhere in the name (case-insensitive); queries
+        shorter than three characters match the start of the name. Dates are
+        ``YYYY[-MM[-DD[ HH:MM]]]`` prefixes naming a period, so a bare day
+        such as ``"2025-03-01"`` works for both bounds (``date_to`` is
+        inclusive); a bound that is not a date matches nothing.
+        """
+        text = text.strip().lower()
+        group = None
+        if type:
+            group = self._codes.get(type)
+            if group is None:
+                return array("q")
+        try:
+            start = date_span(date_from)[0] if date_from else None
+            end = date_span(date_to)[1] if date_to else None
+        except ValueError:
+            return array("q")
+        needle = _encode(text)
+        prefix = needle if text and len(text) < 3 else None
+
+        # Slices of an order, each exactly one filter's matches
+        slices = []
+        if prefix is not None:
+            slices.append(("name", self._prefix_range(group, prefix)))
+        if start is not None or end is not None:
+            slices.append(("date", self._date_range(group, start, end)))
+        if not text and not slices:
+            return self._whole(group, column, descending)
+        if len(slices) == 1 and len(text) < 3 and slices[0][0] == column:
+            return self._ids(slices[0][1], descending)  # the slice is the result
+        # Start from the fewest candidates, then check the other filters
+        if len(text) >= 3:
+            slots = self._postings_of(needle)[0]
+            source = "text"
+        else:
+            slots = source = None
+        for slice_column, matches in slices:
+            if slots is None or len(matches) < len(slots):
+                slots, source = matches, slice_column
+        if source == "text" and len(needle) == 3:
+            needle = None  # a single trigram's posting holds exactly its matches
+        slots = self._matches(slots, group,
+                              None if source == "date" else start,
+                              None if source == "date" else end,
+                              None if source == "name" else prefix,
+                              needle if len(text) >= 3 else None)
+        return self._ordered(slots, group, column, descending)
+
+    def _whole(self, group, column, descending):
+        if column == "date" or column == "name":
+            return self._ids(self._order(group, column), descending)
+        if column == "type" and group is None:
+            # Each type's ids, in type name order
+            ids = array("q")
+            for code in sorted(range(len(self.type_names)), key=self.type_names.__getitem__):
+                ids += self._order(code, "id")
+        else:
+            ids = self._order(group, "id")
+        return ids[::-1] if descending else ids[:]
+
+    def _prefix_range(self, group, prefix):
+        order, key = self._order(group, "name"), self._sort_key("name")
+        lo = bisect_left(order, (prefix,), key=key)
+        hi = bisect_left(order, (prefix + _END,), key=key)
+        return order[lo:hi]
+
+    def _date_range(self, group, start, end):
+        order, key = self._order(group, "date"), self._sort_key("date")
+        lo = bisect_left(order, (start,), key=key) if start is not None else 0
+        hi = bisect_left(order, (end,), key=key) if end is not None else len(order)
+        return order[lo:hi]
+
+    def _postings_of(self, needle):
+        """The postings of the trigrams of ``needle``, shortest first."""
+        postings = []
+        for gram in _trigrams(needle):
+            slots = self._postings.get(gram)
+            if slots is None:
+                return [array("i")]
+            postings.append(slots)
+        return sorted(postings, key=len)
+
+    def _matches(self, slots, group, start, end, prefix, needle):
+        """The ascending live slots among ``slots`` that pass every filter."""
+        arena, starts = self._arena, self._starts
+        np = rng.numpy() if len(slots) >= NUMPY_MIN_ENTRIES else None
+        if np is None:
+            types, dates = self.types, self.dates
+            test = DEAD.__ne__ if group is None else group.__eq__
+            slots = sorted(compress(slots, map(test, map(types.__getitem__, slots))))
+            if start is not None:
+                slots = list(compress(slots, map(start.__le__, map(dates.__getitem__, slots))))
+            if end is not None:
+                slots = list(compress(slots, map(end.__gt__, map(dates.__getitem__, slots))))
+        else:
+            slots = np.frombuffer(slots, np.int32)
+            types = np.frombuffer(self.types, np.uint8)[slots]
+            keep = types != DEAD if group is None else types == group
+            if start is not None or end is not None:
+                dates = np.frombuffer(self.dates, np.int64)[slots]
+                if start is not None:
+                    keep &= dates >= start
+                if end is not None:
+                    keep &= dates < end
+            if needle is not None:
+                # Only names holding every trigram can match; one trigram is exact
+                for posting in self._postings_of(needle):
+                    member = np.zeros(len(self.ids), bool)
+                    member[np.frombuffer(posting, np.int32)] = True
+                    keep &= member[slots]
+                if len(needle) == 3:
+                    needle = None
+            slots = np.sort(slots[keep])
+            if prefix is None and needle is None:
+                return array("i", slots.tobytes())
+            slots = slots.tolist()
+        # Names are checked one by one, each in C
+        if prefix is not None:
+            slots = list(compress(slots, map(arena.startswith, repeat(prefix),
+                                             map(starts.__getitem__, slots))))
+        if needle is not None:
+            ends = map(starts.__getitem__, map((1).__add__, slots))
+            found = map(arena.find, repeat(needle), map(starts.__getitem__, slots), ends)
+            slots = list(compress(slots, map((-1).__lt__, found)))
+        return array("i", slots)
+
+    def _ordered(self, slots, group, column, descending):
+        """The ids at ascending ``slots``, sorted by ``column``."""
+        if column == "type" and group is not None:
+            column = "id"  # a single type
+        if column not in ("date", "name", "type"):
+            return self._ids(slots, descending)
+        np = rng.numpy() if len(slots) >= NUMPY_MIN_ENTRIES else None
+        if column != "type" and (np is not None or len(slots) * 4 > self._live):
+            # Many slots: pick them out of the sorted order instead of sorting
+            order = self._order(group, column)
+            if np is None:
+                wanted = set(slots)
+                slots = array("i", compress(order, map(wanted.__contains__, order)))
+            else:
+                wanted = np.zeros(len(self.ids), bool)
+                wanted[np.frombuffer(slots, np.int32)] = True
+                order = np.frombuffer(order, np.int32)
+                slots = array("i", order[wanted[order]].tobytes())
+                del order
+            return self._ids(slots, descending)
+        # Slots ascend with ids, so a stable sort breaks ties by id
+        slots = slots.tolist()
+        if descending:
+            slots.reverse()
+        if column == "name":
+            slots.sort(key=self._name, reverse=descending)
+        elif column == "type":
+            names, types = self.type_names, self.types
+            slots.sort(key=lambda s: names[types[s]], reverse=descending)
+        else:
+            slots.sort(key=self.dates.__getitem__, reverse=descending)
+        return self._ids(array("i", slots))
@@ -0,0 +1,328 @@
+"""SQLite-backed storage for saved passwords.
+
+Each save or delete is a single-row statement in its own transaction, so the
+cost no longer grows with the number of saved entries. The database runs in
+WAL mode with ``synchronous=FULL``: every commit is atomic and survives a
+crash or power loss, and readers never block the writer.
+
+Reads return :class:`Record` objects: slotted, with the ``type`` string
+interned and ``date`` a Unix timestamp, which is also how dates are stored.
+Dates are formatted (:func:`format_date`) only for display and export.
+
+On first open, entries from the old ``saved_passwords.json`` are imported in
+one transaction and the JSON file is renamed to ``*.migrated``. Encrypted
+vaults (:mod:`passcraft.vault`) use the same schema; they overwrite and
+delete the JSON file (and any ``*.migrated`` copy) instead, so no plaintext
+copy of the passwords is left next to them.
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+
+from . import metrics
+
+FIELDS = ("name", "password", "type", "date")
+# Columns the Saved view can sort by; "id" is save order
+SORT_COLUMNS = ("id",) + FIELDS
+SCHEMA_VERSION = 4
+DATE_FORMAT = "%Y-%m-%d %H:%M"
+_SELECT = "SELECT id, name, password, type, date FROM passwords"
+# Periods a date prefix can name, most specific first
+_DATE_PREFIXES = ("%Y-%m-%d %H:%M", "%Y-%m-%d", "%Y-%m", "%Y")
+
+
+def classify(password):
+    return 'passphrase' if ' ' in password or '-' in password else 'password'
+
+
+def format_date(stamp):
+    """``YYYY-MM-DD HH:MM`` in local time for a stored timestamp."""
+    return time.strftime(DATE_FORMAT, time.localtime(stamp))
+
+
+def date_span(text):
+    """``(start, end)`` timestamps of the local-time period a
+    ``YYYY[-MM[-DD[ HH:MM]]]`` prefix names, ``end`` excluded; raises
+    ``ValueError``."""
+    text = text.strip()
+    for fmt in _DATE_PREFIXES:
+        try:
+            start = datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+        if fmt == "%Y":
+            end = start.replace(year=start.year + 1)
+        elif fmt == "%Y-%m":
+            end = start.replace(year=start.year + start.month // 12, month=start.month % 12 + 1)
+        else:
+            end = start + (timedelta(days=1) if fmt == "%Y-%m-%d" else timedelta(minutes=1))
+        return int(start.timestamp()), int(end.timestamp())
+    raise ValueError(f"not a date: {text!r}")
+
+
+class Record:
+    """One saved entry. Fields read as attributes or, like the dicts records
+    used to be, as ``record["name"]``."""
+
+    __slots__ = ("id",) + FIELDS
+
+    def __init__(self, id, name, password, type, date):
+        self.id = id
+        self.name = name
+        self.password = password
+        self.type = sys.intern(type)  # a handful of values shared by every record
+        self.date = date
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __repr__(self):
+        return f"Record(id={self.id!r}, name={self.name!r}, type={self.type!r}, date={self.date!r})"
+
+
+class PasswordStore:
+    def __init__(self, path, legacy_json=None):
+        self.path = path
+        self.conn = sqlite3.connect(path, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=FULL")
+        self._create_schema()
+        if legacy_json:
+            self.migrate_json(legacy_json)
+
+    def _create_schema(self):
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+        with self.transaction():
+            if version < 1:
+                self.conn.execute("""
+                    CREATE TABLE IF NOT EXISTS passwords (
+                        id INTEGER PRIMARY KEY,
+                        name TEXT NOT NULL,
+                        password TEXT NOT NULL,
+                        type TEXT NOT NULL,
+                        date TEXT NOT NULL
+                    )""")
+            if version < 2:
+                # Indexes for sorted, keyset-paginated views
+                for column in ("name", "type", "date"):
+                    self.conn.execute(f"CREATE INDEX IF NOT EXISTS passwords_{column} "
+                                      f"ON passwords ({column}, id)")
+            if version < 3:
+                # Encrypted vaults (see passcraft.vault) keep passwords in chunks
+                self.conn.execute("ALTER TABLE passwords ADD COLUMN chunk_id INTEGER")
+                self.conn.execute("CREATE INDEX passwords_chunk ON passwords (chunk_id)")
+                self.conn.execute("""
+                    CREATE TABLE vault_chunks (
+                        id INTEGER PRIMARY KEY,
+                        nonce BLOB NOT NULL,
+                        data BLOB NOT NULL
+                    )""")
+                self.conn.execute("CREATE TABLE vault_meta (key TEXT PRIMARY KEY, value)")
+            if version < 4:
+                self._migrate_dates()
+            self.conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    def _migrate_dates(self):
+        """Rebuild the table with ``date`` as an INTEGER timestamp.
+
+        SQLite cannot change a column's type in place, and a TEXT column
+        would turn stored integers back into strings.
+        """
+        self.conn.execute("""
+            CREATE TABLE passwords_v4 (
+                id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                password TEXT NOT NULL,
+                type TEXT NOT NULL,
+                date INTEGER NOT NULL,
+                chunk_id INTEGER
+            )""")
+        # The old strings are local time, so 'utc' converts them before '%s';
+        # unreadable ones get the current time, as on import
+        self.conn.execute("""
+            INSERT INTO passwords_v4
+            SELECT id, name, password, type,
+                   COALESCE(CAST(strftime('%s', date, 'utc') AS INTEGER),
+                            CAST(strftime('%s', 'now') AS INTEGER)), chunk_id
+            FROM passwords""")
+        self.conn.execute("DROP TABLE passwords")
+        self.conn.execute("ALTER TABLE passwords_v4 RENAME TO passwords")
+        for column in ("name", "type", "date"):
+            self.conn.execute(f"CREATE INDEX passwords_{column} ON passwords ({column}, id)")
+        self.conn.execute("CREATE INDEX passwords_chunk ON passwords (chunk_id)")
+
+    def is_encrypted(self):
+        return self.conn.execute("SELECT 1 FROM vault_meta WHERE key = 'kdf'").fetchone() is not None
+
+    def transaction(self):
+        return _Transaction(self.conn)
+
+    def close(self):
+        self.conn.close()
+
+    def reopen(self):
+        """Another handle on the same database, for use on another thread.
+
+        SQLite connections stay on the thread that opened them, so a worker
+        calls this itself and closes the result when done.
+        """
+        return PasswordStore(self.path)
+
+    # -- reads --------------------------------------------------------------
+
+    @metrics.timed("store.count")
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM passwords").fetchone()[0]
+
+    def get(self, record_id):
+        row = self.conn.execute(f"{_SELECT} WHERE id = ?", (record_id,)).fetchone()
+        return Record(*row) if row else None
+
+    def records(self):
+        """Iterate over all :class:`Record` objects in save order."""
+        for row in self.conn.execute(f"{_SELECT} ORDER BY id"):
+            yield Record(*row)
+
+    @metrics.timed("store.get_many")
+    def get_many(self, ids):
+        """Return ``{id: record}`` for the given ids (missing ids are skipped)."""
+        ids = list(ids)
+        found = {}
+        # Stay below SQLite's bound-parameter limit
+        for i in range(0, len(ids), 500):
+            chunk = ids[i:i + 500]
+            marks = ",".join("?" * len(chunk))
+            for row in self.conn.execute(f"{_SELECT} WHERE id IN ({marks})", chunk):
+                found[row[0]] = Record(*row)
+        return found
+
+    @metrics.timed("store.page_ids")
+    def page_ids(self, column="id", descending=False, after=None, limit=1000):
+        """Return up to ``limit`` ``(key, id)`` pairs in sort order.
+
+        ``after`` is the last ``(key, id)`` of the previous page (keyset
+        pagination), so every page costs the same regardless of its depth.
+        """
+        if column not in SORT_COLUMNS:
+            raise ValueError(f"cannot sort by {column!r}")
+        direction = "DESC" if descending else "ASC"
+        compare = "<" if descending else ">"
+        where, params = "", []
+        if after is not None:
+            if column == "id":
+                where, params = f"WHERE id {compare} ?", [after[1]]
+            else:
+                where, params = f"WHERE ({column}, id) {compare} (?, ?)", list(after)
+        rows = self.conn.execute(
+            f"SELECT {column}, id FROM passwords {where} "
+            f"ORDER BY {column} {direction}, id {direction} LIMIT ?", params + [limit])
+        return [tuple(row) for row in rows]
+
+    # -- writes -------------------------------------------------------------
+
+    @metrics.timed("store.add")
+    def add(self, name, password, type, date=None):
+        """Insert one record and return it, including its new ``id``.
+
+        ``date`` is a Unix timestamp, now by default.
+        """
+        date = int(time.time()) if date is None else date
+        with self.transaction():
+            cur = self.conn.execute(
+                "INSERT INTO passwords (name, password, type, date) VALUES (?, ?, ?, ?)",
+                (name, password, type, date))
+        return Record(cur.lastrowid, name, password, type, date)
+
+    @metrics.timed("store.add_many")
+    def add_many(self, records):
+        """Insert records (dicts or :class:`Record`) in a single transaction."""
+        with self.transaction():
+            cur = self.conn.executemany(
+                "INSERT INTO passwords (name, password, type, date) VALUES (?, ?, ?, ?)",
+                ((r["name"], r["password"], r["type"], r["date"]) for r in records))
+        return cur.rowcount
+
+    @metrics.timed("store.delete")
+    def delete(self, record_id):
+        with self.transaction():
+            self.conn.execute("DELETE FROM passwords WHERE id = ?", (record_id,))
+
+    @metrics.timed("store.clear")
+    def clear(self):
+        with self.transaction():
+            self.conn.execute("DELETE FROM passwords")
+
+    # -- migration ----------------------------------------------------------
+
+    def migrate_json(self, json_path):
+        """One-time import of the legacy JSON file; returns the number imported."""
+        encrypted = self.is_encrypted()
+        if encrypted and os.path.exists(json_path + ".migrated"):
+            _shred(json_path + ".migrated")  # already imported, before encryption
+        if not os.path.exists(json_path) or self.count():
+            return 0
+        try:
+            with open(json_path, "r") as f:
+                records = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        if not isinstance(records, list):
+            return 0  # not a legacy export; left alone
+        records = [r for r in records if isinstance(r, dict)
+                   and all(isinstance(r.get(k), str) for k in FIELDS)]
+        now = int(time.time())
+        for r in records:
+            try:
+                r["date"] = date_span(r["date"])[0]
+            except ValueError:
+                r["date"] = now
+        self.add_many(records)
+        if encrypted:
+            _shred(json_path)
+        else:
+            os.replace(json_path, json_path + ".migrated")
+        return len(records)
+
+
+def _shred(path):
+    """Overwrite ``path`` with zeros, then delete it.
+
+    Best effort: copy-on-write filesystems, SSD wear levelling and backups
+    may still hold the old contents.
+    """
+    with open(path, "r+b") as f:
+        size = f.seek(0, os.SEEK_END)
+        f.seek(0)
+        while size > 0:
+            size -= f.write(bytes(min(size, 1 << 20)))
+        f.flush()
+        os.fsync(f.fileno())
+    os.remove(path)
+
+
+class _Transaction:
+    """``BEGIN IMMEDIATE`` ... ``COMMIT``, rolled back if the block raises."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type:
+            self.conn.execute("ROLLBACK")
+        else:
+            with metrics.timer("store.commit"):  # includes the fsync
+                self.conn.execute("COMMIT")
+        return False
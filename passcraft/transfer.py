@@ -0,0 +1,323 @@
+"""Streaming export and import of saved passwords.
+
+Exports are written in chunks straight from a record iterator. Imports read
+CSV, JSON and JSON-lines files incrementally, understand the column names
+used by common browser and password-manager exports, drop duplicates on the
+fly and commit to the store in batches. Memory stays bounded by the batch
+size plus an 8-byte digest per distinct entry.
+
+Both directions report progress through an optional ``progress(done, total)``
+callback (``total`` may be ``None`` when unknown); returning ``False`` from it
+stops the transfer after the current chunk. Imports first report reading
+the store's own entries for de-duplication (``total`` is the store's size),
+then every ``CHUNK_SIZE`` rows read, new or not, and keep the rows accepted
+so far.
+"""
+
+import csv
+import hashlib
+import json
+import os
+import time
+from datetime import datetime
+
+from . import metrics
+from .store import FIELDS, classify, date_span, format_date
+
+EXPORT_FORMATS = ("json", "jsonl", "csv")
+CSV_HEADER = ["Name", "Password", "Type", "Date"]
+CHUNK_SIZE = 1000
+BATCH_SIZE = 5000
+
+# Header aliases (lower-cased) used by browser and password-manager exports,
+# in order of preference
+NAME_COLUMNS = ("name", "title", "account", "login_name")
+URL_COLUMNS = ("url", "login_uri", "origin_url", "web site", "website", "hostname", "site")
+USERNAME_COLUMNS = ("username", "login_username", "login name", "user", "email")
+PASSWORD_COLUMNS = ("password", "login_password", "pass")
+TYPE_COLUMNS = ("type",)
+DATE_COLUMNS = ("date", "created", "date_created", "timecreated", "creationtime", "modified")
+# Members holding the list in JSON exports that wrap it in an object
+WRAPPER_KEYS = ("items", "passwords", "entries")
+
+
+def format_for_path(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        return "csv"
+    if ext in (".jsonl", ".ndjson"):
+        return "jsonl"
+    return "json"
+
+
+def _report(progress, done, total):
+    return progress is None or progress(done, total) is not False
+
+
+# -- export -----------------------------------------------------------------
+
+@metrics.timed("transfer.export")
+def export_records(records, path, fmt=None, progress=None, total=None, chunk_size=CHUNK_SIZE):
+    """Write ``records`` to ``path``; returns the number written."""
+    fmt = fmt or format_for_path(path)
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    written = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f) if fmt == "csv" else None
+        if writer:
+            writer.writerow(CSV_HEADER)
+        elif fmt == "json":
+            f.write("[")
+        chunk = []
+        for record in records:
+            chunk.append(record)
+            if len(chunk) >= chunk_size:
+                _write_chunk(f, writer, fmt, chunk, written)
+                written += len(chunk)
+                chunk = []
+                if not _report(progress, written, total):
+                    break
+        else:
+            if chunk:
+                _write_chunk(f, writer, fmt, chunk, written)
+                written += len(chunk)
+                _report(progress, written, total)
+        if fmt == "json":
+            f.write("\n]" if written else "]")
+    return written
+
+
+def _fields(record):
+    # Dates are stored as timestamps and written as YYYY-MM-DD HH:MM
+    return record["name"], record["password"], record["type"], format_date(record["date"])
+
+
+def _write_chunk(f, writer, fmt, chunk, written):
+    if fmt == "csv":
+        writer.writerows(map(_fields, chunk))
+    elif fmt == "jsonl":
+        f.write("".join(json.dumps(dict(zip(FIELDS, _fields(item)))) + "\n" for item in chunk))
+    else:
+        # Same layout as json.dump(..., indent=2), one element at a time
+        parts = []
+        for i, item in enumerate(chunk):
+            body = json.dumps(dict(zip(FIELDS, _fields(item))), indent=2).replace("\n", "\n  ")
+            parts.append(("\n  " if written == 0 and i == 0 else ",\n  ") + body)
+        f.write("".join(parts))
+
+
+# -- import -----------------------------------------------------------------
+
+def entry_digest(name, password):
+    """64-bit digest identifying a (name, password) pair for de-duplication."""
+    h = hashlib.blake2b(digest_size=8)
+    h.update(name.encode("utf-8", "surrogatepass"))
+    h.update(b"\0")
+    h.update(password.encode("utf-8", "surrogatepass"))
+    return int.from_bytes(h.digest(), "little")
+
+
+def _pick(row, columns):
+    for column in columns:
+        value = row.get(column)
+        if value not in (None, ""):
+            return value
+    return None
+
+
+def _parse_date(value):
+    """The timestamp of an imported date, ``None`` when there is none."""
+    if value in (None, ""):
+        return None
+    if isinstance(value, (int, float)) or str(value).strip().isdigit():
+        stamp = float(value)
+        if stamp > 1e11:  # milliseconds, as in Firefox exports
+            stamp /= 1000
+        try:
+            datetime.fromtimestamp(stamp)  # in range
+        except (OverflowError, OSError, ValueError):
+            return None
+        return int(stamp)
+    text = str(value).strip()
+    try:
+        return int(datetime.fromisoformat(text.replace("Z", "+00:00")).timestamp())
+    except ValueError:
+        pass
+    try:
+        return date_span(text[:16])[0]
+    except ValueError:
+        return None
+
+
+def normalize(row, now=None):
+    """Map an imported row (any supported layout) to a record, or ``None``."""
+    row = {str(k).strip().lower(): v for k, v in row.items() if k is not None}
+    login = row.get("login")
+    if isinstance(login, dict):  # Bitwarden JSON nests credentials
+        for key, value in login.items():
+            row.setdefault(f"login_{key}".lower(), value)
+        uris = login.get("uris") or []
+        if uris and isinstance(uris[0], dict):
+            row.setdefault("login_uri", uris[0].get("uri"))
+    password = _pick(row, PASSWORD_COLUMNS)
+    if not isinstance(password, str) or not password:
+        return None
+    name = _pick(row, NAME_COLUMNS)
+    if not name:
+        name = _pick(row, URL_COLUMNS) or "Imported"
+        username = _pick(row, USERNAME_COLUMNS)
+        if username:
+            name = f"{name} ({username})"
+    type_ = _pick(row, TYPE_COLUMNS)
+    if type_ not in ("password", "passphrase"):
+        type_ = classify(password)
+    date = _parse_date(_pick(row, DATE_COLUMNS)) or now or int(time.time())
+    return {"name": str(name), "password": password, "type": type_, "date": date}
+
+
+def iter_rows(path, fmt=None):
+    """Yield raw row dicts from a CSV, JSON-lines or JSON file."""
+    fmt = fmt or format_for_path(path)
+    with open(path, "r", newline="", encoding="utf-8-sig") as f:
+        if fmt == "csv":
+            yield from csv.DictReader(f)
+        elif fmt == "jsonl":
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+        else:
+            yield from _iter_json(f)
+
+
+def _iter_json(f, read_size=1 << 16):
+    """Stream the elements of a top-level JSON array.
+
+    For an object wrapping the list (``{"items": [...]}`` as in Bitwarden
+    exports), the first of ``WRAPPER_KEYS`` holding an array is streamed;
+    the other members are decoded one at a time and dropped.
+    """
+    stream = _JSONStream(f, read_size)
+    first = stream.skip(" \t\r\n")
+    if first == "[":
+        yield from stream.array()
+        return
+    if first == "{":
+        stream.pos += 1
+        while stream.skip(" \t\r\n,") not in ("}", ""):
+            key = stream.value()
+            if stream.skip(" \t\r\n") != ":":
+                raise ValueError("malformed JSON object")
+            stream.pos += 1
+            if stream.skip(" \t\r\n") == "[" and key in WRAPPER_KEYS:
+                yield from stream.array()
+                return
+            stream.value()
+    raise ValueError("JSON file does not contain a list of passwords")
+
+
+class _JSONStream:
+    """A JSON text read in ``read_size`` pieces, decoded one value at a time."""
+
+    def __init__(self, f, read_size):
+        self.f = f
+        self.read_size = read_size
+        self.decoder = json.JSONDecoder()
+        self.buf = ""
+        self.pos = 0
+
+    def skip(self, chars):
+        """Skip ``chars``; returns the next character, ``""`` at the end."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in chars:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            more = self.f.read(self.read_size)
+            if not more:
+                return ""
+            self.buf, self.pos = more, 0
+
+    def value(self):
+        while True:
+            try:
+                item, end = self.decoder.raw_decode(self.buf, self.pos)
+                break
+            except json.JSONDecodeError:
+                more = self.f.read(self.read_size)
+                if not more:
+                    raise
+                self.buf, self.pos = self.buf[self.pos:] + more, 0
+        self.pos = end
+        if self.pos > self.read_size:
+            self.buf, self.pos = self.buf[self.pos:], 0
+        return item
+
+    def array(self):
+        """Yield the elements of the array starting at the current ``[``."""
+        self.pos += 1
+        while True:
+            c = self.skip(" \t\r\n,")
+            if not c:
+                raise ValueError("unterminated JSON array")
+            if c == "]":
+                return
+            yield self.value()
+
+
+class ImportResult:
+    def __init__(self):
+        self.imported = 0
+        self.duplicates = 0
+        self.invalid = 0
+        self.cancelled = False
+
+    def __repr__(self):
+        return (f"ImportResult(imported={self.imported}, duplicates={self.duplicates}, "
+                f"invalid={self.invalid}, cancelled={self.cancelled})")
+
+
+@metrics.timed("transfer.import")
+def import_records(path, store, fmt=None, progress=None, batch_size=BATCH_SIZE, dedupe=True):
+    """Import ``path`` into ``store`` in batches; returns an :class:`ImportResult`."""
+    result = ImportResult()
+    seen = set()
+    if dedupe:
+        existing = store.count()
+        for record in store.records():
+            seen.add(entry_digest(record["name"], record["password"]))
+            if len(seen) % CHUNK_SIZE == 0 and not _report(progress, len(seen), existing):
+                result.cancelled = True
+                return result
+    now = int(time.time())
+    batch = []
+    rows = 0
+    for row in iter_rows(path, fmt):
+        # Report by rows read, not rows imported: a file of duplicates
+        # must stay cancellable too
+        if rows and rows % CHUNK_SIZE == 0 and not _report(progress, rows, None):
+            result.cancelled = True
+            break
+        rows += 1
+        record = normalize(row, now) if isinstance(row, dict) else None
+        if record is None:
+            result.invalid += 1
+            continue
+        if dedupe:
+            digest = entry_digest(record["name"], record["password"])
+            if digest in seen:
+                result.duplicates += 1
+                continue
+            seen.add(digest)
+        batch.append(record)
+        if len(batch) >= batch_size:
+            store.add_many(batch)
+            result.imported += len(batch)
+            batch = []
+    if batch:
+        store.add_many(batch)
+        result.imported += len(batch)
+    if not result.cancelled:
+        _report(progress, rows, rows)
+    return result
@@ -0,0 +1,368 @@
+"""Guaranteed-unique bulk generation within a fixed memory budget.
+
+:class:`UniqueFilter` remembers every item it has accepted and rejects
+repeats, for batches far larger than would fit in a Python ``set``:
+
+* Each item is reduced to a 64-bit *key*: Python's string hash, which is
+  SipHash with a random per-process key. The Bloom filter probes are
+  derived from the key by double hashing.
+* A scalable Bloom filter answers "definitely new" for almost every item.
+  It grows in layers of doubling capacity and tightening error rate
+  (Almeida et al.) until ``memory`` bytes are used; past that the last
+  layer keeps filling and its error rate rises, which costs speed only.
+* A Bloom hit is verified exactly against the accepted keys: recent keys
+  in a ``set``, older ones spilled to sorted uint64 run files that are
+  memory-mapped and binary-searched. Runs are merged in tiers (like an LSM
+  tree), so a lookup touches a few dozen of them at most.
+
+Two different items with the same 64-bit key would make the second one a
+"repeat": it is dropped and replaced, so the output stays unique; the
+chance is about ``n**2 / 2**65`` for ``n`` items in total.
+
+NumPy (optional) vectorises the Bloom filter and the run merges.
+"""
+
+import math
+import mmap
+import os
+from array import array
+from bisect import bisect_left
+from heapq import merge
+
+from . import metrics, rng
+
+DEFAULT_MEMORY = 128 << 20  # bytes of Bloom filter
+ERROR_RATE = 1e-3  # of the first layer; later layers halve it
+RUN_SIZE = 1 << 18  # keys held in memory before spilling a sorted run
+MERGE_FANOUT = 4  # runs of one tier merged into the next
+MAX_IDLE_BATCHES = 100  # batches in a row without a new item before giving up
+_MERGE_CHUNK = 1 << 20
+_MASK64 = (1 << 64) - 1
+_MIX = 0x9E3779B97F4A7C15
+
+
+def _second_hash(key):
+    """Bloom probe step derived from ``key``; matches the NumPy expression."""
+    return (((key ^ (key >> 31)) * _MIX) & _MASK64) | 1
+
+
+def collision_probability(count, space):
+    """Chance that ``count`` uniform draws from ``space`` values repeat.
+
+    Birthday bound ``1 - exp(-n(n-1) / 2N)``, computed in log space so
+    ``space`` may be a huge integer.
+    """
+    if count < 2 or space < 1:
+        return 0.0 if count < 2 else 1.0
+    exponent = math.log2(count) + math.log2(count - 1) - 1 - math.log2(space)
+    if exponent > 10:
+        return 1.0
+    return -math.expm1(-(2.0 ** exponent))
+
+
+def password_space(length, charset, keyword="", policy=None):
+    """Number of distinct passwords (an upper bound with a keyword)."""
+    random_len = max(0, length - len(keyword))
+    if policy is not None:
+        from .policy import sampler
+        space = sampler(policy, random_len).space
+    else:
+        space = len(set(charset)) ** random_len
+    return space * (random_len + 1) if keyword else space
+
+
+def passphrase_space(wordlist_size, words=4, add_number=True, **options):
+    """Number of distinct passphrases, assuming distinct words.
+
+    ``options`` are the other :class:`passcraft.passphrase.Style` fields.
+    """
+    from .passphrase import Style, space
+    return space(wordlist_size, Style(words, add_number=add_number, **options))
+
+
+def check_capacity(count, space):
+    """Raise ``ValueError`` if ``count`` unique items cannot exist."""
+    if count > space:
+        raise ValueError(f"only {space:,} distinct items exist with these "
+                         f"settings, fewer than the {count:,} requested")
+
+
+class _BloomLayer:
+    __slots__ = ("bits", "mask", "hashes", "capacity", "count", "data")
+
+    def __init__(self, capacity, error_rate, max_bytes):
+        bits = -capacity * math.log(error_rate) / math.log(2) ** 2
+        bits = 1 << max(6, math.ceil(math.log2(max(1, bits))))
+        while bits // 8 > max_bytes and bits > 64:
+            bits >>= 1
+        self.bits = bits
+        self.mask = bits - 1
+        # Optimal for the intended density; a smaller table keeps it
+        self.hashes = max(1, round(-math.log2(error_rate)))
+        self.capacity = capacity
+        self.count = 0
+        self.data = bytearray(bits // 8)
+
+
+class UniqueFilter:
+    """Accepts each distinct item once; see the module docstring.
+
+    ``capacity`` is the expected number of items (the first Bloom layer is
+    sized for it) and ``memory`` the Bloom filter budget in bytes.
+    """
+
+    def __init__(self, capacity=1 << 20, memory=DEFAULT_MEMORY, error_rate=ERROR_RATE,
+                 run_size=RUN_SIZE, directory=None):
+        self.memory = memory
+        self.error_rate = error_rate
+        self.run_size = run_size
+        self._layers = []
+        self._add_layer(max(1024, capacity))
+        self._recent = set()
+        self._runs = []  # [(tier, count, path, mmap, view)] oldest first
+        self._dir = directory
+        self._own_dir = directory is None
+        self._count = 0
+        self.verifications = 0
+        self.false_positives = 0
+
+    def __len__(self):
+        return self._count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def close(self):
+        for run in self._runs:
+            self._close_run(run)
+        self._runs = []
+        if self._own_dir and self._dir is not None:
+            import shutil
+            shutil.rmtree(self._dir, ignore_errors=True)
+            self._dir = None
+
+    @property
+    def memory_used(self):
+        return sum(len(layer.data) for layer in self._layers)
+
+    def _add_layer(self, capacity):
+        error_rate = self.error_rate * 0.5 ** len(self._layers)
+        budget = self.memory - self.memory_used
+        self._layers.append(_BloomLayer(capacity, error_rate, budget))
+
+    # -- the Bloom filter -----------------------------------------------------
+
+    def _hits(self, keys):
+        """Positions in ``keys`` that the Bloom filter may have seen."""
+        np = rng.numpy() if len(keys) >= 256 else None
+        if np is not None:
+            h1 = np.array(keys, dtype=np.uint64)
+            h2 = ((h1 ^ (h1 >> np.uint64(31))) * np.uint64(_MIX)) | np.uint64(1)
+            seen = np.zeros(len(keys), dtype=bool)
+            for layer in self._layers:
+                data = np.frombuffer(layer.data, dtype=np.uint8)
+                hit = np.ones(len(keys), dtype=bool)
+                for i in range(layer.hashes):
+                    bit = (h1 + np.uint64(i) * h2) & np.uint64(layer.mask)
+                    hit &= (data[(bit >> np.uint64(3)).astype(np.intp)]
+                            >> (bit & np.uint64(7)).astype(np.uint8)) & 1 == 1
+                seen |= hit
+            return np.flatnonzero(seen).tolist()
+        out = []
+        for pos, h1 in enumerate(keys):
+            h2 = _second_hash(h1)
+            for layer in self._layers:
+                data, mask = layer.data, layer.mask
+                for i in range(layer.hashes):
+                    bit = (h1 + i * h2) & mask
+                    if not data[bit >> 3] & (1 << (bit & 7)):
+                        break
+                else:
+                    out.append(pos)
+                    break
+        return out
+
+    def _remember(self, keys):
+        """Set the Bloom bits of newly accepted keys and store them."""
+        np = rng.numpy() if len(keys) >= 256 else None
+        while keys:
+            layer = self._layers[-1]
+            room = layer.capacity - layer.count
+            if room <= 0:
+                if self.memory - self.memory_used >= 1024:
+                    self._add_layer(layer.capacity * 2)
+                    continue
+                room = len(keys)  # out of budget: keep filling the last layer
+            part, keys = keys[:room], keys[room:]
+            layer.count += len(part)
+            if np is not None:
+                h1 = np.array(part, dtype=np.uint64)
+                h2 = ((h1 ^ (h1 >> np.uint64(31))) * np.uint64(_MIX)) | np.uint64(1)
+                data = np.frombuffer(layer.data, dtype=np.uint8)
+                for i in range(layer.hashes):
+                    bit = (h1 + np.uint64(i) * h2) & np.uint64(layer.mask)
+                    np.bitwise_or.at(data, (bit >> np.uint64(3)).astype(np.intp),
+                                     np.uint8(1) << (bit & np.uint64(7)).astype(np.uint8))
+            else:
+                data, mask = layer.data, layer.mask
+                for h1 in part:
+                    h2 = _second_hash(h1)
+                    for i in range(layer.hashes):
+                        bit = (h1 + i * h2) & mask
+                        data[bit >> 3] |= 1 << (bit & 7)
+            self._recent.update(part)
+            self._count += len(part)
+            if len(self._recent) >= self.run_size:
+                self._spill()
+
+    # -- exact key store --------------------------------------------------------
+
+    def _contains_key(self, key):
+        if key in self._recent:
+            return True
+        for run in self._runs:
+            view = run[4]
+            i = bisect_left(view, key)
+            if i < len(view) and view[i] == key:
+                return True
+        return False
+
+    def _run_path(self):
+        import tempfile
+        if self._dir is None:
+            self._dir = tempfile.mkdtemp(prefix="passcraft-unique-")
+        fd, path = tempfile.mkstemp(dir=self._dir, suffix=".run")
+        os.close(fd)
+        return path
+
+    def _open_run(self, tier, path, count):
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return (tier, count, path, mm, memoryview(mm).cast("Q"))
+
+    @staticmethod
+    def _close_run(run):
+        run[4].release()
+        run[3].close()
+        os.unlink(run[2])
+
+    def _spill(self):
+        path = self._run_path()
+        np = rng.numpy()
+        if np is not None:
+            keys = np.fromiter(self._recent, dtype=np.uint64, count=len(self._recent))
+            keys.sort()
+        else:
+            keys = array("Q", sorted(self._recent))
+        with open(path, "wb") as f:
+            keys.tofile(f)
+        self._recent = set()
+        self._runs.append(self._open_run(0, path, len(keys)))
+        self._compact()
+
+    def _compact(self):
+        # Merge the newest MERGE_FANOUT runs while they share a tier
+        while (len(self._runs) >= MERGE_FANOUT
+               and len({run[0] for run in self._runs[-MERGE_FANOUT:]}) == 1):
+            group = self._runs[-MERGE_FANOUT:]
+            path = self._run_path()
+            with metrics.timer("unique.merge"), open(path, "wb") as f:
+                _merge_runs([run[4] for run in group], f)
+            count = sum(run[1] for run in group)
+            del self._runs[-MERGE_FANOUT:]
+            for run in group:
+                self._close_run(run)
+            self._runs.append(self._open_run(group[0][0] + 1, path, count))
+
+    # -- public interface -------------------------------------------------------
+
+    @metrics.timed("unique.filter")
+    def filter(self, items, limit=None):
+        """The items not seen before, in order; repeats within ``items`` count too.
+
+        With ``limit``, at most that many are accepted and the rest ignored.
+        """
+        keys = [hash(item) & _MASK64 for item in items]
+        hits = self._hits(keys)
+        if not hits and len(set(keys)) == len(keys) and (limit is None or len(keys) <= limit):
+            self._remember(keys)  # the common case: nothing seen before
+            return list(items)
+        hits = set(hits)
+        fresh = []
+        accepted = []
+        batch_keys = set()
+        for pos, (item, key) in enumerate(zip(items, keys)):
+            if key in batch_keys:
+                continue
+            if pos in hits:
+                self.verifications += 1
+                if self._contains_key(key):
+                    continue
+                self.false_positives += 1
+            batch_keys.add(key)
+            fresh.append(item)
+            accepted.append(key)
+            if len(fresh) == limit:
+                break
+        self._remember(accepted)
+        return fresh
+
+    def update(self, items):
+        """Mark ``items`` as seen (e.g. the existing vault) without returning them."""
+        self.filter(list(items))
+
+
+def _merge_runs(views, out):
+    """Write the sorted union of disjoint sorted uint64 views to ``out``."""
+    np = rng.numpy()
+    if np is None:
+        buffer = array("Q")
+        for key in merge(*views):
+            buffer.append(key)
+            if len(buffer) >= _MERGE_CHUNK:
+                buffer.tofile(out)
+                buffer = array("Q")
+        buffer.tofile(out)
+        return
+    arrays = [np.frombuffer(view, dtype=np.uint64) for view in views]
+    starts = [0] * len(arrays)
+    while True:
+        live = [i for i, a in enumerate(arrays) if starts[i] < len(a)]
+        if not live:
+            return
+        # Everything up to the smallest chunk end can be merged now
+        pivot = min(arrays[i][min(starts[i] + _MERGE_CHUNK, len(arrays[i])) - 1] for i in live)
+        parts = []
+        for i in live:
+            end = starts[i] + int(np.searchsorted(arrays[i][starts[i]:], pivot, side="right"))
+            parts.append(arrays[i][starts[i]:end])
+            starts[i] = end
+        block = np.concatenate(parts)
+        block.sort()
+        block.tofile(out)
+
+
+def iter_unique(generate, count, seen, batch_size=1024):
+    """Yield batches from ``generate(n)`` with repeats removed, ``count`` items in all.
+
+    Whole batches are drawn even for the last few items, so finishing off
+    a nearly exhausted space does not take one call per draw. Raises
+    ``ValueError`` when the generator stops producing new items.
+    """
+    idle = 0
+    while count > 0:
+        fresh = seen.filter(generate(batch_size), limit=count)
+        if not fresh:
+            idle += 1
+            if idle >= MAX_IDLE_BATCHES:
+                raise ValueError("no new unique items are being generated; "
+                                 "the settings allow too few distinct values")
+            continue
+        idle = 0
+        metrics.count("unique.accepted", len(fresh))
+        yield fresh
+        count -= len(fresh)
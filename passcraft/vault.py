@@ -0,0 +1,333 @@
+"""Encrypted vaults: the password store with passwords encrypted at rest.
+
+The master key is derived with scrypt (``hashlib.scrypt``); the cost
+parameters are stored with the vault (the GUI calibrates them with
+:func:`tune_kdf` when it creates one) and the derived key is cached for the
+rest of the session, so reopening an unlocked vault does not pay for the
+derivation again.
+
+Passwords are sealed with AES-GCM in independent chunks of up to
+``CHUNK_RECORDS`` entries (``vault_chunks``); each ``passwords`` row keeps its
+name, type and date in the clear (they drive search and sorting) and points
+at the chunk holding its password. Saving appends to the newest chunk and
+deleting rewrites the record's own chunk, so a single change re-encrypts at
+most ``CHUNK_RECORDS`` passwords whatever the size of the vault. Each chunk
+is bound to its id through the AEAD associated data, so chunks cannot be
+swapped around undetected.
+
+AES-GCM comes from the optional ``cryptography`` package; without it
+plaintext stores keep working and :func:`available` returns ``False``.
+"""
+
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+
+from . import metrics
+from .store import PasswordStore, Record
+
+try:
+    from cryptography.exceptions import InvalidTag
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+except ImportError:  # optional dependency
+    AESGCM = None
+
+# scrypt cost; n=2**15, r=8 takes about 0.1 s and 32 MiB
+KDF_PARAMS = {"n": 1 << 15, "r": 8, "p": 1}
+CHUNK_RECORDS = 256
+# Decrypted chunks kept in memory
+CACHE_CHUNKS = 64
+_NONCE_SIZE = 12
+_VERIFIER = b"passcraft vault"
+
+# (salt, n, r, p, password digest) -> key, for the lifetime of the process
+_session_keys = {}
+
+
+class InvalidPassword(ValueError):
+    pass
+
+
+def available():
+    return AESGCM is not None
+
+
+def derive_key(password, salt, n, r, p):
+    """Derive (or fetch from the session cache) the 256-bit vault key."""
+    digest = hashlib.sha256(salt + password.encode("utf-8")).digest()
+    cache_key = (salt, n, r, p, digest)
+    key = _session_keys.get(cache_key)
+    if key is None:
+        with metrics.timer("vault.derive_key"):
+            key = hashlib.scrypt(password.encode("utf-8"), salt=salt, n=n, r=r, p=p,
+                                 maxmem=256 * n * r * p, dklen=32)
+        _session_keys[cache_key] = key
+    return key
+
+
+def forget_keys():
+    """Drop every cached key (e.g. on an explicit lock)."""
+    _session_keys.clear()
+
+
+def tune_kdf(target_seconds=0.25, r=8, p=1, max_n=1 << 20):
+    """Return the largest scrypt ``n`` whose derivation fits ``target_seconds``."""
+    n = 1 << 14
+    while n < max_n:
+        start = time.perf_counter()
+        hashlib.scrypt(b"calibrate", salt=b"\0" * 16, n=n, r=r, p=p,
+                       maxmem=256 * n * r * p, dklen=32)
+        # Doubling n doubles the cost
+        if 2 * (time.perf_counter() - start) > target_seconds:
+            break
+        n <<= 1
+    return {"n": n, "r": r, "p": p}
+
+
+def _aad(chunk_id):
+    return b"passcraft chunk %d" % chunk_id
+
+
+class EncryptedPasswordStore(PasswordStore):
+    """A :class:`PasswordStore` whose passwords are encrypted at rest.
+
+    Opening a plaintext database with a password turns it into a vault: the
+    existing passwords are encrypted and the plaintext is scrubbed from the
+    file. ``kdf_params`` only applies to that first conversion.
+    """
+
+    def __init__(self, path, password, legacy_json=None, kdf_params=None):
+        if not available():
+            raise RuntimeError("encrypted vaults need the 'cryptography' package")
+        super().__init__(path)
+        # Zero freed pages so deleted or converted plaintext does not linger
+        self.conn.execute("PRAGMA secure_delete=ON")
+        self._chunks = OrderedDict()  # chunk id -> {record id: password}
+        self._data_version = None
+        try:
+            if self.is_encrypted():
+                self._unlock(password)
+            else:
+                self._initialize(password, kdf_params or KDF_PARAMS)
+        except BaseException:
+            # A wrong password is retried with a new store; release the file
+            self.close()
+            raise
+        if legacy_json:
+            self.migrate_json(legacy_json)
+
+    def _meta(self, key):
+        row = self.conn.execute("SELECT value FROM vault_meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _unlock(self, password):
+        params = json.loads(self._meta("kdf"))
+        key = derive_key(password, bytes.fromhex(params["salt"]),
+                         params["n"], params["r"], params["p"])
+        verifier = self._meta("verifier")
+        try:
+            AESGCM(key).decrypt(verifier[:_NONCE_SIZE], verifier[_NONCE_SIZE:], b"verifier")
+        except InvalidTag:
+            raise InvalidPassword("wrong master password") from None
+        self._aead = AESGCM(key)
+
+    def _initialize(self, password, params):
+        salt = os.urandom(16)
+        key = derive_key(password, salt, params["n"], params["r"], params["p"])
+        self._aead = AESGCM(key)
+        nonce = os.urandom(_NONCE_SIZE)
+        verifier = nonce + self._aead.encrypt(nonce, _VERIFIER, b"verifier")
+        kdf = json.dumps(dict(params, salt=salt.hex(), algorithm="scrypt"))
+        with self.transaction():
+            self.conn.execute("INSERT INTO vault_meta VALUES ('verifier', ?)", (verifier,))
+            self.conn.execute("INSERT INTO vault_meta VALUES ('kdf', ?)", (kdf,))
+            rows = self.conn.execute(
+                "SELECT id, password FROM passwords ORDER BY id").fetchall()
+            for start in range(0, len(rows), CHUNK_RECORDS):
+                chunk_id = start // CHUNK_RECORDS + 1
+                block = rows[start:start + CHUNK_RECORDS]
+                self._write_chunk(chunk_id, {row[0]: row[1] for row in block})
+                self.conn.executemany(
+                    "UPDATE passwords SET password = '', chunk_id = ? WHERE id = ?",
+                    ((chunk_id, row[0]) for row in block))
+        if rows:
+            # Rewrite the file so no page still holds the old plaintext
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self.conn.execute("VACUUM")
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def reopen(self):
+        # Shares the unlocked key, so the other handle needs no master password
+        other = self.__class__.__new__(self.__class__)
+        PasswordStore.__init__(other, self.path)
+        other.conn.execute("PRAGMA secure_delete=ON")
+        other._chunks = OrderedDict()
+        other._data_version = None
+        other._aead = self._aead
+        return other
+
+    def lock(self):
+        """Forget the key and every decrypted password; the store is closed."""
+        self._chunks.clear()
+        self._aead = None
+        forget_keys()
+        self.close()
+
+    # -- chunks -------------------------------------------------------------
+
+    def _read_chunk(self, chunk_id):
+        # Another connection (see reopen) may have rewritten chunks since
+        version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        if version != self._data_version:
+            self._chunks.clear()
+            self._data_version = version
+        entries = self._chunks.get(chunk_id)
+        if entries is not None:
+            self._chunks.move_to_end(chunk_id)
+            return entries
+        row = self.conn.execute(
+            "SELECT nonce, data FROM vault_chunks WHERE id = ?", (chunk_id,)).fetchone()
+        if row is None:
+            entries = {}
+        else:
+            with metrics.timer("vault.decrypt_chunk"):
+                plain = self._aead.decrypt(row[0], row[1], _aad(chunk_id))
+            entries = {int(k): v for k, v in json.loads(plain).items()}
+        self._cache_chunk(chunk_id, entries)
+        return entries
+
+    def _cache_chunk(self, chunk_id, entries):
+        self._chunks[chunk_id] = entries
+        self._chunks.move_to_end(chunk_id)
+        while len(self._chunks) > CACHE_CHUNKS:
+            self._chunks.popitem(last=False)
+
+    def _write_chunk(self, chunk_id, entries):
+        if not entries:
+            self.conn.execute("DELETE FROM vault_chunks WHERE id = ?", (chunk_id,))
+            return
+        nonce = os.urandom(_NONCE_SIZE)
+        plain = json.dumps(entries, separators=(",", ":")).encode("utf-8")
+        with metrics.timer("vault.encrypt_chunk"):
+            data = self._aead.encrypt(nonce, plain, _aad(chunk_id))
+        self.conn.execute("INSERT OR REPLACE INTO vault_chunks VALUES (?, ?, ?)",
+                          (chunk_id, nonce, data))
+
+    def _open_chunk(self):
+        """Return ``(chunk id, size)`` of the chunk new records go into."""
+        chunk_id = self.conn.execute("SELECT MAX(id) FROM vault_chunks").fetchone()[0]
+        if chunk_id is None:
+            return 1, 0
+        size = self.conn.execute(
+            "SELECT COUNT(*) FROM passwords WHERE chunk_id = ?", (chunk_id,)).fetchone()[0]
+        if size >= CHUNK_RECORDS:
+            return chunk_id + 1, 0
+        return chunk_id, size
+
+    def _decrypt_rows(self, rows):
+        records = []
+        for record_id, name, password, type, date, chunk_id in rows:
+            if chunk_id is not None:
+                password = self._read_chunk(chunk_id).get(record_id, "")
+            records.append(Record(record_id, name, password, type, date))
+        return records
+
+    # -- reads --------------------------------------------------------------
+
+    _SELECT = "SELECT id, name, password, type, date, chunk_id FROM passwords"
+
+    def get(self, record_id):
+        rows = self.conn.execute(f"{self._SELECT} WHERE id = ?", (record_id,)).fetchall()
+        return self._decrypt_rows(rows)[0] if rows else None
+
+    def records(self):
+        # Rows come in id order, i.e. chunk by chunk, so each chunk is
+        # decrypted once
+        cursor = self.conn.execute(f"{self._SELECT} ORDER BY id")
+        while True:
+            rows = cursor.fetchmany(CHUNK_RECORDS)
+            if not rows:
+                return
+            yield from self._decrypt_rows(rows)
+
+    @metrics.timed("store.get_many")
+    def get_many(self, ids):
+        ids = list(ids)
+        found = {}
+        for i in range(0, len(ids), 500):
+            chunk = ids[i:i + 500]
+            marks = ",".join("?" * len(chunk))
+            rows = self.conn.execute(f"{self._SELECT} WHERE id IN ({marks})", chunk).fetchall()
+            for record in self._decrypt_rows(rows):
+                found[record.id] = record
+        return found
+
+    def page_ids(self, column="id", descending=False, after=None, limit=1000):
+        # Passwords are not stored in the clear, so they cannot be sorted on
+        if column == "password":
+            column = "id"
+        return super().page_ids(column, descending, after, limit)
+
+    # -- writes -------------------------------------------------------------
+
+    @metrics.timed("store.add")
+    def add(self, name, password, type, date=None):
+        date = int(time.time()) if date is None else date
+        record = Record(None, name, password, type, date)
+        self.add_many([record])
+        return record
+
+    @metrics.timed("store.add_many")
+    def add_many(self, records):
+        """Insert records, re-encrypting only the newest chunk plus new ones.
+
+        :class:`Record` arguments get their new ``id``.
+        """
+        chunk_id, size = self._open_chunk()
+        touched = {}
+        count = 0
+        with self.transaction():
+            entries = dict(self._read_chunk(chunk_id))
+            for record in records:
+                if size >= CHUNK_RECORDS:
+                    touched[chunk_id] = entries
+                    chunk_id, size, entries = chunk_id + 1, 0, {}
+                cur = self.conn.execute(
+                    "INSERT INTO passwords (name, password, type, date, chunk_id) "
+                    "VALUES (?, '', ?, ?, ?)",
+                    (record["name"], record["type"], record["date"], chunk_id))
+                if isinstance(record, Record):
+                    record.id = cur.lastrowid
+                entries[cur.lastrowid] = record["password"]
+                size += 1
+                count += 1
+            touched[chunk_id] = entries
+            for touched_id, touched_entries in touched.items():
+                self._write_chunk(touched_id, touched_entries)
+        # Only update the cache once the transaction has committed
+        for touched_id, touched_entries in touched.items():
+            self._cache_chunk(touched_id, touched_entries)
+        return count
+
+    @metrics.timed("store.delete")
+    def delete(self, record_id):
+        row = self.conn.execute(
+            "SELECT chunk_id FROM passwords WHERE id = ?", (record_id,)).fetchone()
+        if row is None:
+            return
+        chunk_id = row[0]
+        entries = dict(self._read_chunk(chunk_id))
+        entries.pop(record_id, None)
+        with self.transaction():
+            self.conn.execute("DELETE FROM passwords WHERE id = ?", (record_id,))
+            self._write_chunk(chunk_id, entries)
+        self._cache_chunk(chunk_id, entries)
+
+    @metrics.timed("store.clear")
+    def clear(self):
+        with self.transaction():
+            self.conn.execute("DELETE FROM passwords")
+            self.conn.execute("DELETE FROM vault_chunks")
+        self._chunks.clear()
@@ -0,0 +1,127 @@
+"""Compiled, memory-mapped wordlists.
+
+``wordlist.txt`` is compiled once into a binary file in the cache directory::
+
+    header   magic, word count, source fingerprint
+    offsets  (count + 1) uint64 byte offsets into the blob
+    blob     the UTF-8 words back to back
+
+The file is memory-mapped, so opening a multi-million-word list costs a few
+page faults instead of reading and splitting every line, and ``words[i]``
+decodes just that one word. Blank lines are skipped, and so are words
+repeating an earlier one up to case: passphrase entropy counts words as
+distinct. The compiled file is rebuilt automatically when
+the source file's size or modification time changes.
+"""
+
+import mmap
+import os
+import struct
+import tempfile
+from array import array
+
+from . import cache
+
+_MAGIC = b"PCWORDS2"  # 2: duplicate words dropped
+_HEADER = struct.Struct("=8sQ64s")
+# Offsets are appended in blocks to keep memory flat while compiling
+_FLUSH_WORDS = 1 << 16
+
+
+class CompiledWordlist:
+    """Read-only sequence of words backed by a memory-mapped compiled file."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, fingerprint = _HEADER.unpack_from(self._mm)
+        offsets_end = _HEADER.size + 8 * (count + 1)
+        if magic != _MAGIC or len(self._mm) < offsets_end:
+            self._mm.close()
+            raise ValueError(f"{path} is not a compiled PassCraft wordlist")
+        self.path = path
+        self.fingerprint = fingerprint.rstrip(b"\0").decode("utf-8", "replace")
+        self._count = count
+        self._offsets = memoryview(self._mm)[_HEADER.size:offsets_end].cast("Q")
+        self._base = offsets_end
+        if self._base + self._offsets[count] != len(self._mm):
+            self.close()
+            raise ValueError(f"{path} is truncated")
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("wordlist index out of range")
+        start = self._base + self._offsets[index]
+        end = self._base + self._offsets[index + 1]
+        return self._mm[start:end].decode("utf-8")
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield self[i]
+
+    def close(self):
+        self._offsets.release()
+        self._mm.close()
+
+
+def _fingerprint(source):
+    # Fits the fixed-width header field; long paths are hashed by cache_key
+    return cache.cache_key(cache.file_fingerprint(source)).encode()
+
+
+def compiled_path(source):
+    return cache.cache_path(f"wordlist-{cache.cache_key(os.path.abspath(source))}.bin")
+
+
+def compile_wordlist(source, target=None):
+    """Compile ``source`` (one word per line) and return the compiled path."""
+    target = target or compiled_path(source)
+    fingerprint = _fingerprint(source)
+    offsets = array("Q", [0])
+    # Hashes of the case-folded words; a collision only drops one more word
+    seen = set()
+    with tempfile.TemporaryFile(dir=os.path.dirname(target)) as blob:
+        pos = 0
+        with open(source, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                word = line.strip()
+                key = hash(word.casefold())
+                if not word or key in seen:
+                    continue
+                seen.add(key)
+                data = word.encode("utf-8")
+                blob.write(data)
+                pos += len(data)
+                offsets.append(pos)
+        blob.seek(0)
+
+        def chunks():
+            yield _HEADER.pack(_MAGIC, len(offsets) - 1, fingerprint)
+            yield offsets.tobytes()
+            while True:
+                data = blob.read(1 << 20)
+                if not data:
+                    return
+                yield data
+
+        cache.atomic_write(target, chunks())
+    return target
+
+
+def open_wordlist(source):
+    """Open the compiled form of ``source``, (re)building it when stale."""
+    target = compiled_path(source)
+    fingerprint = _fingerprint(source).decode()
+    try:
+        words = CompiledWordlist(target)
+        if words.fingerprint == fingerprint:
+            return words
+        words.close()
+    except (OSError, ValueError):
+        pass
+    return CompiledWordlist(compile_wordlist(source, target))